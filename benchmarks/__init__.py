@@ -0,0 +1,3 @@
+"""
+Performance benchmarks, to be run as scripts, e.g. 'python -m benchmarks.bench_stitch_merger'.
+"""
@@ -0,0 +1,92 @@
+"""
+Benchmark comparing seam optimization at full resolution with coarse (source resolution) seams refined at full
+resolution, in terms of merge time and seam quality, for different overlap fractions.
+
+Tiles are cut from a synthetic image of 4x4 upscaled tiles of 512x512, each with its own smooth color deviation
+added, emulating the tile-to-tile inconsistencies of a real upscaler.  Seam quality is reported as the mean seam cost,
+i.e. the mean color difference between both tiles across all pixel boundaries where the merged image switches tiles;
+lower is better.
+
+Usage:  python -m benchmarks.bench_seams [--repeats N] [--threads N]
+"""
+
+import time
+
+import click
+import numpy as np
+from PIL import Image
+
+from core.tiles import Tile, TileDimSpec, TileMerger, TileSplitter
+from core.tiles.merging import TileMergeSolution
+
+from .bench_stitch_merger import synthetic_image
+
+TILE_SIZE = 512
+N_TILES_PER_AXIS = 4
+SEAM_SCALE = 4  # = scale factor of the SD2 4x upscaler
+OVERLAP_FRACTIONS = [0.1, 0.25, 0.4]
+
+
+def inconsistent_tiles(tiles: list[Tile], seed: int = 0) -> list[Tile]:
+    """Adds a smooth, random color deviation of up to +/-24 to each tile."""
+    rng = np.random.default_rng(seed)
+    result = []
+    for tile in tiles:
+        low_res = rng.integers(-24, 25, size=(4, 4, 3)).astype(np.float32)
+        deviation = np.stack(
+            [np.array(Image.fromarray(low_res[:, :, c]).resize(tile.img.size, Image.BICUBIC)) for c in range(3)],
+            axis=2,
+        )
+        pixels = np.clip(tile.pixels.astype(np.float32) + deviation, 0, 255).astype(np.uint8)
+        result.append(Tile(pixels=pixels, left=tile.left, top=tile.top))
+    return result
+
+
+def seam_cost(solution: TileMergeSolution, tiles: list[Tile]) -> float:
+    """Mean color difference between both tiles at both sides of every pixel boundary where the source changes."""
+    sources = np.asarray(solution.pixel_sources).astype(np.int64)
+    costs = []
+    for dy, dx in [(1, 0), (0, 1)]:
+        h, w = sources.shape[0] - dy, sources.shape[1] - dx
+        ys, xs = np.nonzero(sources[:h, :w] != sources[dy:, dx:])
+        srcs_a, srcs_b = sources[ys, xs], sources[ys + dy, xs + dx]
+        for y, x in [(ys, xs), (ys + dy, xs + dx)]:  # pixels at both sides of the boundary
+            costs.append(np.abs(_tile_colors(tiles, srcs_a, y, x) - _tile_colors(tiles, srcs_b, y, x)).sum(axis=1))
+    return float(np.concatenate(costs).mean())
+
+
+def _tile_colors(tiles: list[Tile], sources: np.ndarray, ys: np.ndarray, xs: np.ndarray) -> np.ndarray:
+    """(n, 3) array with the color of pixel (ys[i], xs[i]) in tile sources[i]."""
+    colors = np.zeros((len(sources), 3), dtype=np.int32)
+    for i in np.unique(sources):
+        sel = sources == i
+        colors[sel] = tiles[i].pixels[ys[sel] - tiles[i].top, xs[sel] - tiles[i].left]
+    return colors
+
+
+@click.command()
+@click.option("--repeats", "-r", type=click.IntRange(min=1), default=3, help="Number of repeats (best time is shown)")
+@click.option("--threads", "-t", type=click.IntRange(min=1), default=None, help="Seam threads (default: all cores)")
+def main(repeats: int, threads: int | None):
+    tile_spec = TileDimSpec(16, TILE_SIZE, 4)
+
+    click.echo(f"{'overlap':>7} | {'seams':>6} | {'merge [s]':>10} | {'seam cost':>10}")
+    click.echo("-" * 44)
+    for overlap_fraction in OVERLAP_FRACTIONS:
+        step = TILE_SIZE - int(np.ceil(TILE_SIZE * overlap_fraction))
+        size = TILE_SIZE + (N_TILES_PER_AXIS - 1) * step
+        splitter = TileSplitter(tile_spec, tile_spec, overlap_fraction=overlap_fraction)
+        tiles = inconsistent_tiles(splitter.split_image(synthetic_image(size, size)))
+
+        for label, seam_scale in [("full", 1), ("coarse", SEAM_SCALE)]:
+            timings = []
+            for _ in range(repeats):
+                t_start = time.perf_counter()
+                solution = TileMerger.stitch(n_threads=threads, seam_scale=seam_scale).merge(tiles)
+                timings.append(time.perf_counter() - t_start)
+            cost = seam_cost(solution, tiles)
+            click.echo(f"{overlap_fraction:>7.2f} | {label:>6} | {min(timings):>10.3f} | {cost:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark of CLI startup time, for the paths that should not load any heavy dependencies:
+  - 'upscale.py --help'
+  - 'upscale.py' with invalid arguments (i.e. failing argument validation)
+
+Each case runs in a fresh interpreter; we report wall time and which heavy modules got imported.
+
+Usage:  python -m benchmarks.bench_startup [--repeats N]
+"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import click
+
+HEAVY_MODULES = ["torch", "diffusers", "cv2"]
+CASES = {
+    "--help": ["--help"],
+    "invalid args": ["--input-file", "does_not_exist.png"],
+}
+
+# runs upscale.py as __main__ and reports which heavy modules were imported
+_RUNNER = f"""
+import runpy, sys
+sys.argv = sys.argv[1:]
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+except SystemExit:
+    pass
+print("imported:", ",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules), file=sys.stderr)
+"""
+
+
+def run_cli(args: list[str]) -> tuple[float, str]:
+    """Runs the CLI with the given arguments in a fresh interpreter; returns (wall time, imported heavy modules)."""
+    script = Path(__file__).parent.parent / "upscale.py"
+    t_start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", _RUNNER, str(script), *args], capture_output=True, text=True)
+    duration = time.perf_counter() - t_start
+    imported = [line for line in proc.stderr.splitlines() if line.startswith("imported:")]
+    return duration, imported[-1].removeprefix("imported:").strip() if imported else "?"
+
+
+@click.command()
+@click.option("--repeats", "-r", type=click.IntRange(min=1), default=5, help="Number of repeats (best time is shown)")
+def main(repeats: int):
+    click.echo(f"{'case':>14} | {'time [s]':>9} | heavy modules imported")
+    click.echo("-" * 56)
+    for name, args in CASES.items():
+        results = [run_cli(args) for _ in range(repeats)]
+        best_time = min(duration for duration, _ in results)
+        click.echo(f"{name:>14} | {best_time:>9.3f} | {results[-1][1] or '-'}")
+
+
+if __name__ == "__main__":
+    main()
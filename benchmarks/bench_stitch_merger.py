@@ -0,0 +1,65 @@
+"""
+Benchmark of StitchMerger.merge(...) for different numbers of tiles, reporting merge time vs output megapixels.
+
+Tiles are cut from a synthetic image with smooth content + noise, using the tile geometry of the SD2 4x upscaler
+at the output resolution (256x256 tiles) and 10% overlap.
+
+Usage:  python -m benchmarks.bench_stitch_merger [--repeats N] [--threads N]
+"""
+
+import time
+
+import click
+import numpy as np
+from PIL import Image
+
+from core.tiles import TileDimSpec, TileMerger, TileSplitter
+
+TILE_SIZE = 256
+OVERLAP_FRACTION = 0.1
+TILE_COUNTS = [1, 4, 16, 64]
+
+
+def synthetic_image(width: int, height: int, seed: int = 0) -> Image.Image:
+    """Smooth random content (upsampled low-res noise) with some added high-frequency noise."""
+    rng = np.random.default_rng(seed)
+    low_res = Image.fromarray(rng.integers(0, 256, size=(max(height // 32, 2), max(width // 32, 2), 3), dtype=np.uint8))
+    smooth = np.array(low_res.resize((width, height), resample=Image.BICUBIC), dtype=np.int16)
+    noisy = smooth + rng.integers(-8, 9, size=smooth.shape, dtype=np.int16)
+    return Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8), mode="RGB")
+
+
+def grid_size(n_tiles_per_axis: int) -> int:
+    """Image size along 1 axis that results in exactly n_tiles_per_axis tiles of TILE_SIZE with the chosen overlap."""
+    step = TILE_SIZE - int(np.ceil(TILE_SIZE * OVERLAP_FRACTION))
+    return TILE_SIZE + (n_tiles_per_axis - 1) * step
+
+
+@click.command()
+@click.option("--repeats", "-r", type=click.IntRange(min=1), default=3, help="Number of repeats (best time is shown)")
+@click.option("--threads", "-t", type=click.IntRange(min=1), default=None, help="Seam threads (default: all cores)")
+def main(repeats: int, threads: int | None):
+    tile_spec = TileDimSpec(16, TILE_SIZE, 4)
+    splitter = TileSplitter(tile_spec, tile_spec, overlap_fraction=OVERLAP_FRACTION)
+
+    click.echo(f"{'tiles':>6} | {'output':>12} | {'MP':>6} | {'merge [s]':>10} | {'s / MP':>8}")
+    click.echo("-" * 56)
+    for n_tiles in TILE_COUNTS:
+        size = grid_size(int(np.sqrt(n_tiles)))
+        tiles = splitter.split_image(synthetic_image(size, size))
+        assert len(tiles) == n_tiles
+
+        timings = []
+        for _ in range(repeats):
+            t_start = time.perf_counter()
+            TileMerger.stitch(n_threads=threads).merge(tiles)
+            timings.append(time.perf_counter() - t_start)
+
+        mp = size * size / 1e6
+        click.echo(
+            f"{n_tiles:>6} | {f'{size}x{size}':>12} | {mp:>6.2f} | {min(timings):>10.3f} | {min(timings) / mp:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
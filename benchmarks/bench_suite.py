@@ -0,0 +1,216 @@
+"""
+Microbenchmark suite of tiling & merging, over a grid of image sizes and overlap fractions, with stored baselines.
+
+Covered are split_in_overlapping_intervals (uncached, for all interval sizes up to the image size),
+TileSplitter.split_image, PasteMerger.merge, StitchMerger.merge and TileMergeSolution debug rendering, all on
+synthetic images with the tile geometry of the SD2 4x upscaler at output resolution (256x256 tiles).
+
+Each case reports its best time per call over a number of repeats, each of which calls the case as many times as
+needed to take at least 0.2s (see timeit.Timer.autorange), such that fast cases are timed reliably.  Results can be
+saved as a JSON baseline and later compared against, flagging cases that got slower by more than a threshold.
+Baselines are machine-specific, so only compare results obtained on the same machine.
+
+Usage:  python -m benchmarks.bench_suite run [--repeats N] [--sizes 512,1024] [--filter TEXT] [--save FILE]
+        python -m benchmarks.bench_suite compare [BASELINE] [--current FILE] [--threshold 0.2]
+"""
+
+import json
+import platform
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+import click
+
+from core.tiles import TileDimSpec, TileMerger, TileSplitter
+from core.tiles.splitting._helpers import _split_in_overlapping_intervals_cached, split_in_overlapping_intervals
+
+from .bench_stitch_merger import synthetic_image
+
+TILE_SIZE = 256
+IMAGE_SIZES = [512, 1024, 2048]
+OVERLAP_FRACTIONS = [0.0, 0.1, 0.25]
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "baseline.json"
+
+
+# =================================================================================================
+#  Cases
+# =================================================================================================
+def iter_cases(sizes: list[int]) -> Iterator[tuple[str, Callable[[], Callable[[], None]]]]:
+    """
+    Yields (name, setup) tuples, with setup() preparing all inputs of the case (not timed) and returning the
+    function to be timed.
+    """
+    tile_spec = TileDimSpec(16, TILE_SIZE, 4)
+    for size in sizes:
+        for overlap in OVERLAP_FRACTIONS:
+            suffix = f"[{size}x{size},overlap={overlap:.2f}]"
+            splitter = TileSplitter(tile_spec, tile_spec, overlap_fraction=overlap)
+
+            def setup_split_intervals(size: int = size, overlap: float = overlap) -> Callable[[], None]:
+                def run():
+                    _split_in_overlapping_intervals_cached.cache_clear()
+                    for n in range(1, size + 1):
+                        split_in_overlapping_intervals(n, tile_spec, overlap)
+
+                return run
+
+            def setup_split_image(size: int = size, splitter: TileSplitter = splitter) -> Callable[[], None]:
+                img = synthetic_image(size, size)
+                return lambda: splitter.split_image(img)
+
+            def setup_merge(
+                merger_factory: Callable[[], TileMerger], size: int = size, splitter: TileSplitter = splitter
+            ) -> Callable[[], None]:
+                tiles = splitter.split_image(synthetic_image(size, size))
+                return lambda: merger_factory().merge(tiles)
+
+            def setup_render(size: int = size, splitter: TileSplitter = splitter) -> Callable[[], None]:
+                solution = TileMerger.stitch().merge(splitter.split_image(synthetic_image(size, size)))
+                return lambda: (solution.pixel_sources_img(), solution.img_overlayed())
+
+            yield f"split_intervals{suffix}", setup_split_intervals
+            yield f"split_image{suffix}", setup_split_image
+            yield f"paste_merge{suffix}", lambda setup=setup_merge: setup(TileMerger.paste)
+            yield f"stitch_merge{suffix}", lambda setup=setup_merge: setup(TileMerger.stitch)
+            yield f"render{suffix}", setup_render
+
+
+def run_cases(sizes: list[int], repeats: int, name_filter: str | None) -> dict[str, float]:
+    """Runs all (matching) cases and returns {name: best time per call in seconds}, printing progress along the way."""
+    results = dict()
+    for name, setup in iter_cases(sizes):
+        if (name_filter is not None) and (name_filter not in name):
+            continue
+        timer = timeit.Timer(setup())
+        number, _ = timer.autorange()
+        results[name] = min(timer.repeat(repeats, number)) / number
+        click.echo(f"{name:<48} {results[name]:>10.4f} s")
+    return results
+
+
+# =================================================================================================
+#  Baselines
+# =================================================================================================
+def save_results(path: Path, results: dict[str, float], repeats: int):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    meta = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": platform.node(),
+        "platform": platform.platform(),
+        "python": sys.version.split()[0],
+        "repeats": repeats,
+    }
+    path.write_text(json.dumps({"meta": meta, "results": results}, indent=2) + "\n")
+
+
+def load_results(path: Path) -> dict[str, float]:
+    return json.loads(path.read_text())["results"]
+
+
+def find_regressions(baseline: dict[str, float], current: dict[str, float], threshold: float) -> list[str]:
+    """Returns names of cases present in both results that are more than a fraction 'threshold' slower."""
+    return [name for name in baseline if (name in current) and (current[name] > (1.0 + threshold) * baseline[name])]
+
+
+# =================================================================================================
+#  CLI
+# =================================================================================================
+def _parse_sizes(ctx: click.Context, param: click.Parameter, value: str) -> list[int]:
+    try:
+        return [int(s) for s in value.split(",")]
+    except ValueError:
+        raise click.BadParameter(f"expected comma-separated integers, got '{value}'")
+
+
+_run_options = [
+    click.option("--repeats", "-r", type=click.IntRange(min=1), default=3, help="Number of repeats (best is kept)"),
+    click.option(
+        "--sizes",
+        default=",".join(str(s) for s in IMAGE_SIZES),
+        callback=_parse_sizes,
+        help=f"Comma-separated image sizes (default: {','.join(str(s) for s in IMAGE_SIZES)})",
+    ),
+    click.option("--filter", "name_filter", default=None, help="Only run cases whose name contains this text"),
+]
+
+
+def _with_run_options(fn):
+    for option in reversed(_run_options):
+        fn = option(fn)
+    return fn
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+@_with_run_options
+@click.option(
+    "--save",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    is_flag=False,
+    flag_value=DEFAULT_BASELINE,
+    help=f"Save results as JSON baseline to this file (default if no file given: {DEFAULT_BASELINE.name})",
+)
+def run(repeats: int, sizes: list[int], name_filter: str | None, save: Path | None):
+    """Run the benchmark suite, optionally saving the results as a baseline."""
+    results = run_cases(sizes, repeats, name_filter)
+    if save is not None:
+        save_results(save, results, repeats)
+        click.echo(f"Results saved to {save}")
+
+
+@cli.command()
+@click.argument("baseline", type=click.Path(exists=True, dir_okay=False, path_type=Path), default=DEFAULT_BASELINE)
+@click.option(
+    "--current",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="Results to compare against the baseline; if not provided, the suite is run now",
+)
+@click.option(
+    "--threshold",
+    type=click.FloatRange(min=0.0),
+    default=0.2,
+    help="Flag cases that are slower than the baseline by more than this fraction (default: 0.2)",
+)
+@_with_run_options
+def compare(
+    baseline: Path, current: Path | None, threshold: float, repeats: int, sizes: list[int], name_filter: str | None
+):
+    """Compare results against a baseline; exits with code 1 if any case regressed by more than the threshold."""
+    baseline_results = load_results(baseline)
+    if current is not None:
+        current_results = load_results(current)
+    else:
+        current_results = run_cases(sizes, repeats, name_filter)
+        click.echo()
+
+    regressions = find_regressions(baseline_results, current_results, threshold)
+    click.echo(f"{'case':<48} {'baseline [s]':>12} {'current [s]':>12} {'change':>8}")
+    click.echo("-" * 84)
+    for name in [*baseline_results, *(name for name in current_results if name not in baseline_results)]:
+        t_base, t_current = baseline_results.get(name), current_results.get(name)
+        if (t_base is None) or (t_current is None):
+            status = "new" if t_base is None else "missing"
+            t_base_str = f"{t_base:>12.4f}" if t_base is not None else f"{'-':>12}"
+            t_current_str = f"{t_current:>12.4f}" if t_current is not None else f"{'-':>12}"
+            click.echo(f"{name:<48} {t_base_str} {t_current_str} {status:>8}")
+        else:
+            flag = "  REGRESSION" if name in regressions else ""
+            click.echo(f"{name:<48} {t_base:>12.4f} {t_current:>12.4f} {t_current / t_base - 1:>+8.1%}{flag}")
+
+    if regressions:
+        click.echo(f"{len(regressions)} case(s) regressed by more than {threshold:.0%}.", err=True)
+        sys.exit(1)
+    click.echo(f"No regressions above {threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    cli()
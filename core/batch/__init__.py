@@ -0,0 +1,6 @@
+"""
+Functionality for upscaling many images in a single run, reusing the same (already loaded) tile upscaler.
+"""
+
+from ._batch_upscaler import BatchJob, BatchResult, BatchUpscaler
+from ._inputs import resolve_inputs
@@ -0,0 +1,123 @@
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from PIL import Image
+
+from core.image_upscalers import ImageUpscaler
+from core.tiles import Canvas
+from utils.tracing import span
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    input_file: Path
+    output_file: Path
+
+
+@dataclass
+class BatchResult:
+    job: BatchJob
+    error: str | None = None  # None if the job succeeded
+    duration: float = 0.0  # seconds spent upscaling
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+class BatchUpscaler:
+    """
+    Class that upscales a batch of images, reusing the same tile upscaler (and hence loaded model) for all of them.
+
+    While an image is being upscaled, the next images are decoded and finished images are encoded in background
+    threads.  A failure of an individual image is recorded in its BatchResult and does not abort the batch.
+    """
+
+    def __init__(
+        self,
+        image_upscaler_factory: Callable[[BatchJob], ImageUpscaler],
+        scale: float,
+        prompt: str = "",
+        prefetch: int = 2,
+        n_encode_workers: int = 2,
+    ):
+        """
+        :param image_upscaler_factory: returns the ImageUpscaler to use for a given job; typically, all returned
+                                         instances share the same TileUpscaler, such that the model is loaded once.
+        :param scale: scale factor to apply to all images.
+        :param prompt: prompt to guide the upscaling process.
+        :param prefetch: int >= 1, number of images to decode ahead of the image being upscaled.
+        :param n_encode_workers: int >= 1, number of threads encoding & saving finished images.
+        """
+        self._image_upscaler_factory = image_upscaler_factory
+        self._scale = scale
+        self._prompt = prompt
+        self._prefetch = max(prefetch, 1)
+        self._n_encode_workers = max(n_encode_workers, 1)
+
+    def run(self, jobs: list[BatchJob], on_result: Callable[[BatchResult], None] | None = None) -> list[BatchResult]:
+        """
+        Process all jobs and return their results, in the same order.
+        'on_result' is called for each job as soon as its output is written (or it failed).
+        """
+
+        results = [BatchResult(job) for job in jobs]
+        with (
+            ThreadPoolExecutor(max_workers=self._prefetch, thread_name_prefix="batch-decode") as decoder,
+            ThreadPoolExecutor(max_workers=self._n_encode_workers, thread_name_prefix="batch-encode") as encoder,
+        ):
+            # --- start decoding first images -------------
+            decoded: dict[int, Future] = {
+                i: decoder.submit(self._decode, jobs[i].input_file) for i in range(min(self._prefetch, len(jobs)))
+            }
+
+            # --- upscale images one by one ---------------
+            for i, job in enumerate(jobs):
+                # keep decoding ahead of the current image
+                if (i_next := i + self._prefetch) < len(jobs):
+                    decoded[i_next] = decoder.submit(self._decode, jobs[i_next].input_file)
+
+                try:
+                    img = decoded.pop(i).result()
+                    t_start = time.perf_counter()
+                    result = self._image_upscaler_factory(job).upscale_canvas(img, self._scale, prompt=self._prompt)
+                    results[i].duration = time.perf_counter() - t_start
+                except Exception as e:
+                    self._record_failure(results[i], e, on_result)
+                    continue
+
+                future = encoder.submit(self._encode, result, job.output_file)
+                future.add_done_callback(lambda f, result=results[i]: self._on_encoded(f, result, on_result))
+
+        return results
+
+    # -------------------------------------------------------------------------
+    #  Internal methods
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _decode(input_file: Path) -> Image.Image:
+        with span("load_image", file=str(input_file)), Image.open(input_file) as img:
+            return img.convert("RGB")
+
+    @staticmethod
+    def _encode(canvas: Canvas, output_file: Path):
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with span("save_image", file=str(output_file), size=canvas.size):
+            canvas.save(output_file)
+
+    @classmethod
+    def _on_encoded(cls, future: Future, result: BatchResult, on_result: Callable[[BatchResult], None] | None):
+        if (e := future.exception()) is not None:
+            cls._record_failure(result, e, on_result)
+        elif on_result is not None:
+            on_result(result)
+
+    @staticmethod
+    def _record_failure(result: BatchResult, e: BaseException, on_result: Callable[[BatchResult], None] | None):
+        result.error = "".join(traceback.format_exception_only(e)).strip()
+        if on_result is not None:
+            on_result(result)
@@ -0,0 +1,45 @@
+import glob
+from pathlib import Path
+
+from PIL import Image
+
+LIST_FILE_EXTENSIONS = {".txt", ".lst"}
+
+
+def resolve_inputs(specs: list[str]) -> list[Path]:
+    """
+    Resolve a list of input specifications into a list of image files.  Each specification can be...
+      - an image file
+      - a directory, in which case all image files in that directory are included (non-recursive)
+      - a file list (.txt or .lst), containing one input specification per line; empty lines & lines starting
+          with '#' are ignored, relative paths are relative to the current working directory
+      - a glob pattern, e.g. 'photos/**/*.jpg'
+
+    Files are returned in the order of the specifications (sorted by name within directories & glob matches),
+    without duplicates.  A ValueError is raised for specifications that do not match any image file.
+    """
+    paths = []
+    for spec in specs:
+        paths += _resolve_input(spec)
+    return list(dict.fromkeys(paths))  # remove duplicates, preserve order
+
+
+def _resolve_input(spec: str) -> list[Path]:
+    path = Path(spec)
+    if path.is_dir():
+        files = sorted(p for p in path.iterdir() if p.is_file() and _is_image_file(p))
+    elif path.is_file() and (path.suffix.lower() in LIST_FILE_EXTENSIONS):
+        lines = [line.strip() for line in path.read_text().splitlines()]
+        files = resolve_inputs([line for line in lines if line and not line.startswith("#")])
+    elif path.is_file():
+        files = [path]
+    else:
+        files = sorted(p for p in map(Path, glob.glob(spec, recursive=True)) if p.is_file() and _is_image_file(p))
+
+    if not files:
+        raise ValueError(f"Input '{spec}' does not match any image file.")
+    return files
+
+
+def _is_image_file(path: Path) -> bool:
+    return path.suffix.lower() in Image.registered_extensions()
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.batch import BatchJob, BatchUpscaler, resolve_inputs
+from core.conftest import DummyTileUpscaler
+from core.image_upscalers import ImageUpscaler_MultiTile
+
+
+def _save_random_image(path: Path, width: int, height: int):
+    Image.fromarray(np.random.randint(0, 255, size=(height, width, 3), dtype=np.uint8), mode="RGB").save(path)
+
+
+def test_batch_upscaler(tmp_path: Path):
+    # --- arrange -----------------------------------------
+    input_files = [tmp_path / f"img_{i}.png" for i in range(4)]
+    for i, input_file in enumerate(input_files):
+        _save_random_image(input_file, width=20 + 4 * i, height=24)
+    (tmp_path / "img_corrupt.png").write_bytes(b"not an image")
+    input_files.insert(2, tmp_path / "img_corrupt.png")
+
+    jobs = [BatchJob(f, tmp_path / "out" / f"{f.stem}_upscaled.png") for f in input_files]
+    tile_upscaler = DummyTileUpscaler()
+    batch_upscaler = BatchUpscaler(lambda job: ImageUpscaler_MultiTile(tile_upscaler), scale=2.0)
+    reported = []
+
+    # --- act ---------------------------------------------
+    results = batch_upscaler.run(jobs, on_result=reported.append)
+
+    # --- assert ------------------------------------------
+    assert tile_upscaler.n_upscaled > 0  # all jobs share the single tile upscaler (= model) created upfront
+    assert [r.job for r in results] == jobs
+    assert sorted(r.job.input_file for r in reported) == sorted(input_files)
+    assert [r.succeeded for r in results] == [True, True, False, True, True]
+    for result in results:
+        if result.succeeded:
+            with Image.open(result.job.input_file) as img_in, Image.open(result.job.output_file) as img_out:
+                assert img_out.size == (2 * img_in.width, 2 * img_in.height)
+        else:
+            assert not result.job.output_file.exists()
+
+
+def test_resolve_inputs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    # --- arrange -----------------------------------------
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "dir").mkdir()
+    for name in ["dir/b.png", "dir/a.jpg", "c.png", "d.png"]:
+        _save_random_image(tmp_path / name, width=8, height=8)
+    (tmp_path / "dir" / "notes.md").write_text("not an image")
+    (tmp_path / "list.txt").write_text("# comment\n\nd.png\ndir/a.jpg\n")
+
+    # --- act ---------------------------------------------
+    files = resolve_inputs(["dir", "*.png", "list.txt"])
+
+    # --- assert ------------------------------------------
+    assert files == [Path("dir/a.jpg"), Path("dir/b.png"), Path("c.png"), Path("d.png")]
+    with pytest.raises(ValueError):
+        resolve_inputs(["missing_*.png"])
@@ -0,0 +1,53 @@
+import os
+import threading
+import time
+
+from PIL import Image
+
+from core.tile_upscalers.classical import TileUpscaler_Classical
+from core.tiles import TileDimSpec
+
+
+class DummyTileUpscaler(TileUpscaler_Classical):
+    """
+    Bicubic tile upscaler for tests, with small tiles, which keeps track of the tiles & batches it upscaled and the
+    processes it was used in.  Optionally, it sleeps for each tile, blocks until released or fails after a given
+    number of tiles.
+    """
+
+    def __init__(
+        self,
+        scale_factor: int = 4,
+        tile_spec: TileDimSpec = TileDimSpec(8, 32, 4),
+        fail_after: int | None = None,
+        delay: float = 0.0,
+    ):
+        """
+        :param scale_factor: int >= 2, scale factor applied to each tile.
+        :param tile_spec: supported tile widths & heights.
+        :param fail_after: if not None, a RuntimeError is raised for each tile after this many tiles were upscaled.
+        :param delay: time in seconds to sleep for each tile.
+        """
+        super().__init__("bicubic", scale_factor, tile_width_spec=tile_spec, tile_height_spec=tile_spec)
+        self.fail_after = fail_after
+        self.delay = delay
+        self.release = threading.Event()  # clear to block upscaling until set again
+        self.release.set()
+
+        self.n_upscaled = 0
+        self.batch_lengths: list[int] = []
+        self.pids: set[int] = set()
+
+    def _upscale(self, image: Image.Image, prompt: str = "") -> Image.Image:
+        self.release.wait()
+        if (self.fail_after is not None) and (self.n_upscaled >= self.fail_after):
+            raise RuntimeError("inference failed")
+        time.sleep(self.delay)
+        self.n_upscaled += 1
+        self.pids.add(os.getpid())
+        return super()._upscale(image, prompt)
+
+    def _upscale_batch(self, images: list[Image.Image], prompt: str = "") -> list[Image.Image]:
+        assert len({img.size for img in images}) == 1
+        self.batch_lengths.append(len(images))
+        return super()._upscale_batch(images, prompt)
@@ -3,6 +3,7 @@ Various implementations of full-image upscaling algorithms, which use TileUpscal
 to upscale images of any size by potentially calling a TileUpscaler multiple times.
 """
 
-from ._base import ImageUpscaler
+from ._base import ImageUpscaler, UpscaleCancelled
+from ._checkpoint import Checkpoint
 from .multi_tile import ImageUpscaler_MultiTile
 from .single_tile import ImageUpscaler_SingleTile
@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+import threading
 from abc import ABC, abstractmethod
+from pathlib import Path
 
 from PIL import Image
 
 from core.tile_upscalers import TileUpscaler
+from core.tiles import Canvas
+
+from ._checkpoint import Checkpoint
+
+
+class UpscaleCancelled(Exception):
+    """Raised by ImageUpscaler.upscale(...) when upscaling was aborted because its cancel event was set."""
 
 
 class ImageUpscaler(ABC):
@@ -33,6 +42,13 @@ class ImageUpscaler(ABC):
         """
         raise NotImplementedError()
 
+    def upscale_canvas(self, image: Image.Image, scale: float, prompt: str = "") -> Canvas:
+        """
+        Same as upscale(...), but returns the result as a Canvas.  Child classes that can produce out-of-core
+        results should override this, to avoid ever holding the full result in memory.
+        """
+        return Canvas.from_image(self.upscale(image, scale, prompt))
+
     # -------------------------------------------------------------------------
     #  Factory Methods
     # -------------------------------------------------------------------------
@@ -43,7 +59,42 @@ class ImageUpscaler(ABC):
         return ImageUpscaler_SingleTile(tile_upscaler)
 
     @classmethod
-    def multi_tile(cls, tile_upscaler: TileUpscaler, stitch_overlap_fraction: float, debug: bool) -> ImageUpscaler:
+    def multi_tile(
+        cls,
+        tile_upscaler: TileUpscaler,
+        stitch_overlap_fraction: float,
+        debug: bool,
+        coarse_seams: bool = False,
+        merge_mode: str | None = None,
+        min_detail: float = 1.0,
+        tile_strategy: str = "uniform",
+        flat_tile_threshold: float = 0.0,
+        dedup_tiles: bool = True,
+        preview_file: str | Path | None = None,
+        preview_interval: float = 10.0,
+        batch_size: int = 1,
+        pipeline_depth: int = 0,
+        checkpoint: Checkpoint | None = None,
+        cancel_event: threading.Event | None = None,
+        canvas_dir: str | Path | None = None,
+    ) -> ImageUpscaler:
         from .multi_tile import ImageUpscaler_MultiTile
 
-        return ImageUpscaler_MultiTile(tile_upscaler, stitch_overlap_fraction, debug=debug)
+        return ImageUpscaler_MultiTile(
+            tile_upscaler,
+            stitch_overlap_fraction,
+            coarse_seams=coarse_seams,
+            merge_mode=merge_mode,
+            min_detail=min_detail,
+            tile_strategy=tile_strategy,
+            flat_tile_threshold=flat_tile_threshold,
+            dedup_tiles=dedup_tiles,
+            preview_file=preview_file,
+            preview_interval=preview_interval,
+            batch_size=batch_size,
+            pipeline_depth=pipeline_depth,
+            checkpoint=checkpoint,
+            cancel_event=cancel_event,
+            canvas_dir=canvas_dir,
+            debug=debug,
+        )
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any
+
+from PIL import Image
+
+from core.tiles import Canvas
+from utils.background_writer import BackgroundWriter
+
+
+class Checkpoint:
+    """
+    Directory-based checkpoint of a (multi-pass) upscaling job, allowing to resume the job after interruption.
+
+    Layout of the checkpoint directory:
+      - manifest.json                       description of the job, used to check if a resumed job matches
+      - step_<i>.png                        image after completing step i of the job
+      - step_<i>_tiles/tile_<l>_<t>.png     upscaled tiles of step i, for the tile with source position (l, t)
+
+    Tiles are saved as soon as they are upscaled and removed once the image of their step is saved.
+    All files are written by a background thread, via a temporary file & rename, such that an interrupted job never
+    leaves behind partially written files.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+
+    # -------------------------------------------------------------------------
+    #  Constructor
+    # -------------------------------------------------------------------------
+    def __init__(self, directory: str | Path, resume: bool = False):
+        """
+        :param directory: checkpoint directory; created if it doesn't exist.
+        :param resume: if True, continue from an existing checkpoint in the directory (if any);
+                         if False, any existing checkpoint in the directory is discarded.
+        """
+        self.directory = Path(directory)
+        self.resume = resume
+        self._writer = BackgroundWriter(max_pending=16)
+
+    # -------------------------------------------------------------------------
+    #  Main API
+    # -------------------------------------------------------------------------
+    def open(self, job: dict[str, Any]):
+        """
+        Prepares the checkpoint directory for the given job, which should be a json-serializable description of
+        all inputs & settings that determine its result.  When resuming, this raises a ValueError if the directory
+        contains a checkpoint of a different job.
+        """
+        job = json.loads(json.dumps(job))  # normalize, e.g. tuples -> lists
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.directory / self.MANIFEST_FILE
+
+        if self.resume and manifest_path.exists():
+            if json.loads(manifest_path.read_text()) != job:
+                raise ValueError(f"Checkpoint in '{self.directory}' was created for a different job; cannot resume.")
+        else:
+            self._clear()
+            self._write_atomic(manifest_path, lambda path: path.write_text(json.dumps(job, indent=2)))
+
+    def last_step(self) -> tuple[int, Image.Image] | None:
+        """Returns (step, image) of the last completed step, or None if no step was completed yet."""
+        steps = sorted(int(path.stem.split("_")[1]) for path in self.directory.glob("step_*.png"))
+        if not steps:
+            return None
+        return steps[-1], self._load_image(self._step_path(steps[-1]))
+
+    def save_step(self, step: int, image: Image.Image | Canvas):
+        """Saves the image resulting from the given step; tiles of this step are no longer needed afterwards."""
+        self._writer.submit(self._save_step, step, image)
+
+    def load_tile(self, step: int, left: int, top: int) -> Image.Image | None:
+        """Returns the upscaled tile of the given step & source position, or None if it was not saved yet."""
+        path = self._tile_path(step, left, top)
+        return self._load_image(path) if path.exists() else None
+
+    def save_tile(self, step: int, left: int, top: int, image: Image.Image):
+        """Saves the upscaled tile of the given step & source position."""
+        self._writer.submit(self._write_atomic, self._tile_path(step, left, top), image.save)
+
+    def wait(self):
+        """Waits until all pending files are written."""
+        self._writer.wait()
+
+    @staticmethod
+    def image_hash(image: Image.Image) -> str:
+        """Hash of the image content, to be used in job descriptions."""
+        h = hashlib.sha256()
+        h.update(json.dumps([image.mode, image.width, image.height]).encode())
+        h.update(image.tobytes())
+        return h.hexdigest()
+
+    # -------------------------------------------------------------------------
+    #  Internal methods
+    # -------------------------------------------------------------------------
+    def _step_path(self, step: int) -> Path:
+        return self.directory / f"step_{step:03d}.png"
+
+    def _tiles_dir(self, step: int) -> Path:
+        return self.directory / f"step_{step:03d}_tiles"
+
+    def _tile_path(self, step: int, left: int, top: int) -> Path:
+        return self._tiles_dir(step) / f"tile_{left}_{top}.png"
+
+    def _save_step(self, step: int, image: Image.Image | Canvas):
+        self._write_atomic(self._step_path(step), image.save)
+        shutil.rmtree(self._tiles_dir(step), ignore_errors=True)
+
+    def _clear(self):
+        """Removes all files belonging to a previous checkpoint, leaving any other files untouched."""
+        (self.directory / self.MANIFEST_FILE).unlink(missing_ok=True)
+        for path in self.directory.glob("step_*"):
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+
+    @staticmethod
+    def _write_atomic(path: Path, write_fn):
+        """Calls write_fn(tmp_path) and then atomically moves the result to 'path'."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{uuid.uuid4().hex}.tmp{path.suffix}")
+        write_fn(tmp_path)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _load_image(path: Path) -> Image.Image:
+        with Image.open(path) as img:
+            img.load()
+        return img
@@ -0,0 +1,63 @@
+import hashlib
+from collections import Counter
+from typing import Iterable
+
+import numpy as np
+from PIL import Image
+
+from core.tiles import Tile
+
+
+class TileDeduplicator:
+    """
+    Keeps track of tiles with identical pixels within a single pass, such that each unique tile only needs to be
+    upscaled once and its result can be reused at every position it occurs.
+
+    Tiles are identified by their source position (left, top).  All tiles of the pass are hashed upfront, such that
+    upscaled results are only retained as long as identical tiles are still to be processed.
+    """
+
+    def __init__(self, tiles: Iterable[Tile]):
+        """
+        :param tiles: all tiles of the pass, e.g. TileSplitter.iter_tiles(...); pixels are only hashed, not retained.
+        """
+        self._keys: dict[tuple[int, int], str] = {(tile.left, tile.top): self.key(tile) for tile in tiles}
+        self._remaining = Counter(self._keys.values())  # nr of occurrences not yet processed, per key
+        self._results: dict[str, Image.Image] = dict()  # upscaled images of keys with remaining occurrences
+
+        self.n_tiles = len(self._keys)
+        self.n_unique = len(self._remaining)
+
+    # -------------------------------------------------------------------------
+    #  Main API
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def key(tile: Tile) -> str:
+        """Hash of the pixels (incl. shape) of the given tile."""
+        pixels = np.ascontiguousarray(tile.pixels)
+        h = hashlib.blake2b(digest_size=16)
+        h.update(str(pixels.shape).encode())
+        h.update(pixels.data)
+        return h.hexdigest()
+
+    def tile_key(self, tile: Tile) -> str:
+        """Key of the given tile of the pass, as computed upfront."""
+        return self._keys[(tile.left, tile.top)]
+
+    def get(self, tile: Tile) -> Image.Image | None:
+        """Returns the upscaled image of an identical tile that was already processed, if any."""
+        return self._results.get(self.tile_key(tile))
+
+    def processed(self, tile: Tile, upscaled_img: Image.Image):
+        """Registers the upscaled image of the given tile, retaining it only if identical tiles are still to come."""
+        key = self.tile_key(tile)
+        self._remaining[key] -= 1
+        if self._remaining[key] > 0:
+            self._results[key] = upscaled_img
+        else:
+            self._results.pop(key, None)
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Fraction of tiles that are duplicates of another tile, i.e. that don't need to be upscaled."""
+        return 1.0 - (self.n_unique / self.n_tiles) if self.n_tiles > 0 else 0.0
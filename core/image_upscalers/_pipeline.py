@@ -0,0 +1,152 @@
+"""
+Pipelined execution of a single split -> upscale -> merge pass, where tile preparation and merging run in
+worker threads connected to the (main-thread) inference stage by bounded queues.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import batched
+from queue import Empty, Full, Queue
+from typing import Any, Callable, Iterator
+
+from PIL import Image
+
+from core.tiles import Canvas, Tile, TileMerger, TileRange, TileSplitter
+from core.tiles.merging import TileMergeSolution
+
+_END = object()  # sentinel marking the end of a queue
+_POLL_INTERVAL = 0.1  # seconds between checks of the stop event while waiting on a queue
+
+
+class PipelineAborted(Exception):
+    """Raised inside a pipeline stage when another stage failed and the pipeline is shutting down."""
+
+
+class TilePipeline:
+    """
+    Runs a single upscaling pass as 3 overlapping stages:
+      - prepare: crops tiles from the source image (worker thread)
+      - upscale: runs batched inference using the provided upscale function (calling thread)
+      - merge:   merges upscaled tiles as they arrive using TileMerger.merge_iter(...) (worker thread)
+
+    Stages are connected by queues holding at most 'depth' batches, which bounds memory usage and determines
+    how far the prepare stage can run ahead of inference.  Results are identical to sequential execution.
+    """
+
+    def __init__(
+        self,
+        upscale_fn: Callable[[list[Tile]], list[Tile]],
+        scale_factor: int,
+        batch_size: int = 1,
+        depth: int = 2,
+    ):
+        """
+        :param upscale_fn: function upscaling a batch of tiles, e.g. TileUpscaler.upscale_batch with a fixed prompt.
+        :param scale_factor: scale factor applied by upscale_fn.
+        :param batch_size: int >= 1, number of tiles passed to upscale_fn at once.
+        :param depth: int >= 1, max. number of batches queued between subsequent stages.
+        """
+        if depth < 1:
+            raise ValueError(f"depth should be >= 1, got {depth}.")
+        self._upscale_fn = upscale_fn
+        self._scale_factor = scale_factor
+        self._batch_size = batch_size
+        self._depth = depth
+
+    def run(
+        self,
+        image: Image.Image | Canvas,
+        tile_ranges: list[TileRange],
+        tile_merger: TileMerger,
+        on_progress: Callable[[int], Any] | None = None,
+    ) -> TileMergeSolution:
+        """
+        Upscale all tile ranges of the given image and merge the results.
+
+        :param image: source image to crop tiles from.
+        :param tile_ranges: tile ranges in source image coordinates, e.g. as returned by TileSplitter.split_ranges.
+        :param tile_merger: merger used to merge the upscaled tiles.
+        :param on_progress: optional callback, called with the number of tiles after each upscaled batch.
+        :return: TileMergeSolution in upscaled image coordinates.
+        """
+
+        # --- init ----------------------------------------
+        upscaled_ranges = [tr.scaled(self._scale_factor) for tr in tile_ranges]
+        stop = threading.Event()
+        tiles_queue = Queue(maxsize=self._depth)
+        upscaled_queue = Queue(maxsize=self._depth)
+
+        # --- run stages ----------------------------------
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="tile-pipeline") as executor:
+            prepare_future = executor.submit(self._prepare, image, tile_ranges, tiles_queue, stop)
+            merge_future = executor.submit(self._merge, tile_merger, upscaled_ranges, upscaled_queue, stop)
+
+            try:
+                for batch in self._iter_queue(tiles_queue, stop):
+                    upscaled_batch = self._upscale_fn(batch)
+                    self._put(upscaled_queue, upscaled_batch, stop)
+                    if on_progress is not None:
+                        on_progress(len(batch))
+                self._put(upscaled_queue, _END, stop)
+                return merge_future.result()
+            except BaseException as e:
+                # make sure all stages stop and report the root cause rather than the resulting PipelineAborted
+                stop.set()
+                for future in (prepare_future, merge_future):
+                    if (exc := future.exception()) is not None and not isinstance(exc, PipelineAborted):
+                        raise exc from None
+                raise e
+
+    # -------------------------------------------------------------------------
+    #  Stages & queue helpers
+    # -------------------------------------------------------------------------
+    def _prepare(
+        self, image: Image.Image | Canvas, tile_ranges: list[TileRange], tiles_queue: Queue, stop: threading.Event
+    ):
+        try:
+            for batch in batched(TileSplitter.iter_tiles(image, tile_ranges), self._batch_size):
+                self._put(tiles_queue, list(batch), stop)
+            self._put(tiles_queue, _END, stop)
+        except BaseException:
+            stop.set()
+            raise
+
+    def _merge(
+        self,
+        tile_merger: TileMerger,
+        upscaled_ranges: list[TileRange],
+        upscaled_queue: Queue,
+        stop: threading.Event,
+    ) -> TileMergeSolution:
+        try:
+            return tile_merger.merge_iter(self._iter_queue(upscaled_queue, stop, flatten=True), upscaled_ranges)
+        except BaseException:
+            stop.set()
+            raise
+
+    @staticmethod
+    def _put(queue: Queue, item: Any, stop: threading.Event):
+        while True:
+            if stop.is_set():
+                raise PipelineAborted()
+            try:
+                queue.put(item, timeout=_POLL_INTERVAL)
+                return
+            except Full:
+                pass
+
+    @staticmethod
+    def _iter_queue(queue: Queue, stop: threading.Event, flatten: bool = False) -> Iterator:
+        while True:
+            if stop.is_set():
+                raise PipelineAborted()
+            try:
+                item = queue.get(timeout=_POLL_INTERVAL)
+            except Empty:
+                continue
+            if item is _END:
+                return
+            elif flatten:
+                yield from item
+            else:
+                yield item
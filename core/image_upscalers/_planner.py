@@ -0,0 +1,152 @@
+"""
+Planning of the sequence of model passes & classical resizes needed to upscale an image by a given factor.
+"""
+
+from __future__ import annotations
+
+import itertools
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator, Literal
+
+from core.tiles import TileSplitter
+
+
+# =================================================================================================
+#  Plans
+# =================================================================================================
+@dataclass(frozen=True)
+class PlanStep:
+    """Single step of an UpscalePlan: either a pass of the tile upscaler ('upscale') or a classical 'resize'."""
+
+    kind: Literal["upscale", "resize"]
+    input_size: tuple[int, int]
+    output_size: tuple[int, int]
+    n_tiles: int = 0
+    inferred_pixels: int = 0  # total nr of pixels of all tiles passed to the model, at input resolution
+
+
+@dataclass(frozen=True)
+class UpscalePlan:
+    """Sequence of steps that upscales an image to its target size, with estimated cost."""
+
+    steps: tuple[PlanStep, ...]
+
+    @property
+    def n_passes(self) -> int:
+        return sum(step.kind == "upscale" for step in self.steps)
+
+    @property
+    def n_tiles(self) -> int:
+        return sum(step.n_tiles for step in self.steps)
+
+    @property
+    def inferred_pixels(self) -> int:
+        return sum(step.inferred_pixels for step in self.steps)
+
+    def describe(self) -> str:
+        """Human-readable, multi-line description of the plan & its estimated cost."""
+        lines = [
+            f"  {'step':>4}  {'operation':<9}  {'input':>13}    {'output':>13}  {'tiles':>6}  {'inferred MP':>11}"
+            + f"  {'overlap waste':>13}"
+        ]
+        for i, step in enumerate(self.steps):
+            line = f"  {i:>4}  {step.kind:<9}  {_size_str(step.input_size)} -> {_size_str(step.output_size)}"
+            if step.kind == "upscale":
+                waste = step.inferred_pixels / (step.input_size[0] * step.input_size[1]) - 1.0
+                line += f"  {step.n_tiles:>6}  {step.inferred_pixels / 1e6:>11.2f}  {waste:>13.1%}"
+            lines.append(line)
+        lines.append(
+            f"  total: {self.n_passes} model pass(es), {self.n_tiles} tile(s), "
+            + f"{self.inferred_pixels / 1e6:.2f} MP inferred"
+        )
+        return "\n".join(lines)
+
+
+def _size_str(size: tuple[int, int]) -> str:
+    return f"[{size[0]:>5}x{size[1]:>5}]"
+
+
+# =================================================================================================
+#  Planner
+# =================================================================================================
+class UpscalePlanner:
+    """
+    Plans how to upscale an image by a given factor using a tile upscaler with a fixed scale factor, by enumerating
+    candidate schedules & picking the one with the lowest estimated cost (= number of pixels inferred by the model,
+    based on the actual tile geometry) that meets the quality constraint.
+
+    Candidate schedules use the minimal number of model passes, each of which is either applied to the image as-is
+    ('full pass') or to the image shrunk to the minimal size still reaching the target in the remaining passes
+    ('partial pass', which is a pre-shrink for the first pass), followed by a final resize to the exact target size.
+
+    The quality constraint is that no model pass is applied to an image smaller than 'min_detail' times the source
+    image (per dimension); with min_detail = 1.0, no source detail is ever discarded before upscaling.
+    """
+
+    def __init__(self, tile_splitter: TileSplitter, scale_factor: int, min_detail: float = 1.0):
+        """
+        :param tile_splitter: tile splitter used for each pass, determining the tile geometry.
+        :param scale_factor: int > 1, scale factor of a single pass of the tile upscaler.
+        :param min_detail: float in (0.0, 1.0], see class docstring.
+        """
+        if scale_factor <= 1:
+            raise ValueError(f"scale_factor should be > 1, got {scale_factor}.")
+        if not (0.0 < min_detail <= 1.0):
+            raise ValueError(f"min_detail should be in (0.0, 1.0], got {min_detail}.")
+        self.tile_splitter = tile_splitter
+        self.scale_factor = scale_factor
+        self.min_detail = min_detail
+        self._pass_cost = lru_cache(maxsize=None)(self._pass_cost_uncached)
+
+    def plan(self, width: int, height: int, scale: float) -> UpscalePlan:
+        """Returns the cheapest plan to upscale an image of the given size to (int(width*scale), int(height*scale))."""
+        target = (int(width * scale), int(height * scale))
+        return min(
+            self._candidates((width, height), target),
+            key=lambda plan: (plan.inferred_pixels, len(plan.steps)),  # cheapest first, then simplest
+        )
+
+    # -------------------------------------------------------------------------
+    #  Internal methods
+    # -------------------------------------------------------------------------
+    def _candidates(self, size: tuple[int, int], target: tuple[int, int]) -> Iterator[UpscalePlan]:
+        # --- no model passes needed ----------------------
+        if (target[0] <= size[0]) and (target[1] <= size[1]):
+            yield UpscalePlan(steps=() if size == target else (PlanStep("resize", size, target),))
+            return
+
+        # --- enumerate full / partial passes -------------
+        a = self.scale_factor
+        n_passes = 1
+        while any(a**n_passes * s < t for s, t in zip(size, target)):
+            n_passes += 1
+        min_size = tuple(math.ceil(self.min_detail * s) for s in size)
+        for partial in itertools.product([False, True], repeat=n_passes):
+            steps, current = [], size
+            for k, is_partial in enumerate(partial):
+                if is_partial:
+                    # shrink to the smallest size that still reaches the target in the remaining passes
+                    remaining = a ** (n_passes - k)
+                    shrunk = tuple(
+                        min(max(math.ceil(t / remaining), m), c) for t, m, c in zip(target, min_size, current)
+                    )
+                    if shrunk == current:
+                        break  # same as a full pass, which is enumerated separately
+                    steps.append(PlanStep("resize", current, shrunk))
+                    current = shrunk
+                n_tiles, inferred_pixels = self._pass_cost(*current)
+                output = (a * current[0], a * current[1])
+                steps.append(PlanStep("upscale", current, output, n_tiles, inferred_pixels))
+                current = output
+            else:
+                if (current[0] >= target[0]) and (current[1] >= target[1]):
+                    if current != target:
+                        steps.append(PlanStep("resize", current, target))
+                    yield UpscalePlan(steps=tuple(steps))
+
+    def _pass_cost_uncached(self, width: int, height: int) -> tuple[int, int]:
+        """(number of tiles, inferred pixels) of a single model pass on an image of the given size."""
+        tile_ranges = self.tile_splitter.split_ranges(width, height)
+        return len(tile_ranges), sum(tr.width * tr.height for tr in tile_ranges)
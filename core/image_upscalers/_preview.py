@@ -0,0 +1,85 @@
+import struct
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from core.tiles import Canvas, Tile
+from core.tiles.canvas import STRIP_PIXELS
+
+
+class ProgressivePreview:
+    """
+    Preview of the result of an upscaling job, at the target size, which is updated in place as tiles are upscaled.
+
+    The preview is an uncompressed 24-bit BMP file (top-down row order), of which the pixel data is memory-mapped,
+    such that updating a region only touches the pages of that region, without re-encoding the image.  Changes are
+    flushed to the file at most every 'interval' seconds, as well as on full refreshes & when closing the preview.
+    Since BMP files are limited to 4 GiB, this supports images up to roughly 1.4 gigapixels.
+    """
+
+    HEADER_SIZE = 14 + 40  # BITMAPFILEHEADER + BITMAPINFOHEADER
+
+    def __init__(self, path: str | Path, size: tuple[int, int], interval: float = 10.0):
+        """
+        :param path: path of the preview file; overwritten if it exists.
+        :param size: (width, height) of the preview, i.e. the target size of the upscaling job.
+        :param interval: float >= 0.0, min. number of seconds between flushes of tile updates to the file.
+        """
+        width, height = size
+        row_size = (3 * width + 3) & ~3  # rows are padded to a multiple of 4 bytes
+        file_size = self.HEADER_SIZE + row_size * height
+        if file_size >= 2**32:
+            raise ValueError(f"Preview of size {width}x{height} exceeds the max. size of a BMP file (4 GiB).")
+
+        self.path = Path(path)
+        self.size = size
+        self.interval = interval
+
+        with open(self.path, "wb") as f:
+            f.write(b"BM" + struct.pack("<IHHI", file_size, 0, 0, self.HEADER_SIZE))
+            f.write(struct.pack("<IiiHHIIiiII", 40, width, -height, 1, 24, 0, row_size * height, 2835, 2835, 0, 0))
+            f.truncate(file_size)
+        rows = np.memmap(self.path, dtype=np.uint8, mode="r+", offset=self.HEADER_SIZE, shape=(height, row_size))
+        self._rows = rows
+        self._pixels = rows[:, : 3 * width].reshape(height, width, 3)  # BGR
+        self._last_flush = time.monotonic()
+
+    # -------------------------------------------------------------------------
+    #  Updates
+    # -------------------------------------------------------------------------
+    def refresh(self, image: Canvas):
+        """Overwrites the full preview with the given image, resized to the preview size if needed, and flushes."""
+        if image.size != self.size:
+            image = image.resize(self.size, resample=Image.BILINEAR)
+        width, height = self.size
+        n_rows = max(STRIP_PIXELS // width, 1)
+        for top in range(0, height, n_rows):
+            self._pixels[top : top + n_rows] = image.pixels[top : top + n_rows, :, ::-1]
+        self.flush()
+
+    def update_tiles(self, tiles: list[Tile], image_size: tuple[int, int]):
+        """
+        Overwrites the regions of the given tiles, with positions relative to an image of size 'image_size',
+        which are scaled to the preview size if needed.  Changes are flushed if the interval has passed.
+        """
+        sx, sy = self.size[0] / image_size[0], self.size[1] / image_size[1]
+        for tile in tiles:
+            left, top = round(tile.left * sx), round(tile.top * sy)
+            right, bottom = round((tile.right + 1) * sx), round((tile.bottom + 1) * sy)
+            if (right > left) and (bottom > top):
+                img = tile.img
+                if img.size != (right - left, bottom - top):
+                    img = img.resize((right - left, bottom - top), resample=Image.BILINEAR)
+                self._pixels[top:bottom, left:right] = np.asarray(img.convert("RGB"))[:, :, ::-1]
+        if time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        self._rows.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self._rows = self._pixels = None
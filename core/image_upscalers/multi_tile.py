@@ -1,15 +1,26 @@
-import math
 import os
+import threading
 from datetime import datetime
+from functools import partial
+from itertools import batched
 from pathlib import Path
+from typing import Any, Iterator
 
 from PIL import Image
 from tqdm import tqdm
 
 from core.tile_upscalers import TileUpscaler
-from core.tiles import TileMerger, TileSplitter
+from core.tiles import Canvas, Tile, TileMerger, TileSplitter
+from core.tiles.merging import TileMergeSolution
+from utils.background_writer import BackgroundWriter
+from utils.tracing import span
 
-from ._base import ImageUpscaler
+from ._base import ImageUpscaler, UpscaleCancelled
+from ._checkpoint import Checkpoint
+from ._dedup import TileDeduplicator
+from ._pipeline import TilePipeline
+from ._planner import UpscalePlan, UpscalePlanner
+from ._preview import ProgressivePreview
 
 
 # =================================================================================================
@@ -18,17 +29,95 @@ from ._base import ImageUpscaler
 class ImageUpscaler_MultiTile(ImageUpscaler):
     """
     Class that upscales images of any sizes by splitting it up in tiles and calling the TileUpscaler on each tile.
-    This process is repeated until the image is large enough, i.e. the target size is reached.
+    This process is repeated until the image is large enough, i.e. the target size is reached, following the
+    cheapest sequence of passes & resizes found by the UpscalePlanner.
     """
 
-    def __init__(self, tile_upscaler: TileUpscaler, stitch_overlap_fraction: float = 0.0, debug: bool = False):
+    def __init__(
+        self,
+        tile_upscaler: TileUpscaler,
+        stitch_overlap_fraction: float = 0.0,
+        coarse_seams: bool = False,
+        merge_mode: str | None = None,
+        min_detail: float = 1.0,
+        tile_strategy: str = "uniform",
+        flat_tile_threshold: float = 0.0,
+        dedup_tiles: bool = True,
+        preview_file: str | Path | None = None,
+        preview_interval: float = 10.0,
+        batch_size: int = 1,
+        pipeline_depth: int = 0,
+        checkpoint: Checkpoint | None = None,
+        cancel_event: threading.Event | None = None,
+        canvas_dir: str | Path | None = None,
+        debug: bool = False,
+    ):
         """
         :param tile_upscaler:
         :param stitch_overlap_fraction: float >= 0.0, fraction of overlap between tiles to stitch.
                                 If set to 0.0, no overlap is enforced and no stitching is performed,
                                   even if the tile size multiplier forces tiles to slightly overlap.
+        :param coarse_seams: if True, seams are optimized at the resolution of the tiles before upscaling & only
+                               refined at full resolution near the seam; much cheaper for large overlap fractions.
+        :param merge_mode: one of TileMerger.SUPPORTED_MODES, method used to merge upscaled tiles;
+                             if None, tiles are pasted without overlap and stitched otherwise.
+        :param min_detail: float in (0.0, 1.0], min. size of images passed to the tile upscaler, as a fraction of the
+                             input image; values < 1.0 allow shrinking the input first, trading detail for speed.
+                             See UpscalePlanner.
+        :param tile_strategy: one of TileSplitter.SUPPORTED_STRATEGIES; 'non_uniform' allows a smaller last tile along
+                                each axis, reducing the number of pixels spent on overlap.
+        :param flat_tile_threshold: float >= 0.0, tiles with a mean gradient (see Tile.mean_gradient()) below this
+                                      value are upscaled using a classical resampler instead of the tile upscaler,
+                                      e.g. flat areas of scanned documents or screenshots.  0.0 = disabled.
+        :param dedup_tiles: if True, tiles with identical pixels within a pass are only upscaled once, reusing the
+                              result at every position they occur.  See TileDeduplicator.
+        :param preview_file: if provided, a BMP preview of the result at the target size is written to this file at
+                               the start of upscale_canvas(...), and updated in place as tiles are upscaled.
+                               See ProgressivePreview.
+        :param preview_interval: float >= 0.0, min. number of seconds between flushes of preview updates to the file.
+        :param batch_size: int >= 1, max. number of tiles passed to the tile upscaler in a single call.
+        :param pipeline_depth: int >= 0, if > 0, tile preparation and merging run in background threads, overlapping
+                                 with inference, with at most this many batches queued between stages.
+                                 If set to 0, all stages run sequentially.  Results are identical in both cases.
+        :param checkpoint: if provided, upscaled tiles & intermediate images are saved in this checkpoint as they
+                             are completed, such that an interrupted job can be resumed.
+        :param cancel_event: if provided and set, upscaling is aborted before the next batch of tiles,
+                               by raising UpscaleCancelled.
+        :param canvas_dir: if provided, intermediate & final images are memory-mapped to temporary files in this
+                             directory instead of held in memory, such that memory usage is bounded by the
+                             number of tiles in flight rather than by the image size.  See upscale_canvas(...).
         """
+        if batch_size < 1:
+            raise ValueError(f"batch_size should be >= 1, got {batch_size}.")
+        if pipeline_depth < 0:
+            raise ValueError(f"pipeline_depth should be >= 0, got {pipeline_depth}.")
+        if flat_tile_threshold < 0.0:
+            raise ValueError(f"flat_tile_threshold should be >= 0.0, got {flat_tile_threshold}.")
+        if preview_interval < 0.0:
+            raise ValueError(f"preview_interval should be >= 0.0, got {preview_interval}.")
+        if (merge_mode is not None) and (merge_mode not in TileMerger.SUPPORTED_MODES):
+            raise ValueError(f"Unsupported merge mode: {merge_mode}. Supported modes are: {TileMerger.SUPPORTED_MODES}")
         self._stitch_overlap_fraction = stitch_overlap_fraction
+        self._coarse_seams = coarse_seams
+        self._merge_mode = merge_mode
+        self._tile_strategy = tile_strategy
+        self._flat_tile_threshold = flat_tile_threshold
+        self._n_flat_tiles = 0  # nr of flat tiles of the current step, see _upscale_tiles(...)
+        self._dedup_tiles = dedup_tiles
+        self._dedup: TileDeduplicator | None = None  # deduplicator of the current step, see _upscale_image(...)
+        self._dedup_totals = [0, 0]  # total nr of tiles & unique tiles over all steps of the current image
+        self._preview_file = preview_file
+        self._preview_interval = preview_interval
+        self._preview: ProgressivePreview | None = None  # preview of the current image, see upscale_canvas(...)
+        self._planner = UpscalePlanner(
+            self._tile_splitter(tile_upscaler, tile_strategy), int(tile_upscaler.scale_factor), min_detail
+        )
+        self._batch_size = batch_size
+        self._pipeline_depth = pipeline_depth
+        self._checkpoint = checkpoint
+        self._cancel_event = cancel_event
+        self._canvas_dir = canvas_dir
+        self._debug_writer = BackgroundWriter()
         super().__init__(tile_upscaler, debug)
 
     def upscale(self, image: Image.Image, scale: float, prompt: str = "") -> Image.Image:
@@ -41,91 +130,287 @@ class ImageUpscaler_MultiTile(ImageUpscaler):
         :param prompt: Optional prompt to guide the upscaling process.
         :return: The upscaled image as bytes.
         """
+        return self.upscale_canvas(image, scale, prompt).to_image()
+
+    def plan(self, width: int, height: int, scale: float) -> UpscalePlan:
+        """
+        Returns the plan, i.e. sequence of model passes & resizes, that upscale(...) follows for an image of the given
+        size, including its estimated cost, without actually upscaling anything.
+        """
+        return self._planner.plan(width, height, scale)
+
+    def upscale_canvas(self, image: Image.Image, scale: float, prompt: str = "") -> Canvas:
+        """
+        Same as upscale(...), but returns the result as a Canvas, which is out-of-core if a canvas_dir was
+        provided, such that it can be saved without ever loading the full result in memory.
+        """
 
         # --- init ----------------------------------------
-        w_target = int(image.width * scale)  # target width
-        h_target = int(image.height * scale)  # target height
+        plan = self.plan(image.width, image.height, scale)
+
+        # --- resume from checkpoint ----------------------
+        i_start = 0
+        if self._checkpoint is not None:
+            self._checkpoint.open(self._job_description(image, scale, prompt))
+            if (last_step := self._checkpoint.last_step()) is not None:
+                i_start, image = last_step[0] + 1, last_step[1]
+                print(f"Resuming from checkpoint after step {i_start - 1} [{image.width:>5}x{image.height:>5}]")
+        image = Canvas.from_image(image, self._canvas_dir)
+
+        # --- start preview -------------------------------
+        if self._preview_file is not None:
+            target_size = plan.steps[-1].output_size if plan.steps else image.size
+            self._preview = ProgressivePreview(self._preview_file, target_size, self._preview_interval)
+            self._preview.refresh(image)
 
         # --- main loop -----------------------------------
-        i = 0
-        atomic_factor = self._tile_upscaler.scale_factor
-        while (image.width != w_target) or (image.height != h_target):
-            remaining_factor = max(w_target / image.width, h_target / image.height)
-            if remaining_factor <= 1.0:
-                # we don't have the exact target size yet, but the image is already large enough
-                # so we down-sample and then we should be done
-                print(f"Downsampling image [{image.width:>5}x{image.height:>5}] -> [{w_target:>5}x{h_target:>5}]")
-                image = image.resize(size=(w_target, h_target), resample=Image.LANCZOS)
-            elif i == 0:
-                # as a first operation, if we still need to upscale, we do a full upscale even if the result would be
-                # far too large, because we don't want to lose information in the first iteration.
-                image = self._upscale_image(image, prompt)
-            elif remaining_factor > 0.9 * atomic_factor:
-                # also in the case where the remaining factor is close to 1 full remaining upscale,
-                # we will do this without downsampling first.
-                image = self._upscale_image(image, prompt)
-            else:
-                # this is not the first operation and the result of a full upscale will be significantly too large,
-                # so we downsample first, so we avoid excessive computations / # of tiles.
-                w_target_tmp = math.ceil(w_target / atomic_factor)
-                h_target_tmp = math.ceil(h_target / atomic_factor)
-                print(
-                    f"Downsampling image [{image.width:>5}x{image.height:>5}] -> [{w_target_tmp:>5}x{h_target_tmp:>5}]"
-                )
-                image = image.resize(size=(w_target_tmp, h_target_tmp), resample=Image.LANCZOS)
-            i += 1
+        self._dedup_totals = [0, 0]
+        try:
+            for i, step in enumerate(plan.steps[i_start:], start=i_start):
+                if step.kind == "resize":
+                    w_target, h_target = step.output_size
+                    print(f"Downsampling image [{image.width:>5}x{image.height:>5}] -> [{w_target:>5}x{h_target:>5}]")
+                    with span("resize", step=i, input_size=image.size, output_size=step.output_size):
+                        image = image.resize(size=step.output_size, resample=Image.LANCZOS)
+                else:
+                    with span("upscale_pass", step=i, input_size=image.size, n_tiles=step.n_tiles):
+                        image = self._upscale_image(image, prompt, step=i)
+                if (self._preview is not None) and ((step.kind == "upscale") or (i == len(plan.steps) - 1)):
+                    self._preview.refresh(image)  # replace tiles by merged result
+        finally:
+            if self._preview is not None:
+                self._preview.close()
+                self._preview = None
 
         # --- and we're done ------------------------------
+        n_tiles, n_unique = self._dedup_totals
+        if n_tiles > n_unique:
+            print(f"Tile dedup: upscaled {n_unique}/{n_tiles} unique tile(s), dedup ratio {1 - n_unique / n_tiles:.1%}")
+        self._debug_writer.wait()  # make sure all debug output is written
+        if self._checkpoint is not None:
+            self._checkpoint.wait()
         return image
 
     # -------------------------------------------------------------------------
     #  Internal methods
     # -------------------------------------------------------------------------
-    def _upscale_image(self, image: Image.Image, prompt: str = "") -> Image.Image:
+    def _upscale_image(self, image: Canvas, prompt: str = "", step: int = 0) -> Canvas:
         """
         Upscale the given image 1 time using the tile upscaler, possibly splitting in multiple tiles & stitching.
+        'step' is the index of this operation in the overall upscaling process, used for checkpointing.
         """
 
         # --- prep ----------------------------------------
         atomic_scale = int(self._tile_upscaler.scale_factor)
+        chunk_size = self._batch_size * self._tile_upscaler.n_parallel_batches  # tiles per upscale_fn call
 
         # --- split in tiles --------------------------
-        tile_splitter = TileSplitter(
-            tile_width_spec=self._tile_upscaler.tile_width_spec,
-            tile_height_spec=self._tile_upscaler.tile_height_spec,
-            overlap_fraction=self._stitch_overlap_fraction,
-        )
-        tiles = tile_splitter.split_image(image)
-
-        # --- upscale each tile ----------------------
-        upscaled_tiles = [
-            self._tile_upscaler.upscale(tile, prompt)
-            for tile in tqdm(
-                tiles,
-                desc=f"Upscaling image    [{image.width:>5}x{image.height:>5}] -> "
-                + f"[{image.width * atomic_scale:>5}x{image.height * atomic_scale:>5}] "
-                + f"using {len(tiles):>3} tile(s)",
-                unit="tile",
+        with span("split_tiles", step=step, image_size=image.size):
+            tile_ranges = self._planner.tile_splitter.split_ranges(image.width, image.height)
+        if self._tile_strategy != "uniform":
+            # report pixels spent on overlap, compared to uniform tiles
+            stats = self._planner.tile_splitter.split_stats(image.width, image.height)
+            stats_uniform = self._tile_splitter(self._tile_upscaler, "uniform").split_stats(image.width, image.height)
+            print(
+                f"Tile overlap waste [{image.width:>5}x{image.height:>5}]: {stats.overlap_waste:.1%} "
+                + f"(uniform tiles: {stats_uniform.overlap_waste:.1%})"
             )
-        ]
 
-        # --- merge tiles ---------------------------
-        if len(tiles) == 1:
-            # no merging required
-            image = upscaled_tiles[0].img
+        # --- find identical tiles ---------------------
+        if self._dedup_tiles and (len(tile_ranges) > 1):
+            with span("dedup_hash", step=step, n_tiles=len(tile_ranges)):
+                self._dedup = TileDeduplicator(TileSplitter.iter_tiles(image, tile_ranges))
+            self._dedup_totals[0] += self._dedup.n_tiles
+            self._dedup_totals[1] += self._dedup.n_unique
         else:
-            if self._stitch_overlap_fraction == 0:
-                tile_merger = TileMerger.paste()  # just paste, we don't have overlap for seam optimization
+            self._dedup = None
+
+        # --- upscale & merge tiles -------------------
+        self._n_flat_tiles = 0
+        with tqdm(
+            total=len(tile_ranges),
+            desc=f"Upscaling image    [{image.width:>5}x{image.height:>5}] -> "
+            + f"[{image.width * atomic_scale:>5}x{image.height * atomic_scale:>5}] "
+            + f"using {len(tile_ranges):>3} tile(s)",
+            unit="tile",
+        ) as progress_bar:
+            upscale_fn = partial(
+                self._upscale_tiles,
+                prompt=prompt,
+                step=step,
+                output_size=(image.width * atomic_scale, image.height * atomic_scale),
+                tile_indices={(tr.left, tr.top): i for i, tr in enumerate(tile_ranges)},
+            )
+            if len(tile_ranges) == 1:
+                # no merging required
+                upscaled_img = upscale_fn(list(TileSplitter.iter_tiles(image, tile_ranges)))[0].img
+                image = Canvas.from_image(upscaled_img, self._canvas_dir)
+                progress_bar.update(1)
+                solution = None
+            elif self._pipeline_depth == 0:
+                # sequential execution: crop & upscale tiles in batches, merging them as they become available
+                def iter_upscaled_tiles() -> Iterator[Tile]:
+                    for batch in batched(TileSplitter.iter_tiles(image, tile_ranges), chunk_size):
+                        yield from upscale_fn(list(batch))
+                        progress_bar.update(len(batch))
+
+                upscaled_ranges = [tr.scaled(atomic_scale) for tr in tile_ranges]
+                solution = self._tile_merger().merge_iter(iter_upscaled_tiles(), upscaled_ranges)
             else:
-                tile_merger = TileMerger.stitch()  # we have some overlap, so we can optimize seams
+                # pipelined execution: tile preparation & merging overlap with inference
+                solution = TilePipeline(
+                    upscale_fn, self._tile_upscaler.scale_factor, chunk_size, self._pipeline_depth
+                ).run(
+                    image,
+                    tile_ranges,
+                    self._tile_merger(),
+                    on_progress=progress_bar.update,
+                )
+
+        if self._flat_tile_threshold > 0.0:
+            print(f"Flat tiles upscaled without model: {self._n_flat_tiles}/{len(tile_ranges)}")
 
-            solution = tile_merger.merge(upscaled_tiles)
-            image = solution.img
+        if (self._dedup is not None) and (self._dedup.n_unique < self._dedup.n_tiles):
+            print(f"Duplicate tiles reused: {self._dedup.n_tiles - self._dedup.n_unique}/{self._dedup.n_tiles}")
+        self._dedup = None
 
+        if solution is not None:
+            image = solution.canvas
             if self.debug:
-                slug = f"{datetime.now().strftime("%H%M%S")}_{image.width}x{image.height}_{len(tiles)}tiles"
-                solution.pixel_sources_img().save(Path(os.getcwd()) / f"debug_{slug}_pixel_sources.png")
-                solution.img_overlayed().save(Path(os.getcwd()) / f"debug_{slug}_stitches.png")
+                slug = f"{datetime.now().strftime("%H%M%S")}_{image.width}x{image.height}_{len(tile_ranges)}tiles"
+                self._debug_writer.submit(self._save_debug_images, solution, slug)
+
+        if self._checkpoint is not None:
+            self._checkpoint.save_step(step, image)
 
         # --- and we're done ------------------------------
         return image
+
+    def _upscale_tiles(
+        self,
+        tiles: list[Tile],
+        prompt: str,
+        step: int,
+        output_size: tuple[int, int],
+        tile_indices: dict[tuple[int, int], int],
+    ) -> list[Tile]:
+        """
+        Upscale a batch of tiles of the given step, reusing tiles from the checkpoint & results of identical tiles
+        where available.  'output_size' is the size of the upscaled image of this step, used to update the preview;
+        'tile_indices' maps source positions (left, top) of all tiles of this step to their index, used for tracing.
+        """
+
+        # --- check for cancellation ----------------------
+        if (self._cancel_event is not None) and self._cancel_event.is_set():
+            raise UpscaleCancelled()
+
+        # --- load tiles from checkpoint ------------------
+        scale = self._tile_upscaler.scale_factor
+        upscaled_tiles: list[Tile | None] = [None] * len(tiles)
+        if self._checkpoint is not None:
+            for i, tile in enumerate(tiles):
+                if (img := self._checkpoint.load_tile(step, tile.left, tile.top)) is not None:
+                    upscaled_tiles[i] = Tile(img=img, left=scale * tile.left, top=scale * tile.top)
+
+        # --- upscale flat tiles classically --------------
+        todo = [i for i, upscaled_tile in enumerate(upscaled_tiles) if upscaled_tile is None]
+        if self._flat_tile_threshold > 0.0:
+            for i in todo:
+                if tiles[i].mean_gradient() < self._flat_tile_threshold:
+                    upscaled_tiles[i] = Tile(
+                        img=tiles[i].img.resize((scale * tiles[i].width, scale * tiles[i].height), Image.LANCZOS),
+                        left=scale * tiles[i].left,
+                        top=scale * tiles[i].top,
+                    )
+                    self._n_flat_tiles += 1
+            todo = [i for i in todo if upscaled_tiles[i] is None]
+
+        # --- reuse results of identical tiles ------------
+        duplicates: dict[int, int] = dict()  # tile index -> index of identical tile in this batch
+        if self._dedup is not None:
+            # key -> index of the tile in this batch providing the result for that key; tiles that are already
+            #        available (e.g. loaded from the checkpoint) take precedence over tiles still to be upscaled
+            first: dict[str, int] = {
+                self._dedup.tile_key(tiles[i]): i
+                for i, upscaled_tile in enumerate(upscaled_tiles)
+                if upscaled_tile is not None
+            }
+            for i in todo:
+                if (img := self._dedup.get(tiles[i])) is not None:
+                    upscaled_tiles[i] = Tile(img=img, left=scale * tiles[i].left, top=scale * tiles[i].top)
+                else:
+                    duplicates[i] = first.setdefault(self._dedup.tile_key(tiles[i]), i)
+            duplicates = {i: j for i, j in duplicates.items() if i != j}
+            todo = [i for i in todo if (upscaled_tiles[i] is None) and (i not in duplicates)]
+
+        # --- upscale remaining tiles ---------------------
+        if todo:
+            with span(
+                "tile_upscale",
+                step=step,
+                tile_indices=[tile_indices[(tiles[i].left, tiles[i].top)] for i in todo],
+                tile_sizes=sorted({(tiles[i].width, tiles[i].height) for i in todo}),
+            ):
+                results = self._tile_upscaler.upscale_batch(
+                    [tiles[i] for i in todo], prompt, batch_size=self._batch_size
+                )
+            for i, upscaled_tile in zip(todo, results):
+                upscaled_tiles[i] = upscaled_tile
+                if self._checkpoint is not None:
+                    self._checkpoint.save_tile(step, tiles[i].left, tiles[i].top, upscaled_tile.img)
+        for i, j in duplicates.items():
+            upscaled_tiles[i] = Tile(img=upscaled_tiles[j].img, left=scale * tiles[i].left, top=scale * tiles[i].top)
+
+        # --- register results for identical tiles to come
+        if self._dedup is not None:
+            for tile, upscaled_tile in zip(tiles, upscaled_tiles):
+                self._dedup.processed(tile, upscaled_tile.img)
+
+        # --- update preview ------------------------------
+        if self._preview is not None:
+            self._preview.update_tiles(upscaled_tiles, output_size)
+
+        return upscaled_tiles
+
+    def _job_description(self, image: Image.Image, scale: float, prompt: str) -> dict[str, Any]:
+        """Json-serializable description of all inputs & settings that determine the result of upscale(...)."""
+        return {
+            "image": Checkpoint.image_hash(image),
+            "scale": scale,
+            "prompt": prompt,
+            "stitch_overlap_fraction": self._stitch_overlap_fraction,
+            "coarse_seams": self._coarse_seams,
+            "merge_mode": self._merge_mode,
+            "min_detail": self._planner.min_detail,
+            "tile_strategy": self._tile_strategy,
+            "flat_tile_threshold": self._flat_tile_threshold,
+            "tile_upscaler": self._tile_upscaler.inference_params(),
+        }
+
+    def _tile_splitter(self, tile_upscaler: TileUpscaler, strategy: str) -> TileSplitter:
+        return TileSplitter(
+            tile_width_spec=tile_upscaler.tile_width_spec,
+            tile_height_spec=tile_upscaler.tile_height_spec,
+            overlap_fraction=self._stitch_overlap_fraction,
+            strategy=strategy,
+        )
+
+    def _tile_merger(self) -> TileMerger:
+        if self._merge_mode is not None:
+            merge_mode = self._merge_mode
+        elif self._stitch_overlap_fraction == 0:
+            merge_mode = "paste"  # just paste, we don't have overlap for seam optimization
+        else:
+            merge_mode = "stitch"  # we have some overlap, so we can optimize seams
+
+        if merge_mode == "stitch":
+            seam_scale = int(self._tile_upscaler.scale_factor) if self._coarse_seams else 1
+            return TileMerger.stitch(self._canvas_dir, seam_scale=seam_scale)
+        else:
+            return TileMerger.from_mode(merge_mode, self._canvas_dir)
+
+    @staticmethod
+    def _save_debug_images(solution: TileMergeSolution, slug: str):
+        """Render & save debug images of the given merge solution; runs in the background writer thread."""
+        solution.pixel_sources_img().save(Path(os.getcwd()) / f"debug_{slug}_pixel_sources.png")
+        solution.img_overlayed().save(Path(os.getcwd()) / f"debug_{slug}_stitches.png")
@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.conftest import DummyTileUpscaler
+from core.image_upscalers import Checkpoint, ImageUpscaler_MultiTile
+
+
+@pytest.mark.parametrize("fail_after", [0, 3, 10, 23])
+def test_checkpoint_resume(tmp_path: Path, fail_after: int):
+    # --- arrange -----------------------------------------
+    img = Image.fromarray(np.random.randint(0, 255, size=(40, 50, 3), dtype=np.uint8), mode="RGB")
+    reference_upscaler = DummyTileUpscaler()
+    expected = ImageUpscaler_MultiTile(reference_upscaler, stitch_overlap_fraction=0.1).upscale(img, 10.0)
+
+    interrupted_upscaler = DummyTileUpscaler(fail_after=fail_after)
+    interrupted_checkpoint = Checkpoint(tmp_path)
+    with pytest.raises(RuntimeError, match="inference failed"):
+        ImageUpscaler_MultiTile(
+            interrupted_upscaler, stitch_overlap_fraction=0.1, checkpoint=interrupted_checkpoint
+        ).upscale(img, 10.0)
+    interrupted_checkpoint.wait()  # pending writes would also complete before a real process exits
+
+    # --- act ---------------------------------------------
+    resumed_upscaler = DummyTileUpscaler()
+    result = ImageUpscaler_MultiTile(
+        resumed_upscaler, stitch_overlap_fraction=0.1, checkpoint=Checkpoint(tmp_path, resume=True)
+    ).upscale(img, 10.0)
+
+    # --- assert ------------------------------------------
+    assert interrupted_upscaler.n_upscaled + resumed_upscaler.n_upscaled == reference_upscaler.n_upscaled
+    np.testing.assert_array_equal(np.array(result), np.array(expected))
+
+
+def test_checkpoint_resume_different_job(tmp_path: Path):
+    # --- arrange -----------------------------------------
+    img = Image.fromarray(np.random.randint(0, 255, size=(40, 50, 3), dtype=np.uint8), mode="RGB")
+    ImageUpscaler_MultiTile(DummyTileUpscaler(), checkpoint=Checkpoint(tmp_path)).upscale(img, 4.0)
+
+    # --- act & assert ------------------------------------
+    with pytest.raises(ValueError, match="different job"):
+        ImageUpscaler_MultiTile(DummyTileUpscaler(), checkpoint=Checkpoint(tmp_path, resume=True)).upscale(img, 8.0)
+
+
+def test_checkpoint_resume_dedup(tmp_path: Path):
+    """Test that tiles identical to tiles loaded from the checkpoint are not upscaled again when resuming."""
+
+    # --- arrange -----------------------------------------
+    #  4x4 tiles of 28x28, upscaled in batches of 4 (= 1 column); the 8 tiles of the left 2 columns are identical
+    pixels = np.full((96, 96, 3), 200, dtype=np.uint8)
+    pixels[:, 50:] = np.random.randint(0, 255, size=(96, 46, 3), dtype=np.uint8)
+    img = Image.fromarray(pixels, mode="RGB")
+    reference_upscaler = DummyTileUpscaler()
+    expected = ImageUpscaler_MultiTile(reference_upscaler, 0.1, batch_size=4).upscale(img, 4.0)
+
+    interrupted_upscaler = DummyTileUpscaler(fail_after=1)  # fails at the 3rd column, after 1 unique tile
+    interrupted_checkpoint = Checkpoint(tmp_path)
+    with pytest.raises(RuntimeError, match="inference failed"):
+        ImageUpscaler_MultiTile(interrupted_upscaler, 0.1, batch_size=4, checkpoint=interrupted_checkpoint).upscale(
+            img, 4.0
+        )
+    interrupted_checkpoint.wait()
+
+    # --- act ---------------------------------------------
+    resumed_upscaler = DummyTileUpscaler()
+    result = ImageUpscaler_MultiTile(
+        resumed_upscaler, 0.1, batch_size=4, checkpoint=Checkpoint(tmp_path, resume=True)
+    ).upscale(img, 4.0)
+
+    # --- assert ------------------------------------------
+    assert reference_upscaler.n_upscaled == 1 + 8
+    assert resumed_upscaler.n_upscaled == 8
+    np.testing.assert_array_equal(np.array(result), np.array(expected))
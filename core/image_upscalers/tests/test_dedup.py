@@ -0,0 +1,38 @@
+import numpy as np
+from PIL import Image
+
+from core.image_upscalers._dedup import TileDeduplicator
+from core.tiles import Tile
+
+
+def test_tile_deduplicator():
+    # --- arrange -----------------------------------------
+    pixels = np.zeros((8, 32, 3), dtype=np.uint8)
+    pixels[:, 24:] = 255
+    tiles = [Tile(pixels=pixels[:, x : x + 8], left=x, top=0) for x in range(0, 32, 8)]  # 3x black, 1x white
+    upscaled = [Image.new("RGB", (16, 16), color=(i, i, i)) for i in range(len(tiles))]
+
+    # --- act & assert ------------------------------------
+    dedup = TileDeduplicator(tiles)
+    assert (dedup.n_tiles, dedup.n_unique) == (4, 2)
+    assert dedup.dedup_ratio == 0.5
+    assert dedup.tile_key(tiles[0]) == dedup.tile_key(tiles[2]) != dedup.tile_key(tiles[3])
+
+    assert dedup.get(tiles[0]) is None
+    dedup.processed(tiles[0], upscaled[0])
+    assert dedup.get(tiles[1]) is upscaled[0]
+    dedup.processed(tiles[1], upscaled[0])
+    dedup.processed(tiles[2], upscaled[0])
+    assert dedup.get(tiles[0]) is None  # no identical tiles left, so result is released
+    assert dedup.get(tiles[3]) is None
+
+
+def test_tile_deduplicator_key():
+    # --- arrange -----------------------------------------
+    pixels = np.random.randint(0, 255, size=(16, 16, 3), dtype=np.uint8)
+
+    # --- act & assert ------------------------------------
+    key = TileDeduplicator.key(Tile(pixels=pixels))
+    assert key == TileDeduplicator.key(Tile(img=Image.fromarray(pixels.copy()), left=4, top=8))  # position ignored
+    assert key != TileDeduplicator.key(Tile(pixels=pixels.reshape(8, 32, 3)))  # same bytes, different shape
+    assert key != TileDeduplicator.key(Tile(pixels=pixels[:, ::-1]))
@@ -0,0 +1,116 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.conftest import DummyTileUpscaler
+from core.image_upscalers import ImageUpscaler_MultiTile
+
+
+@pytest.mark.parametrize("stitch_overlap_fraction", [0.0, 0.1])
+@pytest.mark.parametrize("merge_mode", [None, "blend"])
+@pytest.mark.parametrize("pipeline_depth", [0, 2])
+def test_multi_tile_out_of_core(
+    tmp_path: Path, stitch_overlap_fraction: float, merge_mode: str | None, pipeline_depth: int
+):
+    # --- arrange -----------------------------------------
+    img = Image.fromarray(np.random.randint(0, 255, size=(30, 45, 3), dtype=np.uint8), mode="RGB")
+    expected = ImageUpscaler_MultiTile(DummyTileUpscaler(), stitch_overlap_fraction, merge_mode=merge_mode).upscale(
+        img, 10.0
+    )
+
+    # --- act ---------------------------------------------
+    result = ImageUpscaler_MultiTile(
+        DummyTileUpscaler(),
+        stitch_overlap_fraction,
+        merge_mode=merge_mode,
+        pipeline_depth=pipeline_depth,
+        canvas_dir=tmp_path,
+    ).upscale_canvas(img, 10.0)
+
+    # --- assert ------------------------------------------
+    assert result.is_out_of_core
+    np.testing.assert_array_equal(np.array(result.to_image()), np.array(expected))
+
+
+@pytest.mark.parametrize("tile_strategy", ["uniform", "non_uniform"])
+@pytest.mark.parametrize("width, height", [(30, 17), (31, 45), (50, 63), (101, 26)])
+def test_multi_tile_output_size(tile_strategy: str, width: int, height: int):
+    """Test that the result has exactly the target size, also for sizes that are not a multiple of the specs."""
+
+    # --- arrange -----------------------------------------
+    img = Image.fromarray(np.random.randint(0, 255, size=(height, width, 3), dtype=np.uint8), mode="RGB")
+    image_upscaler = ImageUpscaler_MultiTile(DummyTileUpscaler(), 0.1, tile_strategy=tile_strategy)
+
+    # --- act ---------------------------------------------
+    result = image_upscaler.upscale(img, 4.0)
+
+    # --- assert ------------------------------------------
+    assert result.size == (4 * width, 4 * height)
+
+
+@pytest.mark.parametrize("flat_tile_threshold, expect_skipped", [(0.0, False), (1.0, True)])
+def test_multi_tile_flat_tiles(flat_tile_threshold: float, expect_skipped: bool):
+    """Test that flat tiles skip the tile upscaler if a threshold is set, while still being merged as usual."""
+
+    # --- arrange -----------------------------------------
+    pixels = np.full((32, 96, 3), 120, dtype=np.uint8)
+    pixels[:, 64:] = np.random.randint(0, 255, size=(32, 32, 3), dtype=np.uint8)  # right-most third has detail
+    img = Image.fromarray(pixels, mode="RGB")
+    tile_upscaler = DummyTileUpscaler()
+    image_upscaler = ImageUpscaler_MultiTile(
+        tile_upscaler, 0.1, flat_tile_threshold=flat_tile_threshold, dedup_tiles=False
+    )
+    n_tiles = len(image_upscaler._planner.tile_splitter.split_ranges(img.width, img.height))
+
+    # --- act ---------------------------------------------
+    result = np.array(image_upscaler.upscale(img, 4.0))
+
+    # --- assert ------------------------------------------
+    assert result.shape == (128, 384, 3)
+    assert (result[:, :192] == 120).all()
+    if expect_skipped:
+        assert 0 < tile_upscaler.n_upscaled < n_tiles
+    else:
+        assert tile_upscaler.n_upscaled == n_tiles
+
+
+def test_multi_tile_invalid_flat_tile_threshold():
+    with pytest.raises(ValueError):
+        ImageUpscaler_MultiTile(DummyTileUpscaler(), flat_tile_threshold=-1.0)
+
+
+@pytest.mark.parametrize("pipeline_depth", [0, 2])
+def test_multi_tile_dedup(pipeline_depth: int):
+    """Test that identical tiles are only upscaled once, without affecting the result."""
+
+    # --- arrange -----------------------------------------
+    pixels = np.full((48, 96, 3), 200, dtype=np.uint8)
+    pixels[:, :16] = np.random.randint(0, 255, size=(48, 16, 3), dtype=np.uint8)  # left-most strip has detail
+    img = Image.fromarray(pixels, mode="RGB")
+    tile_upscaler = DummyTileUpscaler()
+    reference_upscaler = DummyTileUpscaler()
+    expected = ImageUpscaler_MultiTile(reference_upscaler, 0.1, dedup_tiles=False).upscale(img, 4.0)
+
+    # --- act ---------------------------------------------
+    result = ImageUpscaler_MultiTile(tile_upscaler, 0.1, pipeline_depth=pipeline_depth).upscale(img, 4.0)
+
+    # --- assert ------------------------------------------
+    np.testing.assert_array_equal(np.array(result), np.array(expected))
+    assert 0 < tile_upscaler.n_upscaled < reference_upscaler.n_upscaled
+
+
+def test_multi_tile_preview(tmp_path: Path):
+    """Test that the preview file has the target size & ends up identical to the result."""
+
+    # --- arrange -----------------------------------------
+    img = Image.fromarray(np.random.randint(0, 255, size=(30, 45, 3), dtype=np.uint8), mode="RGB")
+    preview_file = tmp_path / "preview.bmp"
+
+    # --- act ---------------------------------------------
+    result = ImageUpscaler_MultiTile(DummyTileUpscaler(), 0.1, preview_file=preview_file).upscale(img, 6.0)
+
+    # --- assert ------------------------------------------
+    with Image.open(preview_file) as preview:
+        np.testing.assert_array_equal(np.array(preview.convert("RGB")), np.array(result))
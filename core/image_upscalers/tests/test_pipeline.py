@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.conftest import DummyTileUpscaler
+from core.image_upscalers._pipeline import TilePipeline
+from core.tiles import TileDimSpec, TileMerger, TileSplitter
+
+
+@pytest.mark.parametrize(
+    "tile_merger, batch_size, depth",
+    [
+        (TileMerger.paste(), 1, 1),
+        (TileMerger.paste(), 3, 2),
+        (TileMerger.stitch(), 1, 1),
+        (TileMerger.stitch(), 2, 4),
+    ],
+)
+def test_tile_pipeline_matches_sequential(tile_merger: TileMerger, batch_size: int, depth: int):
+    # --- arrange -----------------------------------------
+    img = Image.fromarray(np.random.randint(0, 255, size=(100, 150, 3), dtype=np.uint8), mode="RGB")
+    tile_upscaler = DummyTileUpscaler(scale_factor=2, tile_spec=TileDimSpec(8, 64, 4))
+    tile_splitter = TileSplitter(tile_upscaler.tile_width_spec, tile_upscaler.tile_height_spec, overlap_fraction=0.2)
+    tile_ranges = tile_splitter.split_ranges(img.width, img.height)
+
+    expected = tile_merger.merge(tile_upscaler.upscale_batch(tile_splitter.split_image(img)))
+
+    # --- act ---------------------------------------------
+    solution = TilePipeline(tile_upscaler.upscale_batch, 2, batch_size=batch_size, depth=depth).run(
+        img, tile_ranges, tile_merger
+    )
+
+    # --- assert ------------------------------------------
+    assert solution.tile_ranges == expected.tile_ranges
+    np.testing.assert_array_equal(np.array(solution.img), np.array(expected.img))
+    np.testing.assert_array_equal(solution.pixel_sources, expected.pixel_sources)
+
+
+def test_tile_pipeline_propagates_errors():
+    # --- arrange -----------------------------------------
+    img = Image.fromarray(np.random.randint(0, 255, size=(200, 200, 3), dtype=np.uint8), mode="RGB")
+    tile_upscaler = DummyTileUpscaler(scale_factor=2, tile_spec=TileDimSpec(8, 64, 4), fail_after=3)
+    tile_splitter = TileSplitter(tile_upscaler.tile_width_spec, tile_upscaler.tile_height_spec)
+    tile_ranges = tile_splitter.split_ranges(img.width, img.height)
+
+    # --- act & assert ------------------------------------
+    with pytest.raises(RuntimeError, match="inference failed"):
+        TilePipeline(tile_upscaler.upscale_batch, 2, depth=1).run(img, tile_ranges, TileMerger.paste())
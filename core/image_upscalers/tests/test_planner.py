@@ -0,0 +1,80 @@
+import pytest
+
+from core.image_upscalers._planner import UpscalePlanner
+from core.tiles import TileDimSpec, TileSplitter
+
+
+def _planner(min_detail: float = 1.0, scale_factor: int = 4) -> UpscalePlanner:
+    tile_spec = TileDimSpec(16, 128, 4)
+    return UpscalePlanner(TileSplitter(tile_spec, tile_spec, overlap_fraction=0.1), scale_factor, min_detail)
+
+
+@pytest.mark.parametrize(
+    "scale, expected_steps",
+    [
+        (1.0, []),
+        (0.5, [("resize", (100, 75), (50, 37))]),
+        (4.0, [("upscale", (100, 75), (400, 300))]),
+        (2.0, [("upscale", (100, 75), (400, 300)), ("resize", (400, 300), (200, 150))]),
+        (
+            10.0,
+            [
+                ("upscale", (100, 75), (400, 300)),
+                ("resize", (400, 300), (250, 188)),
+                ("upscale", (250, 188), (1000, 752)),
+                ("resize", (1000, 752), (1000, 750)),
+            ],
+        ),
+    ],
+)
+def test_planner(scale: float, expected_steps: list[tuple]):
+    # --- act ---------------------------------------------
+    plan = _planner().plan(100, 75, scale)
+
+    # --- assert ------------------------------------------
+    assert [(step.kind, step.input_size, step.output_size) for step in plan.steps] == expected_steps
+
+
+@pytest.mark.parametrize("scale", [1.3, 2.0, 3.9, 4.0, 5.5, 10.0, 15.0, 16.0, 33.3])
+@pytest.mark.parametrize("min_detail", [1.0, 0.5, 0.1])
+def test_planner_constraints(scale: float, min_detail: float):
+    """
+    Test that plans are consistent, reach the exact target size & never pass images to the model that are smaller
+    than allowed by min_detail.
+    """
+
+    # --- act ---------------------------------------------
+    plan = _planner(min_detail).plan(100, 75, scale)
+
+    # --- assert ------------------------------------------
+    assert plan.steps[-1].output_size == (int(100 * scale), int(75 * scale))
+    for step, next_step in zip(plan.steps[:-1], plan.steps[1:]):
+        assert step.output_size == next_step.input_size
+    for step in plan.steps:
+        if step.kind == "upscale":
+            assert step.input_size[0] >= min_detail * 100 and step.input_size[1] >= min_detail * 75
+            assert step.output_size == (4 * step.input_size[0], 4 * step.input_size[1])
+            assert step.n_tiles > 0 and step.inferred_pixels >= step.input_size[0] * step.input_size[1]
+
+
+def test_planner_min_detail():
+    """Test that a lower min_detail allows pre-shrinking the input, reducing the estimated cost."""
+
+    # --- act ---------------------------------------------
+    plan_full = _planner(min_detail=1.0).plan(400, 300, 2.0)
+    plan_shrunk = _planner(min_detail=0.5).plan(400, 300, 2.0)
+
+    # --- assert ------------------------------------------
+    assert [step.kind for step in plan_shrunk.steps] == ["resize", "upscale"]
+    assert plan_shrunk.inferred_pixels < plan_full.inferred_pixels / 3
+    assert plan_shrunk.n_tiles < plan_full.n_tiles
+
+
+def test_planner_invalid_min_detail():
+    with pytest.raises(ValueError):
+        _planner(min_detail=0.0)
+
+
+def test_planner_invalid_scale_factor():
+    with pytest.raises(ValueError):
+        _planner(scale_factor=1)  # would never reach any target scale > 1
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.image_upscalers._preview import ProgressivePreview
+from core.tiles import Canvas, Tile
+
+
+def _random_pixels(width: int, height: int) -> np.ndarray:
+    return np.random.randint(0, 255, size=(height, width, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("width, height", [(16, 8), (15, 7), (1, 1)])
+def test_preview_refresh(tmp_path: Path, width: int, height: int):
+    """Test that the preview file is a valid BMP file with the expected pixels, incl. for padded rows."""
+
+    # --- arrange -----------------------------------------
+    pixels = _random_pixels(width, height)
+    preview = ProgressivePreview(tmp_path / "preview.bmp", (width, height))
+
+    # --- act ---------------------------------------------
+    preview.refresh(Canvas.from_image(Image.fromarray(pixels)))
+    preview.close()
+
+    # --- assert ------------------------------------------
+    with Image.open(tmp_path / "preview.bmp") as img:
+        assert img.size == (width, height)
+        np.testing.assert_array_equal(np.array(img.convert("RGB")), pixels)
+
+
+def test_preview_update_tiles(tmp_path: Path):
+    # --- arrange -----------------------------------------
+    path = tmp_path / "preview.bmp"
+    preview = ProgressivePreview(path, (40, 20), interval=0.0)
+    preview.refresh(Canvas.from_image(Image.new("RGB", (10, 5), color=(10, 20, 30))))  # resized to preview size
+    tile_pixels = _random_pixels(8, 4)
+
+    # --- act ---------------------------------------------
+    preview.update_tiles([Tile(pixels=tile_pixels, left=12, top=4)], image_size=(40, 20))  # same size as preview
+    preview.update_tiles([Tile(pixels=np.full((2, 2, 3), 200, dtype=np.uint8), left=0, top=0)], image_size=(20, 10))
+
+    # --- assert ------------------------------------------
+    with Image.open(path) as img:  # interval=0.0, so updates are flushed immediately
+        result = np.array(img.convert("RGB"))
+    np.testing.assert_array_equal(result[4:8, 12:20], tile_pixels)
+    assert (result[:4, :4] == 200).all()  # scaled 2x
+    assert (result[10:, 30:] == (10, 20, 30)).all()
+    preview.close()
+
+
+def test_preview_too_large(tmp_path: Path):
+    with pytest.raises(ValueError):
+        ProgressivePreview(tmp_path / "preview.bmp", (40_000, 40_000))
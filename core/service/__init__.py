@@ -0,0 +1,7 @@
+"""
+Long-running upscaling service, which keeps a tile upscaler (and hence its model) loaded and processes
+jobs submitted over a local HTTP API.
+"""
+
+from ._http import UpscaleHTTPServer
+from ._service import JobStatus, ServiceBusy, UpscaleJob, UpscaleService
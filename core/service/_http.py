@@ -0,0 +1,144 @@
+import io
+import json
+import math
+import re
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image
+
+from ._service import JobStatus, ServiceBusy, UpscaleService
+
+
+class UpscaleHTTPServer(ThreadingHTTPServer):
+    """
+    Local HTTP API around an UpscaleService.  Endpoints:
+
+      POST   /jobs?scale=<float>&prompt=<str>   submit job with the input image as request body
+                                                  -> 202 + job status, 400 if the request is invalid,
+                                                     411 without Content-Length, or 503 if the job queue is full
+      GET    /jobs/<id>                         job status
+      GET    /jobs/<id>/result?wait=<seconds>   upscaled image as PNG, optionally waiting for the job to finish
+                                                  -> 200 + PNG, 202 + job status if not finished, 409 if failed
+      DELETE /jobs/<id>                         cancel job if unfinished, otherwise remove it from memory
+      GET    /status                            service status
+
+    All non-image responses are json.  The server does not implement any authentication and should only be bound
+    to local interfaces.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, service: UpscaleService, host: str = "127.0.0.1", port: int = 8000, max_upload_mb: int = 64):
+        super().__init__((host, port), _RequestHandler)
+        self.service = service
+        self.max_upload_bytes = max_upload_mb * 1024**2
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server: UpscaleHTTPServer
+
+    _JOB_PATH = re.compile(r"^/jobs/(?P<job_id>[0-9a-f]+)(?P<result>/result)?$")
+    RETRY_AFTER_SECONDS = 5
+
+    # -------------------------------------------------------------------------
+    #  Request handlers
+    # -------------------------------------------------------------------------
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/jobs":
+            return self._send_error(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {url.path}")
+
+        # --- parse request -------------------------------
+        params = parse_qs(url.query)
+        try:
+            scale = float(params.get("scale", ["4.0"])[0])
+            prompt = params.get("prompt", [""])[0]
+        except ValueError as e:
+            return self._send_error(HTTPStatus.BAD_REQUEST, f"Invalid parameter: {e}")
+        if not (math.isfinite(scale) and (scale > 0.0)):
+            return self._send_error(HTTPStatus.BAD_REQUEST, f"Invalid parameter: scale should be > 0, got {scale}.")
+
+        if (content_length := self.headers.get("Content-Length")) is None:
+            return self._send_error(HTTPStatus.LENGTH_REQUIRED, "Content-Length header is required.")
+        try:
+            n_bytes = int(content_length)
+        except ValueError:
+            n_bytes = -1
+        if n_bytes < 0:
+            return self._send_error(HTTPStatus.BAD_REQUEST, f"Invalid Content-Length: {content_length}")
+        if n_bytes > self.server.max_upload_bytes:
+            return self._send_error(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Image exceeds {self.server.max_upload_bytes} bytes."
+            )
+        try:
+            with Image.open(io.BytesIO(self.rfile.read(n_bytes))) as img:
+                image = img.convert("RGB")
+        except (OSError, ValueError) as e:
+            return self._send_error(HTTPStatus.BAD_REQUEST, f"Invalid image: {e}")
+
+        # --- submit --------------------------------------
+        try:
+            job = self.server.service.submit(image, scale, prompt)
+        except ServiceBusy as e:
+            return self._send_error(
+                HTTPStatus.SERVICE_UNAVAILABLE, str(e), headers={"Retry-After": str(self.RETRY_AFTER_SECONDS)}
+            )
+        self._send_json(HTTPStatus.ACCEPTED, job.to_dict(), headers={"Location": f"/jobs/{job.id}"})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/status":
+            return self._send_json(HTTPStatus.OK, self.server.service.status())
+        if (match := self._JOB_PATH.match(url.path)) is None:
+            return self._send_error(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {url.path}")
+        if (job := self.server.service.get(match["job_id"])) is None:
+            return self._send_error(HTTPStatus.NOT_FOUND, f"Unknown job: {match['job_id']}")
+
+        if not match["result"]:
+            return self._send_json(HTTPStatus.OK, job.to_dict())
+
+        # --- result --------------------------------------
+        try:
+            wait = float(parse_qs(url.query).get("wait", ["0"])[0])
+        except ValueError as e:
+            return self._send_error(HTTPStatus.BAD_REQUEST, f"Invalid parameter: {e}")
+        if not job.wait(timeout=max(wait, 0.0)):
+            return self._send_json(HTTPStatus.ACCEPTED, job.to_dict())
+        elif job.status != JobStatus.DONE:
+            return self._send_json(HTTPStatus.CONFLICT, job.to_dict())
+
+        buffer = io.BytesIO()
+        job.result.save(buffer, format="PNG")
+        self._send(HTTPStatus.OK, buffer.getvalue(), content_type="image/png")
+
+    def do_DELETE(self):
+        url = urlparse(self.path)
+        if ((match := self._JOB_PATH.match(url.path)) is None) or match["result"]:
+            return self._send_error(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {url.path}")
+
+        service = self.server.service
+        job = service.remove(match["job_id"]) or service.cancel(match["job_id"])
+        if job is None:
+            return self._send_error(HTTPStatus.NOT_FOUND, f"Unknown job: {match['job_id']}")
+        self._send_json(HTTPStatus.OK, job.to_dict())
+
+    # -------------------------------------------------------------------------
+    #  Helpers
+    # -------------------------------------------------------------------------
+    def _send_error(self, status: HTTPStatus, message: str, headers: dict[str, str] | None = None):
+        self._send_json(status, {"error": message}, headers)
+
+    def _send_json(self, status: HTTPStatus, content: dict[str, Any], headers: dict[str, str] | None = None):
+        self._send(status, json.dumps(content).encode(), content_type="application/json", headers=headers)
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str, headers: dict[str, str] | None = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
@@ -0,0 +1,212 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import StrEnum
+from queue import Full, Queue
+from typing import Any, Callable
+
+from PIL import Image
+
+from core.image_upscalers import ImageUpscaler, UpscaleCancelled
+
+
+class ServiceBusy(Exception):
+    """Raised when submitting a job while the job queue is full."""
+
+
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    TIMED_OUT = "timed_out"
+    CANCELLED = "cancelled"
+
+    @property
+    def is_finished(self) -> bool:
+        return self not in (JobStatus.QUEUED, JobStatus.RUNNING)
+
+
+@dataclass
+class UpscaleJob:
+    image: Image.Image
+    scale: float
+    prompt: str = ""
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.QUEUED
+    result: Image.Image | None = None
+    error: str | None = None
+    t_submitted: float = field(default_factory=time.monotonic)
+    t_started: float | None = None
+    t_finished: float | None = None
+
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    finished_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Waits until the job is finished; returns False if the timeout expired first."""
+        return self.finished_event.wait(timeout)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Json-serializable summary of the job, excluding input & result images."""
+        return {
+            "id": self.id,
+            "status": str(self.status),
+            "scale": self.scale,
+            "prompt": self.prompt,
+            "input_size": list(self.image.size),
+            "output_size": list(self.result.size) if self.result is not None else None,
+            "error": self.error,
+            "queue_time": _duration(self.t_submitted, self.t_started),
+            "run_time": _duration(self.t_started, self.t_finished),
+        }
+
+
+class UpscaleService:
+    """
+    Processes upscaling jobs one at a time in a worker thread, reusing the same (warm) tile upscaler for all jobs.
+
+    The job queue is bounded: submitting a job while the queue is full raises ServiceBusy, such that clients can
+    back off.  Jobs that do not finish within 'job_timeout' seconds after submission are aborted; running jobs are
+    aborted before their next batch of tiles.  Finished jobs (including their results) are kept in memory until they
+    are retrieved & removed, or until more than 'max_finished_jobs' jobs finished after them.
+    """
+
+    # -------------------------------------------------------------------------
+    #  Constructor
+    # -------------------------------------------------------------------------
+    def __init__(
+        self,
+        image_upscaler_factory: Callable[[threading.Event], ImageUpscaler],
+        max_queue_size: int = 8,
+        job_timeout: float | None = 600.0,
+        max_finished_jobs: int = 100,
+    ):
+        """
+        :param image_upscaler_factory: returns the ImageUpscaler to use for a job, given the job's cancel event;
+                                         all returned instances should share the same TileUpscaler.
+        :param max_queue_size: int >= 1, max. number of jobs waiting to be processed.
+        :param job_timeout: max. number of seconds between submission & completion of a job, or None for no limit.
+        :param max_finished_jobs: max. number of finished jobs kept in memory.
+        """
+        if max_queue_size < 1:
+            raise ValueError(f"max_queue_size should be >= 1, got {max_queue_size}.")
+        self._image_upscaler_factory = image_upscaler_factory
+        self._job_timeout = job_timeout
+        self._max_finished_jobs = max_finished_jobs
+
+        self._lock = threading.Lock()
+        self._queue: Queue[UpscaleJob | None] = Queue(maxsize=max_queue_size)
+        self._jobs: OrderedDict[str, UpscaleJob] = OrderedDict()  # all known jobs, in order of submission
+        self._worker: threading.Thread | None = None
+
+    # -------------------------------------------------------------------------
+    #  Main API
+    # -------------------------------------------------------------------------
+    def start(self):
+        """Starts the worker thread processing jobs."""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run_worker, name="upscale-service", daemon=True)
+            self._worker.start()
+
+    def stop(self):
+        """Cancels all unfinished jobs and stops the worker thread."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            self._cancel(job)
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+
+    def submit(self, image: Image.Image, scale: float, prompt: str = "") -> UpscaleJob:
+        """Adds a new job to the queue, or raises ServiceBusy if the queue is full."""
+        job = UpscaleJob(image=image, scale=scale, prompt=prompt)
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except Full:
+                raise ServiceBusy(f"Job queue is full ({self._queue.maxsize} jobs); try again later.")
+            self._jobs[job.id] = job
+        if self._job_timeout is not None:
+            timer = threading.Timer(self._job_timeout, self._cancel, args=(job,))
+            timer.daemon = True
+            timer.start()
+        return job
+
+    def get(self, job_id: str) -> UpscaleJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> UpscaleJob | None:
+        """Cancels the given job (if it is not finished yet) and returns it, or None if the job is unknown."""
+        if (job := self.get(job_id)) is not None:
+            self._cancel(job)
+        return job
+
+    def remove(self, job_id: str) -> UpscaleJob | None:
+        """Removes a finished job from memory and returns it, or None if the job is unknown or not finished."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if (job is None) or not job.status.is_finished:
+                return None
+            return self._jobs.pop(job_id)
+
+    def status(self) -> dict[str, Any]:
+        """Json-serializable summary of the service state."""
+        with self._lock:
+            counts = {str(status): 0 for status in JobStatus}
+            for job in self._jobs.values():
+                counts[str(job.status)] += 1
+        return {"queue_size": self._queue.qsize(), "max_queue_size": self._queue.maxsize, "jobs": counts}
+
+    # -------------------------------------------------------------------------
+    #  Internal methods
+    # -------------------------------------------------------------------------
+    def _run_worker(self):
+        while (job := self._queue.get()) is not None:
+            self._process(job)
+
+    def _process(self, job: UpscaleJob):
+        with self._lock:
+            if job.status != JobStatus.QUEUED:
+                return  # cancelled while queued
+            job.status, job.t_started = JobStatus.RUNNING, time.monotonic()
+
+        try:
+            image_upscaler = self._image_upscaler_factory(job.cancel_event)
+            job.result = image_upscaler.upscale(job.image, job.scale, prompt=job.prompt)
+            self._finish(job, JobStatus.DONE)
+        except UpscaleCancelled:
+            self._finish(job, *self._cancelled_status(job))
+        except Exception as e:
+            self._finish(job, JobStatus.FAILED, f"{type(e).__name__}: {e}")
+
+    def _cancel(self, job: UpscaleJob):
+        job.cancel_event.set()
+        with self._lock:
+            if job.status != JobStatus.QUEUED:
+                return  # running jobs are aborted by the worker, finished jobs are left untouched
+            job.status = JobStatus.CANCELLED  # claim the job, such that the worker skips it
+        self._finish(job, *self._cancelled_status(job))
+
+    def _cancelled_status(self, job: UpscaleJob) -> tuple[JobStatus, str]:
+        if (self._job_timeout is not None) and (time.monotonic() - job.t_submitted >= self._job_timeout):
+            return JobStatus.TIMED_OUT, f"Job did not finish within {self._job_timeout}s."
+        else:
+            return JobStatus.CANCELLED, "Job was cancelled."
+
+    def _finish(self, job: UpscaleJob, status: JobStatus, error: str | None = None):
+        job.status, job.error, job.t_finished = status, error, time.monotonic()
+        job.finished_event.set()
+        with self._lock:
+            finished = [job_id for job_id, other in self._jobs.items() if other.status.is_finished]
+            for job_id in finished[: max(len(finished) - self._max_finished_jobs, 0)]:
+                del self._jobs[job_id]
+
+
+def _duration(t_start: float | None, t_end: float | None) -> float | None:
+    return (t_end - t_start) if (t_start is not None) and (t_end is not None) else None
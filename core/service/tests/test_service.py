@@ -0,0 +1,165 @@
+import http.client
+import io
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from typing import Iterator
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.conftest import DummyTileUpscaler
+from core.image_upscalers import ImageUpscaler_MultiTile
+from core.service import JobStatus, ServiceBusy, UpscaleHTTPServer, UpscaleService
+from core.tile_upscalers import TileUpscaler
+
+
+def _random_image(width: int, height: int) -> Image.Image:
+    return Image.fromarray(np.random.randint(0, 255, size=(height, width, 3), dtype=np.uint8), mode="RGB")
+
+
+def _service(tile_upscaler: TileUpscaler, **kwargs) -> UpscaleService:
+    return UpscaleService(
+        lambda cancel_event: ImageUpscaler_MultiTile(tile_upscaler, cancel_event=cancel_event), **kwargs
+    )
+
+
+def test_service_jobs():
+    # --- arrange -----------------------------------------
+    service = _service(DummyTileUpscaler())
+    service.start()
+
+    # --- act ---------------------------------------------
+    jobs = [service.submit(_random_image(20 + 4 * i, 24), scale=2.0) for i in range(3)]
+    finished = [job.wait(timeout=10.0) for job in jobs]
+    service.stop()
+
+    # --- assert ------------------------------------------
+    assert all(finished)
+    for job in jobs:
+        assert job.status == JobStatus.DONE
+        assert job.result.size == (2 * job.image.width, 2 * job.image.height)
+    assert service.status()["jobs"]["done"] == 3
+
+
+def test_service_backpressure():
+    # --- arrange -----------------------------------------
+    tile_upscaler = DummyTileUpscaler()
+    tile_upscaler.release.clear()  # block the first job, such that subsequent jobs stay queued
+    service = _service(tile_upscaler, max_queue_size=2)
+    service.start()
+
+    # --- act & assert ------------------------------------
+    running_job = service.submit(_random_image(20, 20), scale=2.0)
+    while running_job.status == JobStatus.QUEUED:
+        time.sleep(0.01)
+    queued_jobs = [service.submit(_random_image(20, 20), scale=2.0) for _ in range(2)]
+    with pytest.raises(ServiceBusy):
+        service.submit(_random_image(20, 20), scale=2.0)
+
+    service.cancel(queued_jobs[0].id)
+    assert queued_jobs[0].status == JobStatus.CANCELLED
+
+    tile_upscaler.release.set()
+    assert queued_jobs[1].wait(timeout=10.0)
+    assert running_job.status == queued_jobs[1].status == JobStatus.DONE
+    service.stop()
+
+
+def test_service_timeout():
+    # --- arrange -----------------------------------------
+    service = _service(DummyTileUpscaler(delay=0.05), job_timeout=0.2)
+    service.start()
+
+    # --- act ---------------------------------------------
+    job = service.submit(_random_image(128, 128), scale=4.0)  # many tiles, i.e. takes far longer than the timeout
+    finished = job.wait(timeout=10.0)
+    service.stop()
+
+    # --- assert ------------------------------------------
+    assert finished
+    assert job.status == JobStatus.TIMED_OUT
+    assert job.result is None
+
+
+@contextmanager
+def _http_server(service: UpscaleService) -> Iterator[UpscaleHTTPServer]:
+    """Runs an UpscaleHTTPServer around the given service on a free local port, stopping both afterwards."""
+    server = UpscaleHTTPServer(service, port=0)
+    service.start()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.stop()
+
+
+def _png_bytes(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_http_server():
+    with _http_server(_service(DummyTileUpscaler())) as server:
+        # --- arrange -------------------------------------
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+        # --- act -----------------------------------------
+        request = urllib.request.Request(
+            f"{base_url}/jobs?scale=2", data=_png_bytes(_random_image(24, 20)), method="POST"
+        )
+        with urllib.request.urlopen(request) as response:
+            submit_status, job = response.status, json.loads(response.read())
+        with urllib.request.urlopen(f"{base_url}/jobs/{job['id']}/result?wait=10") as response:
+            result_status, result = response.status, Image.open(io.BytesIO(response.read()))
+        with pytest.raises(urllib.error.HTTPError) as exc_info:
+            urllib.request.urlopen(f"{base_url}/jobs/0123456789abcdef")
+
+        # --- assert --------------------------------------
+        assert submit_status == 202
+        assert result_status == 200
+        assert result.size == (48, 40)
+        assert exc_info.value.code == 404
+
+
+@pytest.mark.parametrize(
+    "query, content_length, expected_status",
+    [
+        ("scale=0", "auto", 400),
+        ("scale=-2", "auto", 400),
+        ("scale=nan", "auto", 400),
+        ("scale=inf", "auto", 400),
+        ("scale=abc", "auto", 400),
+        ("scale=2", None, 411),
+        ("scale=2", "abc", 400),
+        ("scale=2", "-1", 400),
+    ],
+)
+def test_http_server_invalid_submit(query: str, content_length: str | None, expected_status: int):
+    """Test that invalid job submissions are rejected with an error response, without submitting any job."""
+    service = _service(DummyTileUpscaler())
+    with _http_server(service) as server:
+        # --- arrange -------------------------------------
+        body = _png_bytes(_random_image(24, 20))
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=10.0)
+
+        # --- act -----------------------------------------
+        connection.putrequest("POST", f"/jobs?{query}")
+        if content_length is not None:
+            connection.putheader("Content-Length", str(len(body)) if content_length == "auto" else content_length)
+        connection.endheaders(body if content_length == "auto" else None)
+        response = connection.getresponse()
+        content = json.loads(response.read())
+        connection.close()
+
+        # --- assert --------------------------------------
+        assert response.status == expected_status
+        assert "error" in content
+        assert sum(service.status()["jobs"].values()) == 0
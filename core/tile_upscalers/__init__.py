@@ -4,3 +4,5 @@ different upscaling methods in the future, each with different inherent scaling
 """
 
 from ._base import TileUpscaler
+from ._process_pool import TileUpscaler_ProcessPool
+from ._tile_cache import TileCache
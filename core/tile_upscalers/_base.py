@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import threading
 from abc import ABC, abstractmethod
+from typing import Any, Iterator
 
 from PIL import Image
 
 from core.tiles import Tile, TileDimSpec
 
+from ._tile_cache import TileCache
+
 
 # =================================================================================================
 #  Base class for tile upscalers
@@ -17,13 +21,14 @@ class TileUpscaler(ABC):
 
     # supported model names, i.e. allowable values for the `--model` option in the CLI,
     # as well as the allowable values for the factor method below.
-    SUPPORTED_MODELS = ["sd2_4x"]
+    SUPPORTED_MODELS = ["sd2_4x", "lanczos", "bicubic"]
 
     def __init__(self, name: str, scale_factor: int, tile_width_spec: TileDimSpec, tile_height_spec: TileDimSpec):
         self.name = name
         self.scale_factor = scale_factor
         self.tile_width_spec = tile_width_spec
         self.tile_height_spec = tile_height_spec
+        self.tile_cache: TileCache | None = None  # optional cache of upscaled tiles, see upscale_batch(...)
 
     def is_tile_size_supported(self, tile_width: int, tile_height: int) -> bool:
         return self.tile_width_spec.is_valid(tile_width) and self.tile_height_spec.is_valid(tile_height)
@@ -54,44 +59,160 @@ class TileUpscaler(ABC):
                 self.tile_height_spec.round_down(tile_height),
             )
 
+    @property
+    def n_parallel_batches(self) -> int:
+        """
+        Number of batches this upscaler can process in parallel.  Callers should pass up to this many batches
+        worth of tiles to upscale_batch(...) at once, to make use of all parallelism.
+        """
+        return 1
+
+    def warmup(self):
+        """
+        Loads the model & any other resources needed for upscaling, which would otherwise be loaded lazily on the
+        first call to upscale(...).  Thread-safe; child classes with expensive initialization should override this.
+        """
+        pass
+
+    def warmup_in_background(self) -> threading.Thread:
+        """
+        Runs warmup() in a daemon thread, such that loading the model overlaps with e.g. decoding & splitting images.
+        Exceptions are not reported, since they will be raised again when the model is first used.
+        """
+
+        def _warmup():
+            try:
+                self.warmup()
+            except Exception:
+                pass
+
+        thread = threading.Thread(target=_warmup, name=f"{self.name}-warmup", daemon=True)
+        thread.start()
+        return thread
+
     def upscale(self, tile: Tile, prompt: str = "") -> Tile:
         """
         Upscale the given image by the scale factor, using the provided prompt as guidance.
         """
+        return self.upscale_batch([tile], prompt)[0]
+
+    def upscale_batch(self, tiles: list[Tile], prompt: str = "", batch_size: int = 1) -> list[Tile]:
+        """
+        Upscale the given tiles by the scale factor, using the provided prompt as guidance.
+
+        Tiles are passed to the underlying model in batches of at most 'batch_size' tiles.  Since models typically
+        require all images in a batch to have the same size, consecutive tiles of equal size are grouped together.
+        If a tile cache is configured, cached results are reused and only the remaining tiles are upscaled.
+        The upscaled tiles are returned in the same order as the provided tiles.
+        """
 
         # --- sanity checks -------------------------------
+        if batch_size < 1:
+            raise ValueError(f"batch_size should be >= 1, got {batch_size}.")
+        for tile in tiles:
+            self._check_tile_size(tile)
+
+        # --- look up cached results ----------------------
+        upscaled_imgs: list[Image.Image | None] = [None] * len(tiles)
+        cache_keys: list[str | None] = [None] * len(tiles)
+        if self.tile_cache is not None:
+            cache_params = {**self.inference_params(), "prompt": prompt}
+            for i, tile in enumerate(tiles):
+                cache_keys[i] = self.tile_cache.key(tile.img, cache_params)
+                upscaled_imgs[i] = self.tile_cache.get(cache_keys[i])
+
+        # --- upscale remaining tiles in batches ----------
+        todo = [i for i, img in enumerate(upscaled_imgs) if img is None]
+        batches = list(self._iter_batches(tiles, todo, batch_size))
+        batch_results = self._upscale_batches([[tiles[i].img for i in batch] for batch in batches], prompt)
+        for batch, batch_imgs in zip(batches, batch_results):
+            for i, img in zip(batch, batch_imgs):
+                upscaled_imgs[i] = img
+                if self.tile_cache is not None:
+                    self.tile_cache.put(cache_keys[i], img)
+
+        # --- return new Tile objects ---------------------
+        return [self._upscaled_tile(tile, img) for tile, img in zip(tiles, upscaled_imgs)]
+
+    def inference_params(self) -> dict[str, Any]:
+        """
+        Returns all (json-serializable) parameters, other than the tile & prompt, that influence the upscaling result.
+        Used to construct tile cache keys; child classes with extra parameters should extend this.
+        """
+        return {"name": self.name, "scale_factor": self.scale_factor}
+
+    @abstractmethod
+    def _upscale(self, image: Image.Image, prompt: str = "") -> Image.Image:
+        """
+        Upscale the given image by the scale factor, using the provided prompt as guidance.
+        """
+        raise NotImplementedError()
+
+    def _upscale_batch(self, images: list[Image.Image], prompt: str = "") -> list[Image.Image]:
+        """
+        Upscale a batch of equally-sized images by the scale factor, using the provided prompt as guidance.
+
+        Default implementation simply loops over all images; override in child classes that support batched inference.
+        """
+        return [self._upscale(image, prompt) for image in images]
+
+    def _upscale_batches(self, batches: list[list[Image.Image]], prompt: str = "") -> list[list[Image.Image]]:
+        """
+        Upscale multiple batches of equally-sized images, see _upscale_batch(...).
+
+        Default implementation processes batches one by one; override in child classes that can process
+        multiple batches in parallel.
+        """
+        return [self._upscale_batch(images, prompt) for images in batches]
+
+    # -------------------------------------------------------------------------
+    #  Internal helpers
+    # -------------------------------------------------------------------------
+    def _check_tile_size(self, tile: Tile):
         if not self.is_tile_size_supported(tile.width, tile.height):
             raise ValueError(
                 f"Tile size ({tile.width} x {tile.height}) is not supported for TileUpscaler '{self.name}'.)"
             )
 
-        # --- upscale image -------------------------------
-        upscaled_img = self._upscale(tile.img, prompt)
-
-        # --- return new Tile object ----------------------
+    def _upscaled_tile(self, tile: Tile, upscaled_img: Image.Image) -> Tile:
+        """Returns new Tile object for the upscaled image, positioned in the coordinates of the upscaled image."""
         return Tile(
             img=upscaled_img,
             left=self.scale_factor * tile.left,
             top=self.scale_factor * tile.top,
         )
 
-    @abstractmethod
-    def _upscale(self, image: Image.Image, prompt: str = "") -> Image.Image:
+    @staticmethod
+    def _iter_batches(tiles: list[Tile], indices: list[int], batch_size: int) -> Iterator[list[int]]:
         """
-        Upscale the given image by the scale factor, using the provided prompt as guidance.
+        Splits the given tile indices in consecutive batches of at most 'batch_size' indices, such that all
+        tiles in a batch have the same size.
         """
-        raise NotImplementedError()
+        batch = []
+        for i in indices:
+            batch_full = len(batch) == batch_size
+            size_changed = bool(batch) and (tiles[i].img.size != tiles[batch[0]].img.size)
+            if batch_full or size_changed:
+                yield batch
+                batch = []
+            batch.append(i)
+        if batch:
+            yield batch
 
     @classmethod
-    def from_name(cls, name: str) -> TileUpscaler:
+    def from_name(cls, name: str, **kwargs) -> TileUpscaler:
         """
-        Factory method to create a TileUpscaler instance from its name.
+        Factory method to create a TileUpscaler instance from its name; kwargs are passed to its constructor.
         """
         match name:
             case "sd2_4x":
                 from .sd2_4x import TileUpscaler_SD2_4x
 
-                return TileUpscaler_SD2_4x()
+                return TileUpscaler_SD2_4x(**kwargs)
+            case "lanczos" | "bicubic":
+                from .classical import TileUpscaler_Classical
+
+                return TileUpscaler_Classical(resampler=name, **kwargs)
             case _:
                 raise ValueError(
                     f"Unsupported tile upscaler model: {name}. Supported models are: {cls.SUPPORTED_MODELS}"
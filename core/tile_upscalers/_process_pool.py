@@ -0,0 +1,207 @@
+"""
+Tile upscaler that distributes batches over a pool of worker processes, for CPU-only hosts with many cores.
+"""
+
+from __future__ import annotations
+
+import math
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+from ._base import TileUpscaler
+
+# tile upscaler used by the current worker process; set by _init_worker
+_worker_tile_upscaler: TileUpscaler | None = None
+
+
+class TileUpscaler_ProcessPool(TileUpscaler):
+    """
+    Wraps another TileUpscaler and processes batches in parallel in 'n_workers' worker processes, each limited to
+    'threads_per_worker' (torch / OpenMP) threads.  This scales better than a single process using all cores,
+    since intra-op parallelism of a single pipeline saturates well before all cores of a large host are used.
+
+    Worker processes are forked after the wrapped upscaler is warmed up, such that all workers share the already
+    loaded model weights copy-on-write, rather than each loading their own copy.  Tile pixels and results are
+    transferred via shared memory, avoiding pickling of images.  Forking is only available on POSIX platforms.
+    """
+
+    # -------------------------------------------------------------------------
+    #  Constructor
+    # -------------------------------------------------------------------------
+    def __init__(self, tile_upscaler: TileUpscaler, n_workers: int, threads_per_worker: int | None = None):
+        """
+        :param tile_upscaler: tile upscaler to run in the worker processes.
+        :param n_workers: int >= 1, number of worker processes.
+        :param threads_per_worker: int >= 1, max. number of compute threads per worker;
+                                     if None, the available cores are divided evenly over all workers.
+        """
+        if n_workers < 1:
+            raise ValueError(f"n_workers should be >= 1, got {n_workers}.")
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("TileUpscaler_ProcessPool requires the 'fork' start method, not available here.")
+        super().__init__(
+            name=tile_upscaler.name,
+            scale_factor=tile_upscaler.scale_factor,
+            tile_width_spec=tile_upscaler.tile_width_spec,
+            tile_height_spec=tile_upscaler.tile_height_spec,
+        )
+        self.tile_upscaler = tile_upscaler
+        self.n_workers = n_workers
+        self.threads_per_worker = threads_per_worker or max((os.cpu_count() or 1) // n_workers, 1)
+
+        self._executor_lock = threading.Lock()
+        self._executor_instance: ProcessPoolExecutor | None = None
+
+    # -------------------------------------------------------------------------
+    #  Main API
+    # -------------------------------------------------------------------------
+    @property
+    def n_parallel_batches(self) -> int:
+        return self.n_workers
+
+    def inference_params(self) -> dict[str, Any]:
+        return self.tile_upscaler.inference_params()  # results don't depend on how batches are distributed
+
+    def warmup(self):
+        _ = self._executor  # warms up the wrapped upscaler & starts the workers, if not done yet
+
+    def close(self):
+        """Shuts down all worker processes; they are started again when needed."""
+        with self._executor_lock:
+            if self._executor_instance is not None:
+                self._executor_instance.shutdown()
+                self._executor_instance = None
+
+    # -------------------------------------------------------------------------
+    #  Internal methods
+    # -------------------------------------------------------------------------
+    def _upscale(self, image: Image.Image, prompt: str = "") -> Image.Image:
+        return self._upscale_batches([[image]], prompt)[0][0]
+
+    def _upscale_batch(self, images: list[Image.Image], prompt: str = "") -> list[Image.Image]:
+        return self._upscale_batches([images], prompt)[0]
+
+    def _upscale_batches(self, batches: list[list[Image.Image]], prompt: str = "") -> list[list[Image.Image]]:
+        executor = self._executor
+        scale = self.scale_factor
+
+        # --- copy inputs to shared memory & submit -------
+        shared_arrays, futures = [], []
+        try:
+            for images in batches:
+                arrays = [np.asarray(image.convert("RGB")) for image in images]
+                shm_in = _SharedArrays.create([a.shape for a in arrays])
+                shared_arrays.append(shm_in)
+                shm_out = _SharedArrays.create([(scale * a.shape[0], scale * a.shape[1], 3) for a in arrays])
+                shared_arrays.append(shm_out)
+                shm_in.write(arrays)
+                futures.append((executor.submit(_worker_upscale_batch, shm_in.spec, shm_out.spec, prompt), shm_out))
+
+            # --- collect results -------------------------
+            results = []
+            for future, shm_out in futures:
+                future.result()
+                results.append([Image.fromarray(a, mode="RGB") for a in shm_out.read()])
+            return results
+
+        finally:
+            # make sure no worker uses the shared memory anymore before releasing it
+            for future, _ in futures:
+                future.cancel()
+            wait([future for future, _ in futures])
+            for shm in shared_arrays:
+                shm.release()
+
+    @property
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor_instance is None:
+                # load the model before forking, such that its weights are shared by all workers
+                self.tile_upscaler.warmup()
+                self._executor_instance = ProcessPoolExecutor(
+                    max_workers=self.n_workers,
+                    mp_context=multiprocessing.get_context("fork"),
+                    initializer=_init_worker,
+                    initargs=(self.tile_upscaler, self.threads_per_worker),
+                )
+                # with 'fork', all workers are started on the first submit; do it now, while the model is loaded
+                self._executor_instance.submit(os.getpid).result()
+            return self._executor_instance
+
+
+# =================================================================================================
+#  Shared memory helpers
+# =================================================================================================
+class _SharedArrays:
+    """Block of shared memory holding a number of uint8 arrays of given shapes back-to-back."""
+
+    def __init__(self, shm: SharedMemory, shapes: list[tuple[int, ...]], owner: bool):
+        self.shm = shm
+        self.shapes = shapes
+        self.owner = owner  # owner is responsible for unlinking the shared memory
+
+    @classmethod
+    def create(cls, shapes: list[tuple[int, ...]]) -> _SharedArrays:
+        size = sum(math.prod(shape) for shape in shapes)
+        return cls(SharedMemory(create=True, size=max(size, 1)), shapes, owner=True)
+
+    @classmethod
+    def attach(cls, spec: tuple[str, list[tuple[int, ...]]]) -> _SharedArrays:
+        name, shapes = spec
+        return cls(SharedMemory(name=name), shapes, owner=False)
+
+    @property
+    def spec(self) -> tuple[str, list[tuple[int, ...]]]:
+        """Picklable description, to be passed to attach(...) in another process."""
+        return self.shm.name, self.shapes
+
+    def write(self, arrays: list[np.ndarray]):
+        for view, array in zip(self._views(), arrays):
+            view[...] = array
+
+    def read(self) -> list[np.ndarray]:
+        """Returns copies of all arrays."""
+        return [view.copy() for view in self._views()]
+
+    def release(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def _views(self) -> list[np.ndarray]:
+        views, offset = [], 0
+        for shape in self.shapes:
+            views.append(np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset))
+            offset += math.prod(shape)
+        return views
+
+
+# =================================================================================================
+#  Worker process functions
+# =================================================================================================
+def _init_worker(tile_upscaler: TileUpscaler, n_threads: int):
+    global _worker_tile_upscaler
+    _worker_tile_upscaler = tile_upscaler
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(n_threads)
+    if (torch := sys.modules.get("torch")) is not None:
+        torch.set_num_threads(n_threads)
+
+
+def _worker_upscale_batch(shm_in_spec: tuple, shm_out_spec: tuple, prompt: str):
+    shm_in, shm_out = _SharedArrays.attach(shm_in_spec), _SharedArrays.attach(shm_out_spec)
+    try:
+        images = [Image.fromarray(a, mode="RGB") for a in shm_in.read()]
+        upscaled = _worker_tile_upscaler._upscale_batch(images, prompt)
+        shm_out.write([np.asarray(image.convert("RGB")) for image in upscaled])
+    finally:
+        shm_in.release()
+        shm_out.release()
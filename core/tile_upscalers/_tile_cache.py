@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from PIL import Image
+
+
+class TileCache:
+    """
+    Content-addressed on-disk cache of upscaled tiles.
+
+    Entries are keyed on a hash of the tile pixels and all parameters that influence the upscaling result
+    (model, prompt, seed, inference parameters, ...), and are stored as lossless PNG files in the cache directory.
+    When the total size of all cached files exceeds the configured limit, least recently used entries are evicted.
+    Recency is tracked using file modification times, such that it is preserved across runs.
+    """
+
+    FORMAT_VERSION = 1  # bump to invalidate all existing cache entries
+
+    # -------------------------------------------------------------------------
+    #  Constructor
+    # -------------------------------------------------------------------------
+    def __init__(self, directory: str | Path, max_size_bytes: int = 10 * 1024**3):
+        """
+        :param directory: directory in which cached tiles are stored; created if it doesn't exist.
+        :param max_size_bytes: max. total size of all cached files, after which LRU entries are evicted.
+        """
+        self.directory = Path(directory)
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, int] = OrderedDict()  # key -> file size, least recently used first
+        self._total_size = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    # -------------------------------------------------------------------------
+    #  Main API
+    # -------------------------------------------------------------------------
+    @classmethod
+    def key(cls, image: Image.Image, params: dict[str, Any]) -> str:
+        """
+        Returns the cache key for upscaling the given image with the given parameters.
+        All values in 'params' should be json-serializable.
+        """
+        h = hashlib.sha256()
+        h.update(json.dumps({"format": cls.FORMAT_VERSION, "params": params}, sort_keys=True).encode())
+        h.update(json.dumps([image.mode, image.width, image.height]).encode())
+        h.update(image.tobytes())
+        return h.hexdigest()
+
+    def get(self, key: str) -> Image.Image | None:
+        """Returns the cached image for the given key, or None if it is not in the cache."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            with Image.open(path) as img:
+                img.load()
+            os.utime(path)  # mark as recently used, persistently
+        except (OSError, ValueError):
+            # file was removed or is corrupt; treat as a miss
+            with self._lock:
+                self._total_size -= self._entries.pop(key, 0)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return img
+
+    def put(self, key: str, image: Image.Image):
+        """Adds the image to the cache, evicting least recently used entries if the size limit is exceeded."""
+
+        # write to temp file & rename, such that we never leave partially written files behind
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        image.save(tmp_path, format="PNG")
+        os.replace(tmp_path, path)
+        size = path.stat().st_size
+
+        with self._lock:
+            self._total_size += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._evict()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._total_size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __str__(self) -> str:
+        return (
+            f"tile cache '{self.directory}': {self.hits} hit(s), {self.misses} miss(es), "
+            + f"{len(self)} tile(s), {self._total_size / 1024**2:.1f} MB"
+        )
+
+    # -------------------------------------------------------------------------
+    #  Internal methods
+    # -------------------------------------------------------------------------
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.png"
+
+    def _load_index(self):
+        """Builds the LRU index from the files in the cache directory, ordered by modification time."""
+        files = []
+        for path in self.directory.glob("*/*.png"):
+            stat = path.stat()
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_size += size
+        self._evict()
+
+    def _evict(self):
+        """Removes least recently used entries until we're within the size limit; lock should be held by caller."""
+        while (self._total_size > self.max_size_bytes) and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_size -= size
+            self._path(key).unlink(missing_ok=True)
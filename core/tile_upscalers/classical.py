@@ -0,0 +1,60 @@
+"""
+Tile upscaling class based on classical resampling (Lanczos or bicubic), without any model.
+Results are deterministic and available in milliseconds, which makes this useful for previewing tiling & merging,
+as well as for benchmarks & tests.
+"""
+
+from __future__ import annotations
+
+from PIL import Image
+
+from core.tiles import TileDimSpec
+
+from ._base import TileUpscaler
+
+
+class TileUpscaler_Classical(TileUpscaler):
+    """
+    Tile upscaler using classical resampling.  By default, it mimics the scale factor & tile geometry of the
+    SD2 4x upscaler, such that tiling & merging behave exactly as they would with the actual model.
+    """
+
+    SUPPORTED_RESAMPLERS = {"lanczos": Image.LANCZOS, "bicubic": Image.BICUBIC}
+
+    # -------------------------------------------------------------------------
+    #  Constructor & Main API
+    # -------------------------------------------------------------------------
+    def __init__(
+        self,
+        resampler: str = "lanczos",
+        scale_factor: int = 4,
+        tile_width_spec: TileDimSpec = TileDimSpec(16, 256, 4),
+        tile_height_spec: TileDimSpec = TileDimSpec(16, 256, 4),
+        seed: int | None = None,
+    ):
+        """
+        :param resampler: one of SUPPORTED_RESAMPLERS.
+        :param scale_factor: int >= 2, scale factor applied to each tile.
+        :param tile_width_spec: supported tile widths.
+        :param tile_height_spec: supported tile heights.
+        :param seed: ignored, since results are deterministic; accepted for compatibility with other tile upscalers.
+        """
+        if resampler not in self.SUPPORTED_RESAMPLERS:
+            raise ValueError(
+                f"Unsupported resampler: {resampler}. Supported resamplers are: {list(self.SUPPORTED_RESAMPLERS)}"
+            )
+        if scale_factor < 2:
+            raise ValueError(f"scale_factor should be >= 2, got {scale_factor}.")
+        super().__init__(
+            name=resampler,
+            scale_factor=scale_factor,
+            tile_width_spec=tile_width_spec,
+            tile_height_spec=tile_height_spec,
+        )
+        self.resampler = resampler
+
+    def _upscale(self, image: Image.Image, prompt: str = "") -> Image.Image:
+        return image.resize(
+            (self.scale_factor * image.width, self.scale_factor * image.height),
+            resample=self.SUPPORTED_RESAMPLERS[self.resampler],
+        )
@@ -4,10 +4,11 @@ Essentially, this is a wrapper class around the following Hugging Face pipeline:
     https://huggingface.co/stabilityai/stable-diffusion-x4-upscaler
 """
 
-from functools import cached_property
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Any
 
-import torch
-from diffusers import StableDiffusionUpscalePipeline
 from PIL import Image
 
 from core.tiles import TileDimSpec
@@ -15,36 +16,94 @@ from utils import tqdm_override
 
 from ._base import TileUpscaler
 
+if TYPE_CHECKING:
+    # torch & diffusers take seconds to import, so we only import them when the pipeline is actually loaded
+    import torch
+    from diffusers import StableDiffusionUpscalePipeline
+
 
 class TileUpscaler_SD2_4x(TileUpscaler):
     """
     Tile upscaler based on Stable Diffusion 2, supporting 4x upscaling.
     """
 
+    MODEL_ID = "stabilityai/stable-diffusion-x4-upscaler"
+
     # -------------------------------------------------------------------------
     #  Constructor & Main API
     # -------------------------------------------------------------------------
-    def __init__(self):
+    def __init__(
+        self,
+        seed: int | None = None,
+        num_inference_steps: int = 75,
+        guidance_scale: float = 9.0,
+        noise_level: int = 20,
+    ):
+        """
+        :param seed: if not None, each tile is upscaled with a random generator seeded with this value,
+                       making results deterministic.
+        :param num_inference_steps: number of denoising steps (pipeline default: 75).
+        :param guidance_scale: classifier-free guidance scale (pipeline default: 9.0).
+        :param noise_level: amount of noise added to the low-resolution input (pipeline default: 20).
+        """
         super().__init__(
             name="sd2_4x",
             scale_factor=4,
             tile_width_spec=TileDimSpec(16, 256, 4),
             tile_height_spec=TileDimSpec(16, 256, 4),
         )
+        self.seed = seed
+        self.num_inference_steps = num_inference_steps
+        self.guidance_scale = guidance_scale
+        self.noise_level = noise_level
+        self._pipeline: StableDiffusionUpscalePipeline | None = None
+        self._pipeline_lock = threading.Lock()
+
+    def warmup(self):
+        _ = self._sd_pipeline  # loads the pipeline, if not loaded yet
+
+    def inference_params(self) -> dict[str, Any]:
+        return {
+            **super().inference_params(),
+            "model_id": self.MODEL_ID,
+            "seed": self.seed,
+            "num_inference_steps": self.num_inference_steps,
+            "guidance_scale": self.guidance_scale,
+            "noise_level": self.noise_level,
+        }
 
     def _upscale(self, image: Image.Image, prompt: str = "") -> Image.Image:
-        return self._sd_pipeline(prompt=prompt, image=image).images[0]
+        return self._upscale_batch([image], prompt)[0]
+
+    def _upscale_batch(self, images: list[Image.Image], prompt: str = "") -> list[Image.Image]:
+        # the pipeline accepts lists of equally-sized images, which are processed as a single batch
+        return self._sd_pipeline(
+            prompt=[prompt] * len(images),
+            image=images,
+            num_inference_steps=self.num_inference_steps,
+            guidance_scale=self.guidance_scale,
+            noise_level=self.noise_level,
+            generator=self._generators(len(images)),
+        ).images
 
     # -------------------------------------------------------------------------
     #  Internal methods
     # -------------------------------------------------------------------------
-    @cached_property
+    @property
     def _sd_pipeline(self) -> StableDiffusionUpscalePipeline:
+        """Returns the Stable Diffusion Upscale Pipeline, loading it on first use; thread-safe."""
+        with self._pipeline_lock:
+            if self._pipeline is None:
+                self._pipeline = self._load_sd_pipeline()
+            return self._pipeline
+
+    def _load_sd_pipeline(self) -> StableDiffusionUpscalePipeline:
         """Construct & return the Stable Diffusion Upscale Pipeline, configured for the right GPU/CPU."""
+        import torch
+        from diffusers import StableDiffusionUpscalePipeline
 
         # instantiate the pipeline
-        model_id = "stabilityai/stable-diffusion-x4-upscaler"
-        pipeline = StableDiffusionUpscalePipeline.from_pretrained(model_id)
+        pipeline = StableDiffusionUpscalePipeline.from_pretrained(self.MODEL_ID)
 
         # configure for the right device
         if torch.cuda.is_available():
@@ -59,3 +118,14 @@ class TileUpscaler_SD2_4x(TileUpscaler):
 
         # return
         return pipeline
+
+    def _generators(self, n: int) -> list[torch.Generator] | None:
+        """
+        One random generator per image, each seeded identically, such that the result for a tile does not depend on
+        the batch it ends up in.  Generators live on the cpu, for results that are reproducible across devices.
+        """
+        if self.seed is None:
+            return None
+        import torch
+
+        return [torch.Generator(device="cpu").manual_seed(self.seed) for _ in range(n)]
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.conftest import DummyTileUpscaler
+from core.image_upscalers import ImageUpscaler_MultiTile
+from core.tile_upscalers import TileUpscaler_ProcessPool
+from core.tiles import Tile
+
+
+def _random_image(width: int, height: int) -> Image.Image:
+    return Image.fromarray(np.random.randint(0, 255, size=(height, width, 3), dtype=np.uint8), mode="RGB")
+
+
+@pytest.mark.parametrize("batch_size", [1, 3])
+def test_process_pool_upscale_batch(batch_size: int):
+    # --- arrange -----------------------------------------
+    tiles = [Tile(img=_random_image(8 + 4 * (i % 3), 12), left=10 * i, top=0) for i in range(10)]
+    tile_upscaler = DummyTileUpscaler()
+    pool = TileUpscaler_ProcessPool(DummyTileUpscaler(), n_workers=2, threads_per_worker=1)
+
+    # --- act ---------------------------------------------
+    try:
+        expected = tile_upscaler.upscale_batch(tiles, batch_size=batch_size)
+        result = pool.upscale_batch(tiles, batch_size=batch_size)
+    finally:
+        pool.close()
+
+    # --- assert ------------------------------------------
+    assert pool.tile_upscaler.pids == set()  # all work was done in the worker processes
+    assert pool.n_parallel_batches == 2
+    for expected_tile, tile in zip(expected, result):
+        assert (tile.left, tile.top) == (expected_tile.left, expected_tile.top)
+        np.testing.assert_array_equal(np.array(tile.img), np.array(expected_tile.img))
+
+
+def test_process_pool_multi_tile():
+    # --- arrange -----------------------------------------
+    pool = TileUpscaler_ProcessPool(DummyTileUpscaler(), n_workers=3)
+    pool.warmup()  # fork workers before ImageUpscaler_MultiTile starts any threads
+    img = _random_image(50, 40)
+    expected = ImageUpscaler_MultiTile(DummyTileUpscaler(), stitch_overlap_fraction=0.1).upscale(img, 4.0)
+
+    # --- act ---------------------------------------------
+    try:
+        result = ImageUpscaler_MultiTile(pool, stitch_overlap_fraction=0.1).upscale(img, 4.0)
+    finally:
+        pool.close()
+
+    # --- assert ------------------------------------------
+    np.testing.assert_array_equal(np.array(result), np.array(expected))
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from core.conftest import DummyTileUpscaler
+from core.tile_upscalers import TileCache
+from core.tiles import Tile, TileDimSpec
+
+
+def _random_img(width: int = 16, height: int = 16) -> Image.Image:
+    return Image.fromarray(np.random.randint(0, 255, size=(height, width, 3), dtype=np.uint8), mode="RGB")
+
+
+def test_tile_cache_hits_and_misses(tmp_path: Path):
+    # --- arrange -----------------------------------------
+    tile_upscaler = DummyTileUpscaler(scale_factor=2, tile_spec=TileDimSpec(2, 64, 2))
+    tile_upscaler.tile_cache = TileCache(tmp_path)
+    tiles = [Tile(_random_img(), left=16 * i, top=0) for i in range(4)]
+
+    # --- act ---------------------------------------------
+    first = tile_upscaler.upscale_batch(tiles[:3], batch_size=2)
+    second = tile_upscaler.upscale_batch(tiles, batch_size=2)
+    other_prompt = tile_upscaler.upscale(tiles[0], prompt="other prompt")
+
+    # --- assert ------------------------------------------
+    assert tile_upscaler.n_upscaled == 3 + 1 + 1
+    assert (tile_upscaler.tile_cache.hits, tile_upscaler.tile_cache.misses) == (3, 3 + 4 + 1 - 3)
+    for a, b in zip(first, second):
+        assert a.range == b.range
+        np.testing.assert_array_equal(np.array(a.img), np.array(b.img))
+    np.testing.assert_array_equal(np.array(other_prompt.img), np.array(first[0].img))
+
+
+def test_tile_cache_persistence_and_lru_eviction(tmp_path: Path):
+    # --- arrange -----------------------------------------
+    imgs = [_random_img() for _ in range(4)]
+    keys = [TileCache.key(img, {"i": i}) for i, img in enumerate(imgs)]
+    cache = TileCache(tmp_path)
+    cache.put(keys[0], imgs[0])
+    entry_size = cache.size_bytes
+
+    # --- act ---------------------------------------------
+    cache = TileCache(tmp_path, max_size_bytes=int(2.5 * entry_size))  # room for 2 entries
+    cache.put(keys[1], imgs[1])
+    assert cache.get(keys[0]) is not None  # key 0 becomes most recently used
+    cache.put(keys[2], imgs[2])  # evicts key 1
+
+    # --- assert ------------------------------------------
+    assert len(cache) == 2
+    assert cache.get(keys[1]) is None
+    np.testing.assert_array_equal(np.array(cache.get(keys[0])), np.array(imgs[0]))
+    np.testing.assert_array_equal(np.array(TileCache(tmp_path).get(keys[2])), np.array(imgs[2]))
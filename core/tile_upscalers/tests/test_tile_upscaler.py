@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.conftest import DummyTileUpscaler
+from core.tile_upscalers import TileUpscaler
+from core.tile_upscalers.classical import TileUpscaler_Classical
+from core.tiles import Tile, TileDimSpec
+
+
+def _random_tile(width: int, height: int, left: int, top: int) -> Tile:
+    return Tile(
+        img=Image.fromarray(np.random.randint(0, 255, size=(height, width, 3), dtype=np.uint8), mode="RGB"),
+        left=left,
+        top=top,
+    )
+
+
+@pytest.mark.parametrize(
+    "tile_sizes, batch_size, expected_batch_lengths",
+    [
+        ([(8, 8)] * 5, 1, [1, 1, 1, 1, 1]),
+        ([(8, 8)] * 5, 2, [2, 2, 1]),
+        ([(8, 8)] * 5, 8, [5]),
+        ([(8, 8), (8, 8), (4, 8), (8, 8)], 4, [2, 1, 1]),
+    ],
+)
+def test_upscale_batch(tile_sizes: list[tuple[int, int]], batch_size: int, expected_batch_lengths: list[int]):
+    # --- arrange -----------------------------------------
+    tile_upscaler = DummyTileUpscaler(scale_factor=2, tile_spec=TileDimSpec(2, 64, 2))
+    tiles = [_random_tile(w, h, left=10 * i, top=i) for i, (w, h) in enumerate(tile_sizes)]
+
+    # --- act ---------------------------------------------
+    upscaled_tiles = tile_upscaler.upscale_batch(tiles, batch_size=batch_size)
+
+    # --- assert ------------------------------------------
+    assert tile_upscaler.batch_lengths == expected_batch_lengths
+    assert len(upscaled_tiles) == len(tiles)
+    for tile, upscaled_tile in zip(tiles, upscaled_tiles):
+        expected = tile_upscaler.upscale(tile)
+        assert upscaled_tile.range == expected.range
+        np.testing.assert_array_equal(np.array(upscaled_tile.img), np.array(expected.img))
+
+
+@pytest.mark.parametrize("fail", [False, True])
+def test_tile_upscaler_warmup_in_background(fail: bool):
+    # --- arrange -----------------------------------------
+    class _WarmupTileUpscaler(DummyTileUpscaler):
+        def warmup(self):
+            self.warmed_up = True
+            if fail:
+                raise RuntimeError("model could not be loaded")
+
+    tile_upscaler = _WarmupTileUpscaler()
+
+    # --- act ---------------------------------------------
+    thread = tile_upscaler.warmup_in_background()
+    thread.join(timeout=10.0)
+
+    # --- assert ------------------------------------------
+    assert not thread.is_alive()
+    assert tile_upscaler.warmed_up
+
+
+@pytest.mark.parametrize("name", ["lanczos", "bicubic"])
+def test_classical_tile_upscaler(name: str):
+    # --- arrange -----------------------------------------
+    tile_upscaler = TileUpscaler.from_name(name, seed=123)
+    tile = _random_tile(32, 16, left=8, top=4)
+
+    # --- act ---------------------------------------------
+    upscaled_tile = tile_upscaler.upscale(tile)
+
+    # --- assert ------------------------------------------
+    assert (tile_upscaler.name, tile_upscaler.scale_factor) == (name, 4)
+    assert upscaled_tile.range == tile.range.scaled(4)
+    np.testing.assert_array_equal(np.array(upscaled_tile.img), np.array(tile_upscaler.upscale(tile).img))
+
+
+def test_classical_tile_upscaler_config():
+    # --- arrange -----------------------------------------
+    tile_spec = TileDimSpec(8, 64, 8)
+
+    # --- act ---------------------------------------------
+    tile_upscaler = TileUpscaler_Classical(
+        "bicubic", scale_factor=2, tile_width_spec=tile_spec, tile_height_spec=tile_spec
+    )
+
+    # --- assert ------------------------------------------
+    assert tile_upscaler.upscale(_random_tile(16, 8, left=0, top=0)).img.size == (32, 16)
+    assert not tile_upscaler.is_tile_size_supported(12, 8)
+    with pytest.raises(ValueError):
+        TileUpscaler_Classical("nearest")
+    with pytest.raises(ValueError):
+        TileUpscaler_Classical("bicubic", scale_factor=1)
+    with pytest.raises(ValueError):
+        TileUpscaler.from_name("unknown")
@@ -1,3 +1,4 @@
+from .canvas import Canvas
 from .merging import TileMerger
 from .splitting import TileSplitter
 from .tile import Tile
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import math
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+STRIP_PIXELS = 16 * 1024**2  # max. number of pixels processed at once by strip-wise operations
+
+
+class Canvas:
+    """
+    RGB image backed by a numpy array, which is either held in memory or memory-mapped to a (temporary) file in
+    a given directory.  The latter allows working with images far larger than the available RAM, as long as
+    they're only accessed region by region, e.g. using crop(...), paste(...), resize(...) and save(...).
+
+    Canvas mimics the parts of the PIL Image API used for splitting & merging tiles, such that it can be used in
+    place of an Image there.
+
+    Memory-mapped files are deleted immediately after creation (POSIX only), such that they never outlive the
+    canvas, not even if the process is killed.
+    """
+
+    # -------------------------------------------------------------------------
+    #  Constructors
+    # -------------------------------------------------------------------------
+    def __init__(self, width: int, height: int, directory: str | Path | None = None):
+        """
+        :param width: width of the canvas in pixels.
+        :param height: height of the canvas in pixels.
+        :param directory: if None, the canvas is held in memory; otherwise, it is memory-mapped to a file in
+                            this directory.
+        """
+        self.directory = directory
+        self.pixels = empty_array((height, width, 3), np.uint8, directory)  # (height, width, 3) RGB array
+
+    @classmethod
+    def from_image(cls, image: Image.Image, directory: str | Path | None = None) -> Canvas:
+        canvas = cls(image.width, image.height, directory)
+        canvas.paste(image, box=(0, 0))
+        return canvas
+
+    # -------------------------------------------------------------------------
+    #  Properties
+    # -------------------------------------------------------------------------
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.width, self.height
+
+    @property
+    def is_out_of_core(self) -> bool:
+        return self.directory is not None
+
+    # -------------------------------------------------------------------------
+    #  Image-like API
+    # -------------------------------------------------------------------------
+    def crop(self, box: tuple[int, int, int, int]) -> Image.Image:
+        """
+        Returns the region (left, top, right, bottom) of the canvas as a new image; right & bottom exclusive.
+        As with PIL, parts of the region outside of the canvas are black.
+        """
+        left, top, right, bottom = box
+        if (left >= 0) and (top >= 0) and (right <= self.width) and (bottom <= self.height):
+            return Image.fromarray(np.array(self.pixels[top:bottom, left:right]), mode="RGB")
+
+        pixels = np.zeros((bottom - top, right - left, 3), dtype=np.uint8)
+        l, t = max(left, 0), max(top, 0)
+        r, b = min(right, self.width), min(bottom, self.height)
+        if (l < r) and (t < b):
+            pixels[t - top : b - top, l - left : r - left] = self.pixels[t:b, l:r]
+        return Image.fromarray(pixels, mode="RGB")
+
+    def paste(self, image: Image.Image | np.ndarray, box: tuple[int, int], mask: np.ndarray | None = None):
+        """
+        Pastes the image (or (height, width, 3) RGB array) with its top-left corner at 'box' = (left, top).
+        If a mask with the same size as the image is provided, only pixels where mask > 0 are pasted.
+        """
+        left, top = box
+        pixels = image if isinstance(image, np.ndarray) else np.asarray(image.convert("RGB"))
+        region = self.pixels[top : top + pixels.shape[0], left : left + pixels.shape[1]]
+        if mask is None:
+            region[...] = pixels
+        else:
+            selected = np.asarray(mask) > 0
+            region[selected] = pixels[selected]
+
+    def resize(self, size: tuple[int, int], resample: int = Image.LANCZOS) -> Canvas:
+        """
+        Returns a resized copy of the canvas, backed in the same way as this canvas.
+
+        Resizing is done in 2 separable passes (horizontal on strips of rows, vertical on strips of columns), just
+        like PIL does internally, such that results are identical to resizing the image as a whole.
+        """
+        width, height = size
+
+        # horizontal pass
+        tmp = Canvas(width, self.height, self.directory)
+        n_rows = max(STRIP_PIXELS // max(self.width, width), 1)
+        for top in range(0, self.height, n_rows):
+            strip = self.crop((0, top, self.width, min(top + n_rows, self.height)))
+            tmp.paste(strip.resize((width, strip.height), resample=resample), box=(0, top))
+
+        # vertical pass
+        result = Canvas(width, height, self.directory)
+        n_cols = max(STRIP_PIXELS // max(self.height, height), 1)
+        for left in range(0, width, n_cols):
+            strip = tmp.crop((left, 0, min(left + n_cols, width), tmp.height))
+            result.paste(strip.resize((strip.width, height), resample=resample), box=(left, 0))
+
+        return result
+
+    def save(self, path: str | Path, **kwargs):
+        """
+        Saves the canvas to a file.  Out-of-core canvases are written to PNG files strip by strip, without ever
+        holding the full image in memory; in all other cases, the image is saved using PIL.
+        """
+        if self.is_out_of_core and Path(path).suffix.lower() == ".png":
+            self._save_png_streaming(path)
+        else:
+            self.to_image().save(path, **kwargs)
+
+    def to_image(self) -> Image.Image:
+        """Returns the full canvas as a PIL image, i.e. in memory."""
+        return Image.fromarray(np.array(self.pixels), mode="RGB")
+
+    # -------------------------------------------------------------------------
+    #  Internal methods
+    # -------------------------------------------------------------------------
+    def _save_png_streaming(self, path: str | Path):
+        """Writes an 8-bit RGB PNG file, using the 'up' filter for each row, compressing strips of rows at a time."""
+
+        def chunk(chunk_type: bytes, data: bytes) -> bytes:
+            return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+        with open(path, "wb") as f:
+            f.write(b"\x89PNG\r\n\x1a\n")
+            f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)))
+
+            compressor = zlib.compressobj(level=6)
+            prev_row = np.zeros((1, self.width * 3), dtype=np.uint8)
+            n_rows = max(STRIP_PIXELS // self.width, 1)
+            for top in range(0, self.height, n_rows):
+                rows = self.pixels[top : top + n_rows].reshape(-1, self.width * 3)
+                filtered = rows - np.concatenate([prev_row, rows[:-1]])  # 'up' filter, uint8 wraps around mod 256
+                prev_row = rows[-1:].copy()
+                scanlines = np.hstack([np.full((len(rows), 1), 2, dtype=np.uint8), filtered])  # 2 = 'up' filter
+                if data := compressor.compress(scanlines.tobytes()):
+                    f.write(chunk(b"IDAT", data))
+            f.write(chunk(b"IDAT", compressor.flush()))
+            f.write(chunk(b"IEND", b""))
+
+
+def empty_array(shape: tuple[int, ...], dtype: type, directory: str | Path | None = None) -> np.ndarray:
+    """
+    Returns a zero-initialized array, which is held in memory if directory is None, or memory-mapped to an
+    (already deleted) temporary file in the given directory otherwise.
+    """
+    if directory is None:
+        return np.zeros(shape, dtype=dtype)
+
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, prefix="canvas_", suffix=".raw") as f:
+        f.truncate(max(math.prod(shape) * np.dtype(dtype).itemsize, 1))  # sparse file, reads as zeros
+        return np.memmap(f.name, dtype=dtype, mode="r+", shape=shape)  # mapping stays valid after file deletion
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 import numpy as np
 from PIL import Image
 
+from core.tiles.canvas import Canvas
 from core.tiles.tile_range import TileRange
 
 
@@ -16,13 +17,18 @@ class TileMergeSolution:
     # -------------------------------------------------------------------------
     #  Primary fields
     # -------------------------------------------------------------------------
-    img: Image.Image  # merged image
+    canvas: Canvas  # merged image; can be out-of-core
     tile_ranges: list[TileRange]  # list of tile ranges of source tiles
-    pixel_sources: np.ndarray  # (n_rows, n_cols) uint16 array with pixel source indices
+    pixel_sources: np.ndarray  # (n_rows, n_cols) uint16 array with pixel source indices; can be memory-mapped
 
     # -------------------------------------------------------------------------
     #  Properties & helpers
     # -------------------------------------------------------------------------
+    @property
+    def img(self) -> Image.Image:
+        """Merged image as a PIL image, i.e. fully loaded in memory."""
+        return self.canvas.to_image()
+
     def n_tiles(self) -> int:
         return len(self.tile_ranges)
 
@@ -32,7 +38,8 @@ class TileMergeSolution:
         """
         c1 = math.floor(255 / self.n_tiles())
         c0 = c1 // 2
-        return Image.fromarray((c1 * self.pixel_sources + c0).astype(np.uint8), mode="L")
+        gray_levels = (c1 * np.arange(self.n_tiles()) + c0).astype(np.uint8)  # lookup table: tile index -> gray level
+        return Image.fromarray(gray_levels[self.pixel_sources], mode="L")
 
     def img_overlayed(
         self,
@@ -44,35 +51,27 @@ class TileMergeSolution:
         """
 
         # --- initialize ----------------------------------
-        img = self.img.copy()
+        pixels = np.array(self.canvas.pixels)
+        height, width = pixels.shape[:2]
 
         # --- draw tile ranges ----------------------------
         if tile_range_clr is not None:
-            for i in range(img.height):
-                for j in range(img.width):
-                    if (i + j) % 2 == 0:
-                        # check if this pixel is on any tile range border
-                        draw = False
-                        for tr in self.tile_ranges:
-                            if (i == tr.top) or (i == tr.bottom) or (j == tr.left) or (j == tr.right):
-                                draw = True
-
-                        # draw pixel
-                        if draw:
-                            img.putpixel((j, i), tile_range_clr)
+            # dotted lines across the whole image at every row / column that is a border of any tile range
+            border_rows = np.zeros(height, dtype=bool)
+            border_cols = np.zeros(width, dtype=bool)
+            for tr in self.tile_ranges:
+                border_rows[[r for r in (tr.top, tr.bottom) if 0 <= r < height]] = True
+                border_cols[[c for c in (tr.left, tr.right) if 0 <= c < width]] = True
+            dotted = (np.arange(height)[:, None] + np.arange(width)[None, :]) % 2 == 0
+            pixels[(border_rows[:, None] | border_cols[None, :]) & dotted] = tile_range_clr
 
         # --- draw seams ----------------------------------
         if seam_clr is not None:
-            for i in range(img.height):
-                for j in range(img.width):
-                    # check if we're on a seam
-                    if i < img.height - 1:
-                        if self.pixel_sources[i, j] != self.pixel_sources[i + 1, j]:
-                            img.putpixel((j, i), seam_clr)
-
-                    if j < img.width - 1:
-                        if self.pixel_sources[i, j] != self.pixel_sources[i, j + 1]:
-                            img.putpixel((j, i), seam_clr)
+            # pixels whose source differs from the pixel below or to the right
+            on_seam = np.zeros((height, width), dtype=bool)
+            on_seam[:-1, :] |= self.pixel_sources[:-1, :] != self.pixel_sources[1:, :]
+            on_seam[:, :-1] |= self.pixel_sources[:, :-1] != self.pixel_sources[:, 1:]
+            pixels[on_seam] = seam_clr
 
         # --- and we're done ------------------------------
-        return img
+        return Image.fromarray(pixels, mode="RGB")
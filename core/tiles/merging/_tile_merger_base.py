@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterable
 
 import numpy as np
-from PIL import Image
 
+from core.tiles.canvas import Canvas, empty_array
 from core.tiles.tile import Tile
+from core.tiles.tile_range import TileRange
 
 from ._tile_merge_solution import TileMergeSolution
 
@@ -13,44 +16,147 @@ from ._tile_merge_solution import TileMergeSolution
 class TileMerger(ABC):
     """
     Class that merges tiles back into a single image.
+
+    Merging is incremental: begin(...) announces the canvas size and the ranges of all tiles that will be merged,
+    after which tiles are add(...)-ed one by one, in any order, and finish() returns the merged result.
+    Implementations commit a tile's pixels to the canvas as soon as they can & release the tile afterwards, such that
+    memory usage is determined by the number of tiles 'in flight' rather than by the total number of tiles.
     """
 
-    @abstractmethod
+    SUPPORTED_MODES = ["paste", "stitch", "blend"]
+
+    def __init__(self, canvas_dir: str | Path | None = None):
+        """
+        :param canvas_dir: if provided, the merged image & pixel sources are memory-mapped to temporary files in
+                             this directory, rather than held in memory; see Canvas.
+        """
+        self.canvas_dir = canvas_dir
+        self._sol: TileMergeSolution | None = None
+        self._remaining: dict[TileRange, int] = dict()  # tile range -> tile index, for tiles not added yet
+
+    # -------------------------------------------------------------------------
+    #  Main API
+    # -------------------------------------------------------------------------
     def merge(self, tiles: list[Tile]) -> TileMergeSolution:
-        raise NotImplementedError()
+        return self.merge_iter(tiles, tile_ranges=[tile.range for tile in tiles])
 
-    @staticmethod
-    def _init_solution(tiles: list[Tile]) -> TileMergeSolution:
+    def merge_iter(self, tiles: Iterable[Tile], tile_ranges: list[TileRange]) -> TileMergeSolution:
         """
-        Initializes empty image / array and returns as TileMergeSolution.
+        Merges tiles that are provided one by one, e.g. as they are produced by an upstream process.
+
+        Tiles are consumed as they become available, such that per-tile merge work can overlap with the production
+        of the next tiles.  Results are identical to calling merge(...) with the same tiles in the same order.
+
+        :param tiles: iterable of tiles, in the order they should be merged.
+        :param tile_ranges: ranges of all tiles that will be provided, in the same order.
+        """
+        self.begin(self.canvas_size(tile_ranges), tile_ranges)
+        for tile in tiles:
+            self.add(tile)
+        return self.finish()
+
+    def begin(self, canvas_size: tuple[int, int], tile_ranges: list[TileRange]):
         """
-        img = Image.new(
-            mode="RGB",
-            size=(
-                max(tile.right for tile in tiles) + 1,
-                max(tile.bottom for tile in tiles) + 1,
-            ),
+        Starts merging tiles with the given ranges into a canvas of the given (width, height).  Pixel sources of
+        the solution refer to tiles by their index in 'tile_ranges'.
+        """
+        width, height = canvas_size
+        self._sol = TileMergeSolution(
+            canvas=Canvas(width, height, self.canvas_dir),
+            tile_ranges=list(tile_ranges),
+            pixel_sources=empty_array((height, width), np.uint16, self.canvas_dir),
         )
-        pixel_sources = np.zeros((img.height, img.width), dtype=np.uint16)
-        tile_ranges = [tile.range for tile in tiles]
+        self._remaining = {tile_range: i for i, tile_range in enumerate(tile_ranges)}
+        self._begin()
+
+    def add(self, tile: Tile):
+        """Adds a tile, whose range should be one of the ranges passed to begin(...) and not added before."""
+        if self._sol is None:
+            raise RuntimeError("begin(...) should be called before adding tiles.")
+        if (i := self._remaining.pop(tile.range, None)) is None:
+            raise ValueError(f"Unexpected tile {tile}; tile ranges should be announced in begin(...) & added once.")
+        self._add(i, tile)
 
-        return TileMergeSolution(
-            img=img,
-            tile_ranges=tile_ranges,
-            pixel_sources=pixel_sources,
+    def finish(self) -> TileMergeSolution:
+        """Returns the merged result, after all tiles announced in begin(...) were added."""
+        if self._remaining:
+            raise ValueError(f"Cannot finish merging; {len(self._remaining)} tile(s) were not added yet.")
+        self._finish()
+        sol, self._sol = self._sol, None
+        return sol
+
+    @staticmethod
+    def canvas_size(tile_ranges: list[TileRange]) -> tuple[int, int]:
+        """Smallest (width, height) of a canvas containing all given tile ranges."""
+        return (
+            max(tile_range.right for tile_range in tile_ranges) + 1,
+            max(tile_range.bottom for tile_range in tile_ranges) + 1,
         )
 
+    @staticmethod
+    def _find_neighbors(tile_ranges: list[TileRange]) -> list[set[int]]:
+        """For each tile range, the set of indices of all other tile ranges it overlaps with."""
+        lefts, tops, rights, bottoms = (
+            np.array([getattr(tr, attr) for tr in tile_ranges]) for attr in ("left", "top", "right", "bottom")
+        )
+        neighbors = []
+        for i, tr in enumerate(tile_ranges):
+            overlaps = (lefts <= tr.right) & (rights >= tr.left) & (tops <= tr.bottom) & (bottoms >= tr.top)
+            overlaps[i] = False
+            neighbors.append(set(np.flatnonzero(overlaps).tolist()))
+        return neighbors
+
+    # -------------------------------------------------------------------------
+    #  To be implemented by child classes
+    # -------------------------------------------------------------------------
+    def _begin(self):
+        """Resets any per-merge state; self._sol is already initialized."""
+        pass
+
+    @abstractmethod
+    def _add(self, i: int, tile: Tile):
+        """Processes the tile with index i, committing its pixels to self._sol as soon as possible."""
+        raise NotImplementedError()
+
+    def _finish(self):
+        """Releases any per-merge resources; called once all tiles were added."""
+        pass
+
     # -------------------------------------------------------------------------
     #  Factory methods
     # -------------------------------------------------------------------------
     @classmethod
-    def paste(cls) -> TileMerger:
+    def paste(cls, canvas_dir: str | Path | None = None) -> TileMerger:
         from .paste_merger import PasteMerger
 
-        return PasteMerger()
+        return PasteMerger(canvas_dir)
 
     @classmethod
-    def stitch(cls) -> TileMerger:
+    def stitch(
+        cls, canvas_dir: str | Path | None = None, n_threads: int | None = None, seam_scale: int = 1
+    ) -> TileMerger:
         from .stitch_merger import StitchMerger
 
-        return StitchMerger()
+        return StitchMerger(canvas_dir, n_threads, seam_scale)
+
+    @classmethod
+    def blend(cls, canvas_dir: str | Path | None = None) -> TileMerger:
+        from .blend_merger import BlendMerger
+
+        return BlendMerger(canvas_dir)
+
+    @classmethod
+    def from_mode(cls, mode: str, canvas_dir: str | Path | None = None, **kwargs) -> TileMerger:
+        """
+        Factory method to create a TileMerger instance from its mode; kwargs are passed to the factory method of
+        that mode.
+        """
+        match mode:
+            case "paste":
+                return cls.paste(canvas_dir, **kwargs)
+            case "stitch":
+                return cls.stitch(canvas_dir, **kwargs)
+            case "blend":
+                return cls.blend(canvas_dir, **kwargs)
+            case _:
+                raise ValueError(f"Unsupported merge mode: {mode}. Supported modes are: {cls.SUPPORTED_MODES}")
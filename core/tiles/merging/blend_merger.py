@@ -0,0 +1,85 @@
+import numpy as np
+
+from core.tiles.canvas import empty_array
+from core.tiles.tile import Tile
+from core.tiles.tile_range import TileRange
+
+from ._tile_merger_base import TileMerger
+
+
+class BlendMerger(TileMerger):
+    """
+    Class that merges tiles back into a single image by blending overlapping tiles using feather weights, i.e. each
+    pixel is a weighted average of all tiles covering it, with weights proportional to the distance to the nearest
+    tile edge that is not a canvas edge.  This is O(pixels) and needs no seam optimization, hiding seams using smooth
+    transitions instead, such that little overlap is needed.
+
+    Weighted sums are accumulated as tiles are added, after which tiles are no longer referenced.  The pixels of a
+    tile are normalized & written to the canvas as soon as all its neighbors were added.  Pixel sources refer to the
+    tile with the highest weight for each pixel.
+    """
+
+    # -------------------------------------------------------------------------
+    #  Merging
+    # -------------------------------------------------------------------------
+    def _begin(self):
+        width, height = self._sol.canvas.size
+        self._neighbors = self._find_neighbors(self._sol.tile_ranges)
+        self._added: set[int] = set()
+        self._weighted_sum = empty_array((height, width, 3), np.float32, self.canvas_dir)
+        self._weight_sum = empty_array((height, width), np.float32, self.canvas_dir)
+        self._max_weight = empty_array((height, width), np.float32, self.canvas_dir)
+
+    def _add(self, i: int, tile: Tile):
+        # --- accumulate ----------------------------------
+        rows, cols = slice(tile.top, tile.bottom + 1), slice(tile.left, tile.right + 1)
+        weights = self.feather_weights(tile.range, self._sol.canvas.size)
+        self._weighted_sum[rows, cols] += tile.pixels * weights[:, :, None]
+        self._weight_sum[rows, cols] += weights
+
+        # --- pixel sources -------------------------------
+        dominant = weights > self._max_weight[rows, cols]
+        self._max_weight[rows, cols][dominant] = weights[dominant]
+        self._sol.pixel_sources[rows, cols][dominant] = i
+
+        # --- commit tiles of which all neighbors are known
+        self._added.add(i)
+        for j in sorted(({i} | self._neighbors[i]) & self._added):
+            if self._neighbors[j] <= self._added:
+                self._commit(j)
+
+    def _finish(self):
+        self._weighted_sum = self._weight_sum = self._max_weight = None
+
+    def _commit(self, i: int):
+        """Writes the final, normalized pixels of the region of tile i to the canvas."""
+        tr = self._sol.tile_ranges[i]
+        rows, cols = slice(tr.top, tr.bottom + 1), slice(tr.left, tr.right + 1)
+        blended = self._weighted_sum[rows, cols] / self._weight_sum[rows, cols][:, :, None]
+        self._sol.canvas.paste(np.clip(np.rint(blended), 0, 255).astype(np.uint8), box=(tr.left, tr.top))
+
+    # -------------------------------------------------------------------------
+    #  Weights
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def feather_weights(tile_range: TileRange, canvas_size: tuple[int, int]) -> np.ndarray:
+        """
+        (height, width) float32 array of weights >= 1 for the given tile range, equal to 1 + the distance to the
+        nearest tile edge, ignoring edges that coincide with canvas edges (no other tiles can overlap there).
+        """
+        canvas_width, canvas_height = canvas_size
+
+        def weights_1d(start: int, size: int, canvas_end: int) -> np.ndarray:
+            x = np.arange(size, dtype=np.float32)
+            w = np.full(size, np.inf, dtype=np.float32)
+            if start > 0:
+                w = np.minimum(w, x + 1)
+            if start + size < canvas_end:
+                w = np.minimum(w, size - x)
+            return w
+
+        weights = np.minimum.outer(
+            weights_1d(tile_range.top, tile_range.height, canvas_height),
+            weights_1d(tile_range.left, tile_range.width, canvas_width),
+        )
+        return np.where(np.isinf(weights), 1.0, weights).astype(np.float32)
@@ -1,53 +1,247 @@
+import math
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
 import cv2
 import numpy as np
 from cv2.detail import DpSeamFinder, GraphCutSeamFinder
-from PIL import Image
 
 from core.tiles.tile import Tile
+from core.tiles.tile_range import TileRange
+from utils.tracing import span
 
-from ._tile_merge_solution import TileMergeSolution
 from ._tile_merger_base import TileMerger
 
+SEAM_MARGIN = 8  # nr of pixels outside the overlap region provided to the seam finder, on the side of each tile
+REFINE_BAND = 2  # half-width of the band in which coarse seams are refined, in coarse pixels
+
 
 class StitchMerger(TileMerger):
     """
     Class that merges tiles back into a single image using seam-optimized stitching using opencv.
+
+    Seams are optimized independently for each pair of overlapping tiles, in a thread pool, as soon as both tiles
+    are added.  Each seam problem is restricted to the overlap region of the pair (plus a small margin), such that
+    its cost does not depend on the tile size.  The pairwise results are assembled into per-tile masks as follows:
+    a pixel covered by tiles t_1 < ... < t_k (tile indices) belongs to the first tile that wins the seams against
+    all later tiles covering that pixel.  The last tile always qualifies, so this never leaves holes, and the result
+    does not depend on the order in which tiles are added.
+
+    Since each seam only sees its own pair of tiles, seams are not identical to those of a single DpSeamFinder run
+    over all tiles at once (as used previously); on tiles with inconsistent colors, the mean seam cost is typically
+    within a few percent of it.
+
+    Once all neighbors of a tile were added & the seams involving its pixels are known, it is pasted into the canvas
+    and released.
+
+    With seam_scale > 1, seams are first optimized on overlap regions downsampled by that factor (typically the
+    upscale factor, i.e. at the resolution of the source image), after which they are refined at full resolution in
+    a narrow band around the coarse seam only.  This is much cheaper for large overlaps, at a small cost in quality.
     """
 
-    def merge(self, tiles: list[Tile]) -> TileMergeSolution:
+    def __init__(self, canvas_dir: str | Path | None = None, n_threads: int | None = None, seam_scale: int = 1):
         """
-        Merges the given tiles into a single image using stitching with seam optimization.
+        :param canvas_dir: see TileMerger.
+        :param n_threads: number of threads used for seam optimization; defaults to the number of cpu cores.
+        :param seam_scale: int >= 1, downsampling factor for coarse seam optimization; 1 = full resolution only.
         """
+        if seam_scale < 1:
+            raise ValueError(f"seam_scale should be >= 1, got {seam_scale}.")
+        super().__init__(canvas_dir)
+        self._n_threads = n_threads or os.cpu_count() or 1
+        self._seam_scale = seam_scale
 
-        # --- init ----------------------------------------
-        cv_images = [cv2.cvtColor(np.array(tile.img), cv2.COLOR_RGB2BGR) for tile in tiles]  # openCV assumes BGR format
-        corners = [(tile.left, tile.top) for tile in tiles]
-        masks = [np.full((tile.height, tile.width), 255, dtype=np.uint8) for tile in tiles]
+    # -------------------------------------------------------------------------
+    #  Merging
+    # -------------------------------------------------------------------------
+    def _begin(self):
+        self._neighbors = self._find_neighbors(self._sol.tile_ranges)
+        self._tiles: dict[int, Tile] = dict()  # added, but not yet committed tiles
+        self._seams: dict[tuple[int, int], Future] = dict()  # (i0, i1) -> future of seam_winners(...) with i0 < i1
+        self._added: set[int] = set()
+        self._committed: set[int] = set()
+        self._executor = ThreadPoolExecutor(max_workers=self._n_threads, thread_name_prefix="stitch-seams")
 
-        # --- seam optimization ---------------------------
-        seam_finder = DpSeamFinder(costFunc="COLOR_GRAD")
-        updated_masks = seam_finder.find(cv_images, corners, masks)
+    def _add(self, i: int, tile: Tile):
+        # --- start seam optimization with added neighbors
+        self._tiles[i] = tile
+        self._added.add(i)
+        for j in sorted(self._neighbors[i] & self._added):
+            i0, i1 = min(i, j), max(i, j)
+            self._seams[(i0, i1)] = self._executor.submit(
+                self.seam_winners, self._tiles[i0], self._tiles[i1], self._seam_scale
+            )
 
-        # --- merge using optimized masks -----------------
+        # --- commit tiles of which all neighbors are known
+        for j in sorted(({i} | self._neighbors[i]) & self._added):
+            if self._neighbors[j] <= self._added:
+                self._commit(j)
 
-        # init
-        sol = self._init_solution(tiles)
+    def _finish(self):
+        self._executor.shutdown()
 
-        # paste all tiles into the image
-        for i, (tile, mask) in enumerate(zip(tiles, updated_masks)):
-            # paste image with mask
-            np_mask = np.array(mask.get())
-            sol.img.paste(
-                tile.img,
-                box=(tile.left, tile.top),
-                mask=Image.fromarray(np_mask),
-            )
+    def _commit(self, i: int):
+        """Pastes tile i into the canvas, using its mask as determined by all relevant seams, and releases it."""
+
+        # --- determine mask ------------------------------
+        tile = self._tiles.pop(i)
+        tr = self._sol.tile_ranges[i]
+        candidates = sorted({i} | self._neighbors[i])  # all tiles that can cover pixels of tile i
+
+        claimed = np.zeros((tr.height, tr.width), dtype=bool)  # pixels claimed by tiles before tile i
+        for u in candidates:
+            # pixels of tile i covered by tile u, where tile u wins against all later tiles covering that pixel
+            wins = self._coverage(u, tr)
+            for v in candidates:
+                if (v > u) and (v in self._neighbors[u]):
+                    if (overlap := self._intersection(self._overlap(u, v), tr)) is not None:
+                        uv_winners = self._seams[(u, v)].result()  # over overlap region of u & v
+                        uv_overlap = self._overlap(u, v)
+                        wins[self._slices(overlap, tr)] &= uv_winners[self._slices(overlap, uv_overlap)]
+            if u == i:
+                mask = wins & ~claimed
+                break
+            claimed |= wins
+
+        # --- paste ---------------------------------------
+        self._sol.canvas.paste(tile.pixels, box=(tile.left, tile.top), mask=mask)
+        self._sol.pixel_sources[tr.top : tr.bottom + 1, tr.left : tr.right + 1][mask] = i
+
+        # --- release seams that are no longer needed -----
+        self._committed.add(i)
+        for u, v in [(u, v) for (u, v) in self._seams if (u == i) or (v == i) or (u in self._neighbors[i])]:
+            # seam (u, v) is needed by all tiles overlapping with their overlap region; these are all neighbors of u
+            uv_overlap = self._overlap(u, v)
+            dependents = [
+                w for w in self._neighbors[u] | {u} if self._intersection(uv_overlap, self._sol.tile_ranges[w])
+            ]
+            if all(w in self._committed for w in dependents):
+                del self._seams[(u, v)]
+
+    # -------------------------------------------------------------------------
+    #  Seam optimization
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def seam_winners(tile_0: Tile, tile_1: Tile, seam_scale: int = 1) -> np.ndarray:
+        """
+        Optimizes the seam between 2 overlapping tiles and returns a boolean array over their overlap region,
+        which is True for pixels that belong to tile_0.  See class docstring for the meaning of seam_scale.
+        """
+        overlap = StitchMerger._intersection(tile_0.range, tile_1.range)
+        with span("seam_finding", overlap_size=[overlap.width, overlap.height], seam_scale=seam_scale):
+            return StitchMerger._seam_winners(tile_0, tile_1, overlap, seam_scale)
+
+    @staticmethod
+    def _seam_winners(tile_0: Tile, tile_1: Tile, overlap: TileRange, seam_scale: int) -> np.ndarray:
+        """Implementation of seam_winners(...), for the given overlap region of both tiles."""
+
+        # --- crop overlap region + margin from each tile -
+        cv_images, crops = [], []
+        for tile in (tile_0, tile_1):
+            left, top = max(overlap.left - SEAM_MARGIN, tile.left), max(overlap.top - SEAM_MARGIN, tile.top)
+            right, bottom = min(overlap.right + SEAM_MARGIN, tile.right), min(overlap.bottom + SEAM_MARGIN, tile.bottom)
+            pixels = tile.pixels[top - tile.top : bottom - tile.top + 1, left - tile.left : right - tile.left + 1]
+            cv_images.append(cv2.cvtColor(np.ascontiguousarray(pixels), cv2.COLOR_RGB2BGR))  # openCV assumes BGR
+            crops.append(TileRange(left=left, top=top, width=right - left + 1, height=bottom - top + 1))
+
+        # --- optimize seam -------------------------------
+        if (seam_scale > 1) and (min(overlap.width, overlap.height) >= 2 * REFINE_BAND * seam_scale):
+            coarse_winners = StitchMerger._coarse_seam_winners(cv_images, crops, overlap, seam_scale)
+            masks = StitchMerger._refinement_masks(coarse_winners, crops, overlap, band=REFINE_BAND * seam_scale)
+        else:
+            masks = [np.full(cv_image.shape[:2], 255, dtype=np.uint8) for cv_image in cv_images]
+        mask_0, _ = DpSeamFinder(costFunc="COLOR_GRAD").find(cv_images, [(c.left, c.top) for c in crops], masks)
+
+        # --- extract result for overlap region -----------
+        return mask_0.get()[StitchMerger._slices(overlap, crops[0])] > 0
+
+    @staticmethod
+    def _coarse_seam_winners(
+        cv_images: list[np.ndarray], crops: list[TileRange], overlap: TileRange, seam_scale: int
+    ) -> np.ndarray:
+        """Same as seam_winners(...), but optimized on the given crops downsampled by seam_scale."""
+
+        # --- downsample ----------------------------------
+        # coarse pixel (x, y) covers full-resolution pixels (x0 + s*x, y0 + s*y) ... (x0 + s*x + s-1, y0 + s*y + s-1)
+        x0, y0 = min(c.left for c in crops), min(c.top for c in crops)
+        coarse_images, coarse_corners = [], []
+        for cv_image, crop in zip(cv_images, crops):
+            size = (math.ceil(crop.width / seam_scale), math.ceil(crop.height / seam_scale))
+            coarse_images.append(cv2.resize(cv_image, size, interpolation=cv2.INTER_AREA))
+            coarse_corners.append(((crop.left - x0) // seam_scale, (crop.top - y0) // seam_scale))
+
+        # --- optimize coarse seam ------------------------
+        masks = [np.full(coarse_image.shape[:2], 255, dtype=np.uint8) for coarse_image in coarse_images]
+        coarse_mask_0, _ = DpSeamFinder(costFunc="COLOR_GRAD").find(coarse_images, coarse_corners, masks)
+        coarse_mask_0 = coarse_mask_0.get()
+
+        # --- upsample to overlap region ------------------
+        rows = (np.arange(overlap.top, overlap.bottom + 1) - y0) // seam_scale - coarse_corners[0][1]
+        cols = (np.arange(overlap.left, overlap.right + 1) - x0) // seam_scale - coarse_corners[0][0]
+        rows, cols = np.clip(rows, 0, coarse_mask_0.shape[0] - 1), np.clip(cols, 0, coarse_mask_0.shape[1] - 1)
+        return coarse_mask_0[rows[:, None], cols[None, :]] > 0
+
+    @staticmethod
+    def _refinement_masks(
+        coarse_winners: np.ndarray, crops: list[TileRange], overlap: TileRange, band: int
+    ) -> list[np.ndarray]:
+        """
+        Masks for both crops, such that they only overlap in a band of +/- 'band' pixels around the coarse seam,
+        with overlap pixels outside of that band assigned according to the coarse seam.
+        """
+        # --- owners of all pixels of both crops: 0 = tile_0, 1 = tile_1, 2 = none
+        union = TileRange(
+            left=min(c.left for c in crops),
+            top=min(c.top for c in crops),
+            width=max(c.right for c in crops) - min(c.left for c in crops) + 1,
+            height=max(c.bottom for c in crops) - min(c.top for c in crops) + 1,
+        )
+        owners = np.full((union.height, union.width), 2, dtype=np.uint8)
+        for k, crop in enumerate(crops):
+            owners[StitchMerger._slices(crop, union)] = k
+        owners[StitchMerger._slices(overlap, union)] = np.where(coarse_winners, 0, 1)
+
+        # --- band around the seam, including seams at the border of the overlap region
+        kernel = np.ones((3, 3), dtype=np.uint8)
+        boundary = (cv2.dilate((owners == 0).astype(np.uint8), kernel) > 0) & (
+            cv2.dilate((owners == 1).astype(np.uint8), kernel) > 0
+        )
+        band_kernel = np.ones((2 * band + 1, 2 * band + 1), dtype=np.uint8)
+        in_band = (cv2.dilate(boundary.astype(np.uint8), band_kernel) > 0)[StitchMerger._slices(overlap, union)]
+
+        masks = []
+        for crop, losers in zip(crops, [coarse_winners == 0, coarse_winners == 1]):
+            mask = np.full((crop.height, crop.width), 255, dtype=np.uint8)
+            mask[StitchMerger._slices(overlap, crop)][losers & ~in_band] = 0
+            masks.append(mask)
+        return masks
+
+    # -------------------------------------------------------------------------
+    #  Geometry helpers
+    # -------------------------------------------------------------------------
+    def _overlap(self, i: int, j: int) -> TileRange:
+        return self._intersection(self._sol.tile_ranges[i], self._sol.tile_ranges[j])
+
+    def _coverage(self, u: int, tr: TileRange) -> np.ndarray:
+        """Boolean array over tile range tr, indicating which pixels are covered by tile u."""
+        coverage = np.zeros((tr.height, tr.width), dtype=bool)
+        if (overlap := self._intersection(self._sol.tile_ranges[u], tr)) is not None:
+            coverage[self._slices(overlap, tr)] = True
+        return coverage
 
-            # set pixel sources
-            for row in range(tile.top, tile.bottom + 1):
-                for col in range(tile.left, tile.right + 1):
-                    if np_mask[row - tile.top, col - tile.left] > 0:
-                        sol.pixel_sources[row, col] = i
+    @staticmethod
+    def _intersection(tr_0: TileRange, tr_1: TileRange) -> TileRange | None:
+        left, top = max(tr_0.left, tr_1.left), max(tr_0.top, tr_1.top)
+        right, bottom = min(tr_0.right, tr_1.right), min(tr_0.bottom, tr_1.bottom)
+        if (left > right) or (top > bottom):
+            return None
+        return TileRange(left=left, top=top, width=right - left + 1, height=bottom - top + 1)
 
-        # return final solution
-        return sol
+    @staticmethod
+    def _slices(inner: TileRange, outer: TileRange) -> tuple[slice, slice]:
+        """(row, col) slices of tile range 'inner' in an array covering tile range 'outer'."""
+        return (
+            slice(inner.top - outer.top, inner.bottom - outer.top + 1),
+            slice(inner.left - outer.left, inner.right - outer.left + 1),
+        )
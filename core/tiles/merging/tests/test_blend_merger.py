@@ -0,0 +1,107 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.tiles import Tile, TileDimSpec, TileRange
+from core.tiles.merging import TileMerger
+from core.tiles.merging.blend_merger import BlendMerger
+from core.tiles.splitting.splitter import TileSplitter
+
+
+@pytest.mark.parametrize(
+    "max_tile_size, overlap",
+    [
+        (300, 0.0),
+        (200, 0.05),
+        (100, 0.2),
+    ],
+)
+def test_blend_merger(max_tile_size: int, overlap: float):
+    """
+    Test both split & merge using the TileSplitter & BlendMerger class; blending identical pixels is lossless.
+    """
+
+    # --- arrange -----------------------------------------
+    img = Image.fromarray(
+        np.random.randint(0, 255, size=(256, 256, 3), dtype=np.uint8),
+        mode="RGB",
+    )
+    tiles = TileSplitter(
+        tile_width_spec=TileDimSpec(min_value=2, max_value=max_tile_size, multiplier=2),
+        tile_height_spec=TileDimSpec(min_value=2, max_value=max_tile_size, multiplier=2),
+        overlap_fraction=overlap,
+    ).split_image(img)
+
+    # --- act ---------------------------------------------
+    sol = TileMerger.blend().merge(tiles)
+
+    # --- assert ------------------------------------------
+    np.testing.assert_array_equal(np.array(img), np.array(sol.img))
+    assert set(np.unique(sol.pixel_sources)) == set(range(len(tiles)))
+
+
+def test_blend_merger_transition():
+    """
+    Test that the overlap of 2 uniform tiles of different colors is a smooth & monotonous transition, while pixels
+    outside of the overlap are unaffected, and that pixel sources switch halfway the overlap.
+    """
+
+    # --- arrange -----------------------------------------
+    tile_left = Tile(pixels=np.full((10, 60, 3), 0, dtype=np.uint8), left=0, top=0)
+    tile_right = Tile(pixels=np.full((10, 60, 3), 200, dtype=np.uint8), left=40, top=0)
+
+    # --- act ---------------------------------------------
+    sol = TileMerger.blend().merge([tile_left, tile_right])
+
+    # --- assert ------------------------------------------
+    row = np.array(sol.img)[5, :, 0].astype(int)
+    assert (row[:40] == 0).all() and (row[60:] == 200).all()
+    assert (np.diff(row) >= 0).all()
+    assert np.abs(np.diff(row)).max() <= 200 / 10
+    np.testing.assert_array_equal(sol.pixel_sources[5], [0] * 50 + [1] * 50)
+
+
+def test_blend_merger_feather_weights():
+    # --- act ---------------------------------------------
+    weights = BlendMerger.feather_weights(TileRange(left=0, top=4, width=5, height=4), canvas_size=(10, 8))
+
+    # --- assert ------------------------------------------
+    np.testing.assert_array_equal(
+        weights,
+        [
+            [1, 1, 1, 1, 1],  # top edge: 1 + distance to top
+            [2, 2, 2, 2, 1],
+            [3, 3, 3, 2, 1],  # right edge: 1 + distance to right
+            [4, 4, 3, 2, 1],  # bottom & left edge are canvas edges, no feathering
+        ],
+    )
+
+
+def test_blend_merger_out_of_core(tmp_path: Path):
+    # --- arrange -----------------------------------------
+    img = Image.fromarray(np.random.randint(0, 255, size=(128, 96, 3), dtype=np.uint8), mode="RGB")
+    tiles = [
+        Tile(pixels=np.random.randint(0, 255, size=(tr.height, tr.width, 3), dtype=np.uint8), left=tr.left, top=tr.top)
+        for tr in TileSplitter(TileDimSpec(2, 48, 2), TileDimSpec(2, 48, 2), overlap_fraction=0.2).split_ranges(
+            img.width, img.height
+        )
+    ]
+
+    # --- act ---------------------------------------------
+    sol_in_memory = TileMerger.blend().merge(tiles)
+    sol_out_of_core = TileMerger.blend(tmp_path).merge(tiles)
+
+    # --- assert ------------------------------------------
+    assert sol_out_of_core.canvas.is_out_of_core
+    np.testing.assert_array_equal(np.array(sol_in_memory.img), np.array(sol_out_of_core.img))
+    np.testing.assert_array_equal(sol_in_memory.pixel_sources, sol_out_of_core.pixel_sources)
+
+
+def test_tile_merger_from_mode():
+    # --- act & assert ------------------------------------
+    for mode in TileMerger.SUPPORTED_MODES:
+        assert isinstance(TileMerger.from_mode(mode), TileMerger)
+    with pytest.raises(ValueError):
+        TileMerger.from_mode("unknown")
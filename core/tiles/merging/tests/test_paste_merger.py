@@ -2,11 +2,12 @@ import numpy as np
 import pytest
 from PIL import Image
 
-from core.tiles import TileDimSpec
+from core.tiles import Tile, TileDimSpec
 from core.tiles.merging import TileMerger
 from core.tiles.splitting.splitter import TileSplitter
 
 
+@pytest.mark.parametrize("strategy", TileSplitter.SUPPORTED_STRATEGIES)
 @pytest.mark.parametrize(
     "max_tile_size, overlap",
     [
@@ -16,7 +17,7 @@ from core.tiles.splitting.splitter import TileSplitter
         (150, 0.3),
     ],
 )
-def test_paste_merger(max_tile_size: int, overlap: float):
+def test_paste_merger(max_tile_size: int, overlap: float, strategy: str):
     """
     Test both split & merge using the TileSplitter & PasteMerger class.
     """
@@ -30,14 +31,29 @@ def test_paste_merger(max_tile_size: int, overlap: float):
         tile_width_spec=TileDimSpec(min_value=2, max_value=max_tile_size, multiplier=2),
         tile_height_spec=TileDimSpec(min_value=2, max_value=max_tile_size, multiplier=2),
         overlap_fraction=overlap,
+        strategy=strategy,
     ).split_image(img)
 
     paste_merger = TileMerger.paste()
 
     # --- act ---------------------------------------------
-    img_merged = paste_merger.merge(tiles)
+    img_merged = paste_merger.merge(tiles).img
 
     # --- assert ------------------------------------------
     assert img.size == img_merged.size
     assert img.mode == img_merged.mode
     np.testing.assert_array_equal(np.array(img), np.array(img_merged))
+
+
+def test_paste_merger_incremental_errors():
+    # --- arrange -----------------------------------------
+    tiles = [Tile(pixels=np.zeros((8, 8, 3), dtype=np.uint8), left=8 * i, top=0) for i in range(3)]
+    paste_merger = TileMerger.paste()
+    paste_merger.begin((24, 8), [tile.range for tile in tiles])
+
+    # --- act & assert ------------------------------------
+    paste_merger.add(tiles[1])
+    with pytest.raises(ValueError):
+        paste_merger.add(tiles[1])  # added twice
+    with pytest.raises(ValueError):
+        paste_merger.finish()  # not all tiles added
@@ -1,9 +1,12 @@
+import cv2
 import numpy as np
 import pytest
+from cv2.detail import DpSeamFinder
 from PIL import Image
 
-from core.tiles import TileDimSpec
+from core.tiles import Tile, TileDimSpec
 from core.tiles.merging import TileMerger
+from core.tiles.merging.stitch_merger import StitchMerger
 from core.tiles.splitting.splitter import TileSplitter
 
 
@@ -14,9 +17,9 @@ from core.tiles.splitting.splitter import TileSplitter
         (200, 100),  # 2x3 tiles
     ],
 )
-def test_paste_merger(max_hor_tile_size: int, max_vert_tile_size: int):
+def test_stitch_merger(max_hor_tile_size: int, max_vert_tile_size: int):
     """
-    Test both split & merge using the TileSplitter & PasteMerger class.
+    Test both split & merge using the TileSplitter & StitchMerger class.
     """
 
     # --- arrange -----------------------------------------
@@ -33,9 +36,233 @@ def test_paste_merger(max_hor_tile_size: int, max_vert_tile_size: int):
     stitch_merger = TileMerger.stitch()
 
     # --- act ---------------------------------------------
-    img_merged = stitch_merger.merge(tiles)
+    img_merged = stitch_merger.merge(tiles).img
 
     # --- assert ------------------------------------------
     assert img.size == img_merged.size
     assert img.mode == img_merged.mode
     np.testing.assert_array_equal(np.array(img), np.array(img_merged))
+
+
+def test_stitch_merger_pixel_sources():
+    """
+    Test that each pixel source refers to a tile that covers that pixel & that all tiles are used.
+    """
+
+    # --- arrange -----------------------------------------
+    img = Image.fromarray(
+        np.random.randint(0, 255, size=(256, 256, 3), dtype=np.uint8),
+        mode="RGB",
+    )
+    tiles = TileSplitter(
+        tile_width_spec=TileDimSpec(min_value=2, max_value=100, multiplier=2),
+        tile_height_spec=TileDimSpec(min_value=2, max_value=100, multiplier=2),
+        overlap_fraction=0.2,
+    ).split_image(img)
+
+    stitch_merger = TileMerger.stitch()
+
+    # --- act ---------------------------------------------
+    pixel_sources = stitch_merger.merge(tiles).pixel_sources
+
+    # --- assert ------------------------------------------
+    assert set(np.unique(pixel_sources)) == set(range(len(tiles)))
+    rows, cols = np.indices(pixel_sources.shape)
+    tile_lefts = np.array([tile.left for tile in tiles])[pixel_sources]
+    tile_tops = np.array([tile.top for tile in tiles])[pixel_sources]
+    tile_rights = np.array([tile.right for tile in tiles])[pixel_sources]
+    tile_bottoms = np.array([tile.bottom for tile in tiles])[pixel_sources]
+    assert np.all((tile_lefts <= cols) & (cols <= tile_rights) & (tile_tops <= rows) & (rows <= tile_bottoms))
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_stitch_merger_incremental(shuffle: bool):
+    """
+    Test that tiles added in any order are merged without holes & with identical results, and that tiles are
+    released early when added in spatial order.
+    """
+
+    # --- arrange -----------------------------------------
+    tile_ranges = TileSplitter(
+        tile_width_spec=TileDimSpec(min_value=2, max_value=64, multiplier=2),
+        tile_height_spec=TileDimSpec(min_value=2, max_value=64, multiplier=2),
+        overlap_fraction=0.2,
+    ).split_ranges(300, 200)
+    n_rows = len({tr.top for tr in tile_ranges})
+    tiles = [  # each tile has a distinct, uniform color, such that merged pixels reveal their source
+        Tile(pixels=np.full((tr.height, tr.width, 3), i + 1, dtype=np.uint8), left=tr.left, top=tr.top)
+        for i, tr in enumerate(tile_ranges)
+    ]
+    order = np.random.permutation(len(tiles)) if shuffle else np.arange(len(tiles))
+
+    stitch_merger = TileMerger.stitch()
+
+    # --- act ---------------------------------------------
+    stitch_merger.begin(TileMerger.canvas_size(tile_ranges), tile_ranges)
+    max_pending = 0
+    for i in order:
+        stitch_merger.add(tiles[i])
+        max_pending = max(max_pending, len(stitch_merger._tiles))
+    sol = stitch_merger.finish()
+
+    # --- assert ------------------------------------------
+    np.testing.assert_array_equal(np.array(sol.img)[:, :, 0], sol.pixel_sources + 1)
+    np.testing.assert_array_equal(sol.pixel_sources, TileMerger.stitch().merge(tiles).pixel_sources)
+    if not shuffle:
+        assert max_pending <= n_rows + 2
+
+
+@pytest.mark.parametrize("n_threads", [1, 4])
+def test_stitch_merger_n_threads(n_threads: int):
+    """
+    Test that results do not depend on the number of threads used for seam optimization.
+    """
+
+    # --- arrange -----------------------------------------
+    img = Image.fromarray(
+        np.random.randint(0, 255, size=(256, 256, 3), dtype=np.uint8),
+        mode="RGB",
+    )
+    tiles = TileSplitter(
+        tile_width_spec=TileDimSpec(min_value=2, max_value=80, multiplier=2),
+        tile_height_spec=TileDimSpec(min_value=2, max_value=80, multiplier=2),
+        overlap_fraction=0.2,
+    ).split_image(img)
+
+    # --- act ---------------------------------------------
+    pixel_sources = TileMerger.stitch(n_threads=n_threads).merge(tiles).pixel_sources
+    pixel_sources_ref = TileMerger.stitch(n_threads=2).merge(tiles).pixel_sources
+
+    # --- assert ------------------------------------------
+    np.testing.assert_array_equal(pixel_sources, pixel_sources_ref)
+
+
+@pytest.mark.parametrize("seam_scale", [1, 4])
+def test_stitch_merger_seam_winners(seam_scale: int):
+    """
+    Test that the seam between 2 horizontally overlapping tiles is computed over their overlap region only and
+    separates both tiles, i.e. each row of the overlap starts with pixels of the left tile.
+    """
+
+    # --- arrange -----------------------------------------
+    pixels = np.random.randint(0, 255, size=(64, 100, 3), dtype=np.uint8)
+    tile_left = Tile(pixels=pixels[:, :60], left=0, top=0)
+    tile_right = Tile(pixels=pixels[:, 40:], left=40, top=0)
+
+    # --- act ---------------------------------------------
+    winners = StitchMerger.seam_winners(tile_left, tile_right, seam_scale)
+
+    # --- assert ------------------------------------------
+    assert winners.shape == (64, 20)
+    for row in winners:
+        n_left = np.argmin(row) if not row.all() else len(row)
+        assert row[:n_left].all() and not row[n_left:].any()
+
+
+@pytest.mark.parametrize("seam_scale", [2, 4])
+def test_stitch_merger_coarse_seams(seam_scale: int):
+    """
+    Test that merging with coarse seams reconstructs the original image & uses valid pixel sources only.
+    """
+
+    # --- arrange -----------------------------------------
+    img = Image.fromarray(
+        np.random.randint(0, 255, size=(256, 256, 3), dtype=np.uint8),
+        mode="RGB",
+    )
+    tiles = TileSplitter(
+        tile_width_spec=TileDimSpec(min_value=2, max_value=100, multiplier=2),
+        tile_height_spec=TileDimSpec(min_value=2, max_value=100, multiplier=2),
+        overlap_fraction=0.3,
+    ).split_image(img)
+
+    # --- act ---------------------------------------------
+    sol = TileMerger.stitch(seam_scale=seam_scale).merge(tiles)
+
+    # --- assert ------------------------------------------
+    np.testing.assert_array_equal(np.array(img), np.array(sol.img))
+    rows, cols = np.indices(sol.pixel_sources.shape)
+    sources = sol.pixel_sources.astype(int)
+    assert np.all(
+        (np.array([tile.left for tile in tiles])[sources] <= cols)
+        & (cols <= np.array([tile.right for tile in tiles])[sources])
+        & (np.array([tile.top for tile in tiles])[sources] <= rows)
+        & (rows <= np.array([tile.bottom for tile in tiles])[sources])
+    )
+
+
+def test_stitch_merger_invalid_seam_scale():
+    with pytest.raises(ValueError):
+        TileMerger.stitch(seam_scale=0)
+
+
+# -------------------------------------------------------------------------
+#  Seam quality
+# -------------------------------------------------------------------------
+def _inconsistent_tiles(seed: int) -> list[Tile]:
+    """Tiles of a smooth 300x200 image with 30% overlap, each with its own color shift, like a real upscaler."""
+    rng = np.random.default_rng(seed)
+    low_res = Image.fromarray(rng.integers(0, 256, size=(7, 10, 3), dtype=np.uint8))
+    img = low_res.resize((300, 200), resample=Image.BICUBIC)
+    tiles = TileSplitter(TileDimSpec(16, 64, 4), TileDimSpec(16, 64, 4), overlap_fraction=0.3).split_image(img)
+    return [
+        Tile(
+            pixels=np.clip(tile.pixels + rng.integers(-20, 21, size=3), 0, 255).astype(np.uint8),
+            left=tile.left,
+            top=tile.top,
+        )
+        for tile in tiles
+    ]
+
+
+def _global_pixel_sources(tiles: list[Tile], size: tuple[int, int]) -> np.ndarray:
+    """Pixel sources of a single DpSeamFinder run over all tiles at once, i.e. the original StitchMerger."""
+    masks = DpSeamFinder(costFunc="COLOR_GRAD").find(
+        [cv2.cvtColor(np.ascontiguousarray(tile.pixels), cv2.COLOR_RGB2BGR) for tile in tiles],
+        [(tile.left, tile.top) for tile in tiles],
+        [np.full((tile.height, tile.width), 255, dtype=np.uint8) for tile in tiles],
+    )
+    pixel_sources = np.zeros((size[1], size[0]), dtype=np.int64)
+    for i, (tile, mask) in enumerate(zip(tiles, masks)):
+        pixel_sources[tile.top : tile.bottom + 1, tile.left : tile.right + 1][mask.get() > 0] = i
+    return pixel_sources
+
+
+def _seam_cost(pixel_sources: np.ndarray, tiles: list[Tile]) -> float:
+    """Mean color difference between both tiles at both sides of every pixel boundary where the source changes."""
+    costs = []
+    for dy, dx in [(1, 0), (0, 1)]:
+        h, w = pixel_sources.shape[0] - dy, pixel_sources.shape[1] - dx
+        ys, xs = np.nonzero(pixel_sources[:h, :w] != pixel_sources[dy:, dx:])
+        for y, x in [(ys, xs), (ys + dy, xs + dx)]:
+            colors = [
+                np.array([tiles[i].pixels[yy - tiles[i].top, xx - tiles[i].left] for i, yy, xx in zip(src, y, x)])
+                for src in (pixel_sources[ys, xs], pixel_sources[ys + dy, xs + dx])
+            ]
+            costs.append(np.abs(colors[0].astype(int) - colors[1].astype(int)).sum(axis=1))
+    return float(np.concatenate(costs).mean())
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_stitch_merger_seam_cost_vs_global(seed: int):
+    """
+    Test that pairwise seams, assembled incrementally, are about as good as a single DpSeamFinder run over all tiles
+    (= the original, non-incremental StitchMerger), regardless of the order in which tiles are added.
+    """
+
+    # --- arrange -----------------------------------------
+    tiles = _inconsistent_tiles(seed)
+    cost_global = _seam_cost(_global_pixel_sources(tiles, (300, 200)), tiles)
+    order = np.random.default_rng(seed).permutation(len(tiles))
+
+    # --- act ---------------------------------------------
+    sol = TileMerger.stitch().merge(tiles)
+    merger = TileMerger.stitch()
+    merger.begin((300, 200), [tile.range for tile in tiles])
+    for i in order:
+        merger.add(tiles[i])
+    sol_shuffled = merger.finish()
+
+    # --- assert ------------------------------------------
+    np.testing.assert_array_equal(sol.pixel_sources, sol_shuffled.pixel_sources)
+    assert _seam_cost(sol.pixel_sources.astype(np.int64), tiles) <= 1.1 * cost_global
@@ -0,0 +1,43 @@
+import numpy as np
+from PIL import Image
+
+from core.tiles import TileDimSpec
+from core.tiles.merging import TileMerger, TileMergeSolution
+from core.tiles.splitting.splitter import TileSplitter
+
+
+def _img_overlayed_reference(sol: TileMergeSolution) -> Image.Image:
+    """Straightforward per-pixel implementation of TileMergeSolution.img_overlayed with default colors."""
+    img = sol.img.copy()
+    for i in range(img.height):
+        for j in range(img.width):
+            if (i + j) % 2 == 0:
+                if any((i in (tr.top, tr.bottom)) or (j in (tr.left, tr.right)) for tr in sol.tile_ranges):
+                    img.putpixel((j, i), (0, 255, 0))
+    for i in range(img.height):
+        for j in range(img.width):
+            if (i < img.height - 1) and (sol.pixel_sources[i, j] != sol.pixel_sources[i + 1, j]):
+                img.putpixel((j, i), (255, 255, 255))
+            if (j < img.width - 1) and (sol.pixel_sources[i, j] != sol.pixel_sources[i, j + 1]):
+                img.putpixel((j, i), (255, 255, 255))
+    return img
+
+
+def test_img_overlayed():
+    # --- arrange -----------------------------------------
+    img = Image.fromarray(
+        np.random.randint(0, 255, size=(90, 120, 3), dtype=np.uint8),
+        mode="RGB",
+    )
+    tiles = TileSplitter(
+        tile_width_spec=TileDimSpec(min_value=2, max_value=50, multiplier=2),
+        tile_height_spec=TileDimSpec(min_value=2, max_value=50, multiplier=2),
+        overlap_fraction=0.2,
+    ).split_image(img)
+    sol = TileMerger.stitch().merge(tiles)
+
+    # --- act ---------------------------------------------
+    img_overlayed = sol.img_overlayed()
+
+    # --- assert ------------------------------------------
+    np.testing.assert_array_equal(np.array(img_overlayed), np.array(_img_overlayed_reference(sol)))
@@ -1 +1 @@
-from .splitter import TileSplitter
+from .splitter import SplitStats, TileSplitter
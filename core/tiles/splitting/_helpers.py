@@ -1,5 +1,6 @@
 import math
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 
 from core.tiles.tile_dim_spec import TileDimSpec
 from utils.misc import spaced_ints
@@ -7,8 +8,18 @@ from utils.misc import spaced_ints
 
 @dataclass(frozen=True)
 class IntervalSplitSolution:
-    size: int
+    size: int  # (largest) sub-interval size
     starts: list[int]
+    sizes: list[int] = field(default=None)  # size of each sub-interval; defaults to 'size' for all sub-intervals
+
+    def __post_init__(self):
+        if self.sizes is None:
+            object.__setattr__(self, "sizes", [self.size] * len(self.starts))
+
+    @property
+    def total_size(self) -> int:
+        """Sum of all sub-interval sizes."""
+        return sum(self.sizes)
 
 
 def split_in_overlapping_intervals(
@@ -24,6 +35,27 @@ def split_in_overlapping_intervals(
 
     Result is returned as (sub_interval_size, [start1, start2, ..., startN]), so each sub-interval is defined by
     as [start_i, start_i + sub_interval_size - 1].
+
+    Results are cached by (size, specs, interval_overlap_fraction), such that repeated calls (e.g. for batches
+    of images with identical sizes) don't need to solve the same problem again.
+    """
+    sub_interval_size, starts = _split_in_overlapping_intervals_cached(size, specs, interval_overlap_fraction)
+    return IntervalSplitSolution(size=sub_interval_size, starts=list(starts))
+
+
+@lru_cache(maxsize=1024)
+def _split_in_overlapping_intervals_cached(
+    size: int, specs: TileDimSpec, interval_overlap_fraction: float
+) -> tuple[int, tuple[int, ...]]:
+    """
+    Cached implementation of split_in_overlapping_intervals, returning immutable (sub_interval_size, starts) tuples.
+
+    For each candidate number of sub-intervals n, the smallest valid sub-interval size is derived arithmetically
+    instead of trying all valid sizes:
+      - for n >= 2 and sub-interval size s <= size, the n start points are spread over [0, size-s], so the largest
+          gap between subsequent start points is at least (size-s)/(n-1), while it can be at most s - min_overlap.
+          This provides a lower bound for s, from which we only need to check a few candidates.
+      - if no such s <= size exists (or n = 1), the smallest valid s > size is always a valid solution.
     """
 
     # --- prep --------------------------------------------
@@ -37,16 +69,22 @@ def split_in_overlapping_intervals(
 
     # --- main loop ---------------------------------------
     for n in range(n_intervals_min, n_intervals_max + 1):
-        for sub_interval_size in specs.valid_values():
-            # calculate the start points of the sub-intervals
-            proposed_solution = IntervalSplitSolution(
-                size=sub_interval_size,
-                starts=spaced_ints(0, size - sub_interval_size, n),
-            )
-
-            # check if the solution is valid
-            if is_solution_valid(proposed_solution, specs, interval_overlap_fraction, size):
-                return proposed_solution
+        # candidates s <= size
+        if n >= 2:
+            s_lower_bound = math.floor(size / (1 + (n - 1) * (1 - interval_overlap_fraction))) - 1  # -1: float safety
+            s = specs.round_up(max(s_lower_bound, specs.min_value))
+            while specs.is_valid(s) and (s <= size):
+                starts = spaced_ints(0, size - s, n)
+                if _has_min_overlap(starts, s, math.ceil(s * interval_overlap_fraction)):
+                    return s, tuple(starts)
+                s += specs.multiplier
+        elif specs.is_valid(size):
+            return size, (0,)
+
+        # smallest valid s > size, which (together with any n) always covers the interval with sufficient overlap
+        s = specs.min_value if size < specs.min_value else (size // specs.multiplier + 1) * specs.multiplier
+        if specs.is_valid(s):
+            return s, tuple(spaced_ints(0, size - s, n))
 
     # --- no solution found -------------------------------
     raise ValueError(
@@ -55,6 +93,76 @@ def split_in_overlapping_intervals(
     )
 
 
+def split_in_overlapping_intervals_non_uniform(
+    size: int, specs: TileDimSpec, interval_overlap_fraction: float
+) -> IntervalSplitSolution:
+    """
+    Same as split_in_overlapping_intervals, but sub-intervals can have different sizes, which avoids most of the excess
+    overlap caused by rounding a single sub-interval size to the specs:
+      - all sub-intervals have the same size, except for the last one, which can be smaller
+      - subsequent sub-intervals overlap by a given minimum fraction of the size of the largest of both
+      - the solution with the smallest total size (= sum of all sub-interval sizes) is returned, preferring solutions
+          with fewer sub-intervals and then uniform solutions in case of ties
+      - excess overlap is spread evenly over all overlaps
+
+    Limiting solutions to 2 distinct sizes keeps tiles equally sized as much as possible, such that they can be
+    batched together, while capturing nearly all gains of fully free sizes.
+    """
+    starts, sizes = _split_in_overlapping_intervals_non_uniform_cached(size, specs, interval_overlap_fraction)
+    return IntervalSplitSolution(size=max(sizes), starts=list(starts), sizes=list(sizes))
+
+
+@lru_cache(maxsize=1024)
+def _split_in_overlapping_intervals_non_uniform_cached(
+    size: int, specs: TileDimSpec, interval_overlap_fraction: float
+) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    """
+    Cached implementation of split_in_overlapping_intervals_non_uniform, returning immutable (starts, sizes) tuples.
+
+    With n_a sub-intervals of size a followed by a single one of size b <= a, each sub-interval of size a covers
+    a - ceil(a * overlap_fraction) new positions, and the last one covers b more, so the smallest valid n_a follows
+    directly from (a, b), leaving only O(len(valid sizes)^2) candidates.
+
+    Unless the interval is smaller than specs.min_value, sub-intervals extending beyond the interval are not allowed,
+    since they would pad the result.  If no such candidate exists, the uniform solution is returned.
+    """
+
+    # --- find cheapest (a, b, n_a) -----------------------
+    best = None  # ((total_size, n_intervals, is_non_uniform), a, b, n_a)
+    valid_values = specs.valid_values()
+    for a in valid_values:
+        step = a - math.ceil(a * interval_overlap_fraction)
+        if step <= 0:
+            continue
+        for b in valid_values:
+            if b > a:
+                break
+            n_a = max(math.ceil((size - b) / step), 0)
+            if (size >= specs.min_value) and ((a if n_a > 0 else b) > size):
+                continue
+            key = (n_a * a + b, n_a + 1, (n_a > 0) and (b != a))
+            if (best is None) or (key < best[0]):
+                best = (key, a, b, n_a)
+
+    if best is None:
+        sub_interval_size, starts = _split_in_overlapping_intervals_cached(size, specs, interval_overlap_fraction)
+        return starts, (sub_interval_size,) * len(starts)
+
+    # --- positions ---------------------------------------
+    _, a, b, n_a = best
+    sizes = [a] * n_a + [b]
+    if len(sizes) == 1:
+        return (0,), (b,)
+    min_overlap = math.ceil(a * interval_overlap_fraction)
+    n_overlaps = len(sizes) - 1
+    excess = sum(sizes) - n_overlaps * min_overlap - size  # >= 0, spread over all overlaps
+    starts = [0]
+    for i in range(n_overlaps):
+        extra_overlap = excess // n_overlaps + (1 if i < excess % n_overlaps else 0)
+        starts.append(starts[-1] + sizes[i] - min_overlap - extra_overlap)
+    return tuple(starts), tuple(sizes)
+
+
 def is_solution_valid(
     solution: IntervalSplitSolution,
     specs: TileDimSpec,
@@ -65,22 +173,30 @@ def is_solution_valid(
     Checks if the provided solution, covers the entire interval and has the requested overlap.
     """
 
-    # check if interval size is valid
-    if not specs.is_valid(solution.size):
+    # check if interval sizes are valid
+    if not all(specs.is_valid(sub_interval_size) for sub_interval_size in solution.sizes):
         return False
 
     # check if all intervals jointly cover the whole interval
-    if len({i for start in solution.starts for i in range(start, start + solution.size)}) < size:
+    covered_until = 0  # [0, covered_until-1] is covered by the intervals processed so far
+    for start, sub_interval_size in sorted(zip(solution.starts, solution.sizes)):
+        if start > covered_until:
+            return False
+        covered_until = max(covered_until, start + sub_interval_size)
+    if covered_until < size:
         return False
 
-    # absolute minimum overlap size
-    min_overlap = math.ceil(solution.size * interval_overlap_fraction)
+    # check if subsequent sub-intervals have sufficient overlap
+    intervals = sorted(zip(solution.starts, solution.sizes))
+    return all(
+        (start_prev + size_prev) - start_next >= math.ceil(max(size_prev, size_next) * interval_overlap_fraction)
+        for (start_prev, size_prev), (start_next, size_next) in zip(intervals[:-1], intervals[1:])
+    )
 
-    # check if sub-intervals cover the whole interval
-    for i_start_prev, i_start_next in zip(solution.starts[:-1], solution.starts[1:]):
-        overlap = (i_start_prev + solution.size) - i_start_next
-        if overlap < min_overlap:
-            return False
 
-    # no issue found, so we're good
-    return True
+def _has_min_overlap(starts: list[int], sub_interval_size: int, min_overlap: int) -> bool:
+    """Checks if subsequent sub-intervals overlap by at least min_overlap."""
+    return all(
+        (i_start_prev + sub_interval_size) - i_start_next >= min_overlap
+        for i_start_prev, i_start_next in zip(starts[:-1], starts[1:])
+    )
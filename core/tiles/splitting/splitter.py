@@ -1,60 +1,151 @@
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+import numpy as np
 from PIL import Image
 
+from core.tiles.canvas import Canvas
 from core.tiles.tile import Tile
 from core.tiles.tile_dim_spec import TileDimSpec
+from core.tiles.tile_range import TileRange
+
+from ._helpers import (
+    IntervalSplitSolution,
+    split_in_overlapping_intervals,
+    split_in_overlapping_intervals_non_uniform,
+)
+
 
-from ._helpers import IntervalSplitSolution, split_in_overlapping_intervals
+@dataclass(frozen=True)
+class SplitStats:
+    """Statistics of splitting an image into tiles."""
+
+    n_tiles: int
+    image_pixels: int  # nr of pixels of the image
+    tile_pixels: int  # total nr of pixels of all tiles, i.e. pixels to be processed when upscaling all tiles
+
+    @property
+    def overlap_waste(self) -> float:
+        """Fraction of tile pixels in excess of the image pixels, i.e. spent on overlap (or padding)."""
+        return (self.tile_pixels / self.image_pixels) - 1.0
 
 
 class TileSplitter:
     """
     Class that allows to split an image into tiles with specified dimension specs and overlap.
+
+    Two strategies are supported:
+      - 'uniform': all tiles have the same size, spread evenly over the image
+      - 'non_uniform': all tiles along an axis have the same size, except for the last one which can be smaller,
+                          minimizing the total tile area; see split_in_overlapping_intervals_non_uniform(...)
     """
 
+    SUPPORTED_STRATEGIES = ["uniform", "non_uniform"]
+
     # -------------------------------------------------------------------------
     #  Constructor
     # -------------------------------------------------------------------------
-    def __init__(self, tile_width_spec: TileDimSpec, tile_height_spec: TileDimSpec, overlap_fraction: float = 0.0):
+    def __init__(
+        self,
+        tile_width_spec: TileDimSpec,
+        tile_height_spec: TileDimSpec,
+        overlap_fraction: float = 0.0,
+        strategy: str = "uniform",
+    ):
+        if strategy not in self.SUPPORTED_STRATEGIES:
+            raise ValueError(
+                f"Unsupported splitting strategy: {strategy}. Supported strategies are: {self.SUPPORTED_STRATEGIES}"
+            )
         self._tile_width_spec = tile_width_spec
         self._tile_height_spec = tile_height_spec
         self._overlap_fraction = overlap_fraction
+        self.strategy = strategy
 
     # -------------------------------------------------------------------------
     #  Main API
     # -------------------------------------------------------------------------
-    def split_image(self, img: Image.Image) -> list[Tile]:
+    def split_image(self, img: Image.Image | Canvas) -> list[Tile]:
         """
         Split image in tiles such that they cover the entire image and satisfy specifications provided
         to the constructor.
         """
+        return list(self.split_image_iter(img))
+
+    def split_image_iter(self, img: Image.Image | Canvas) -> Iterator[Tile]:
+        """
+        Same as split_image(...), but lazily yields tiles, as array-backed views into the image; see iter_tiles(...).
+        """
+        return self.iter_tiles(img, self.split_ranges(img.width, img.height))
+
+    def split_ranges(self, width: int, height: int) -> list[TileRange]:
+        """
+        Determine the tile ranges that split_image(...) would produce for an image of the given size,
+        without touching any image data.
+        """
 
         # --- hor/vert splits -----------------------------
         # Determine hor. & vert. tile sizes / positions
-        sol_hor: IntervalSplitSolution = split_in_overlapping_intervals(
-            size=img.width,
+        split_fn = (
+            split_in_overlapping_intervals if self.strategy == "uniform" else split_in_overlapping_intervals_non_uniform
+        )
+        sol_hor: IntervalSplitSolution = split_fn(
+            size=width,
             specs=self._tile_width_spec,
             interval_overlap_fraction=self._overlap_fraction,
         )
-        sol_vert: IntervalSplitSolution = split_in_overlapping_intervals(
-            size=img.height,
+        sol_vert: IntervalSplitSolution = split_fn(
+            size=height,
             specs=self._tile_height_spec,
             interval_overlap_fraction=self._overlap_fraction,
         )
 
-        # --- generate tiles ------------------------------
-        return [
-            Tile(
-                img=img.crop(
-                    box=(
-                        left,
-                        top,
-                        left + sol_hor.size,
-                        top + sol_vert.size,
-                    )
-                ),
-                left=left,
-                top=top,
-            )
-            for left in sol_hor.starts
-            for top in sol_vert.starts
-        ]
+        # --- generate tile ranges ------------------------
+        # Tiles are ordered column by column, or row by row for images that are taller than wide (in tiles), such that
+        # all neighbors of a tile follow shortly after it, which allows incremental mergers to release tiles early.
+        columns, rows = list(zip(sol_hor.starts, sol_hor.sizes)), list(zip(sol_vert.starts, sol_vert.sizes))
+        if len(columns) >= len(rows):
+            intervals = [(column, row) for column in columns for row in rows]
+        else:
+            intervals = [(column, row) for row in rows for column in columns]
+        return [TileRange(left=left, top=top, width=width, height=height) for (left, width), (top, height) in intervals]
+
+    def split_stats(self, width: int, height: int) -> SplitStats:
+        """Statistics of the tiles that split_image(...) would produce for an image of the given size."""
+        tile_ranges = self.split_ranges(width, height)
+        return SplitStats(
+            n_tiles=len(tile_ranges),
+            image_pixels=width * height,
+            tile_pixels=sum(tr.width * tr.height for tr in tile_ranges),
+        )
+
+    @staticmethod
+    def iter_tiles(img: Image.Image | Canvas, tile_ranges: Iterable[TileRange]) -> Iterator[Tile]:
+        """
+        Lazily yields tiles for the given tile ranges, whose pixels are views into a single array holding the image,
+        i.e. without copying any pixel data.  For a Canvas, this is its (possibly memory-mapped) pixel array; a PIL
+        image is converted to an array once.  Tiles extending beyond the image are cropped instead, see crop_tile.
+        """
+        pixels = img.pixels if isinstance(img, Canvas) else np.asarray(img)
+        height, width = pixels.shape[:2]
+        for tr in tile_ranges:
+            if (tr.right < width) and (tr.bottom < height):
+                tile_pixels = pixels[tr.top : tr.bottom + 1, tr.left : tr.right + 1]
+                yield Tile(pixels=tile_pixels, left=tr.left, top=tr.top)
+            else:
+                yield TileSplitter.crop_tile(img, tr)
+
+    @staticmethod
+    def crop_tile(img: Image.Image | Canvas, tile_range: TileRange) -> Tile:
+        """Crop the given tile range from the image and return it as a Tile."""
+        return Tile(
+            img=img.crop(
+                box=(
+                    tile_range.left,
+                    tile_range.top,
+                    tile_range.left + tile_range.width,
+                    tile_range.top + tile_range.height,
+                )
+            ),
+            left=tile_range.left,
+            top=tile_range.top,
+        )
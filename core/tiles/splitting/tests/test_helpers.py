@@ -1,7 +1,16 @@
+import math
+
+import numpy as np
 import pytest
 
-from core.tiles.splitting._helpers import IntervalSplitSolution, split_in_overlapping_intervals
+from core.tiles.splitting._helpers import (
+    IntervalSplitSolution,
+    is_solution_valid,
+    split_in_overlapping_intervals,
+    split_in_overlapping_intervals_non_uniform,
+)
 from core.tiles.tile_dim_spec import TileDimSpec
+from utils.misc import spaced_ints
 
 
 @pytest.mark.parametrize(
@@ -57,3 +66,131 @@ def test_split_in_overlapping_intervals(
 
     # --- assert ------------------------------------------
     assert sol == expected_solution
+
+
+# -------------------------------------------------------------------------
+#  Property tests - compare against reference (brute-force) implementation
+# -------------------------------------------------------------------------
+def _split_in_overlapping_intervals_reference(
+    size: int, specs: TileDimSpec, interval_overlap_fraction: float
+) -> IntervalSplitSolution:
+    """Original brute-force implementation, trying all (n, sub_interval_size) combinations in order."""
+    max_interval_size = specs.round_down(size)
+    n_intervals_min = math.ceil(size / max_interval_size)
+    n_intervals_max = math.ceil(size / (max_interval_size * (1 - interval_overlap_fraction))) + 2
+    for n in range(n_intervals_min, n_intervals_max + 1):
+        for sub_interval_size in specs.valid_values():
+            starts = spaced_ints(0, size - sub_interval_size, n)
+            covered = {i for start in starts for i in range(start, start + sub_interval_size)}
+            min_overlap = math.ceil(sub_interval_size * interval_overlap_fraction)
+            if (len(covered) >= size) and all(
+                (prev + sub_interval_size) - nxt >= min_overlap for prev, nxt in zip(starts[:-1], starts[1:])
+            ):
+                return IntervalSplitSolution(size=sub_interval_size, starts=starts)
+    raise ValueError("no solution")
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_split_in_overlapping_intervals_vs_reference(seed: int):
+    # --- arrange -----------------------------------------
+    rng = np.random.default_rng(seed)
+    cases = []
+    for _ in range(25):
+        multiplier = int(rng.integers(1, 9))
+        min_value = multiplier * int(rng.integers(1, 9))
+        max_value = min_value + multiplier * int(rng.integers(0, 40))
+        specs = TileDimSpec(min_value=min_value, max_value=max_value, multiplier=multiplier)
+        size = int(rng.integers(1, 1500))
+        interval_overlap_fraction = float(rng.choice([0.0, 0.05, 0.1, 0.125, 0.2, 0.25, 1 / 3, 0.5, 0.75]))
+        cases.append((size, specs, interval_overlap_fraction))
+
+    for size, specs, interval_overlap_fraction in cases:
+        # --- act -----------------------------------------
+        try:
+            expected = _split_in_overlapping_intervals_reference(size, specs, interval_overlap_fraction)
+        except ValueError:
+            expected = None
+
+        # --- assert --------------------------------------
+        if expected is None:
+            with pytest.raises(ValueError):
+                split_in_overlapping_intervals(size, specs, interval_overlap_fraction)
+        else:
+            sol = split_in_overlapping_intervals(size, specs, interval_overlap_fraction)
+            assert sol == expected, f"size={size}, specs={specs}, overlap={interval_overlap_fraction}"
+            assert is_solution_valid(sol, specs, interval_overlap_fraction, size)
+
+
+def test_split_in_overlapping_intervals_cached():
+    # --- arrange -----------------------------------------
+    specs = TileDimSpec(min_value=16, max_value=256, multiplier=4)
+
+    # --- act ---------------------------------------------
+    sol_1 = split_in_overlapping_intervals(1000, specs, 0.1)
+    sol_1.starts.append(-1)  # mutating a returned solution should not affect the cache
+    sol_2 = split_in_overlapping_intervals(1000, specs, 0.1)
+
+    # --- assert ------------------------------------------
+    assert sol_2 == IntervalSplitSolution(size=220, starts=[0, 195, 390, 585, 780])
+
+
+# -------------------------------------------------------------------------
+#  Non-uniform splitting
+# -------------------------------------------------------------------------
+@pytest.mark.parametrize(
+    "size, specs, interval_overlap_fraction, expected_solution",
+    [
+        (100, TileDimSpec(min_value=32, max_value=256, multiplier=4), 0.0, IntervalSplitSolution(100, [0])),
+        (10, TileDimSpec(min_value=32, max_value=256, multiplier=4), 0.0, IntervalSplitSolution(32, [0])),
+        (
+            260,
+            TileDimSpec(min_value=16, max_value=256, multiplier=4),
+            0.0,
+            IntervalSplitSolution(size=132, starts=[0, 132], sizes=[132, 128]),  # uniform: 2 x 132,
+        ),
+        (
+            260,
+            TileDimSpec(min_value=16, max_value=256, multiplier=4),
+            0.1,
+            IntervalSplitSolution(size=140, starts=[0, 124], sizes=[140, 136]),  # uniform: 2 x 140,
+        ),
+    ],
+)
+def test_split_in_overlapping_intervals_non_uniform(
+    size: int, specs: TileDimSpec, interval_overlap_fraction: float, expected_solution: IntervalSplitSolution
+):
+    # --- act ---------------------------------------------
+    sol = split_in_overlapping_intervals_non_uniform(size, specs, interval_overlap_fraction)
+
+    # --- assert ------------------------------------------
+    assert sol == expected_solution
+    assert is_solution_valid(sol, specs, interval_overlap_fraction, size)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_split_in_overlapping_intervals_non_uniform_vs_uniform(seed: int):
+    """
+    Test that non-uniform solutions are valid & never have a larger total size than uniform solutions.
+    """
+
+    # --- arrange -----------------------------------------
+    rng = np.random.default_rng(seed)
+    for _ in range(25):
+        multiplier = int(rng.integers(1, 9))
+        min_value = multiplier * int(rng.integers(1, 9))
+        max_value = min_value + multiplier * int(rng.integers(0, 40))
+        specs = TileDimSpec(min_value=min_value, max_value=max_value, multiplier=multiplier)
+        size = int(rng.integers(1, 1500))
+        interval_overlap_fraction = float(rng.choice([0.0, 0.05, 0.1, 0.125, 0.2, 0.25, 1 / 3, 0.5]))
+        try:
+            sol_uniform = split_in_overlapping_intervals(size, specs, interval_overlap_fraction)
+        except ValueError:
+            continue
+
+        # --- act ---------------------------------------------
+        sol = split_in_overlapping_intervals_non_uniform(size, specs, interval_overlap_fraction)
+
+        # --- assert ------------------------------------------
+        assert is_solution_valid(sol, specs, interval_overlap_fraction, size)
+        assert sol.total_size <= sol_uniform.total_size
+        assert len(set(sol.sizes)) <= 2
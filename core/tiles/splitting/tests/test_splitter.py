@@ -0,0 +1,38 @@
+import pytest
+
+from core.tiles.splitting.splitter import TileSplitter
+from core.tiles.tile_dim_spec import TileDimSpec
+
+
+@pytest.mark.parametrize("overlap", [0.0, 0.1, 0.25])
+@pytest.mark.parametrize("width, height", [(100, 75), (126, 250), (260, 130), (640, 480), (1000, 17)])
+def test_split_stats_non_uniform(overlap: float, width: int, height: int):
+    """
+    Test that tiles of both strategies lie inside the image and that the non-uniform strategy never processes more
+    pixels than the uniform strategy.
+    """
+
+    # --- arrange -----------------------------------------
+    spec = TileDimSpec(min_value=16, max_value=128, multiplier=4)
+    splitters = {
+        strategy: TileSplitter(spec, spec, overlap_fraction=overlap, strategy=strategy)
+        for strategy in TileSplitter.SUPPORTED_STRATEGIES
+    }
+
+    # --- act ---------------------------------------------
+    stats = {strategy: splitter.split_stats(width, height) for strategy, splitter in splitters.items()}
+
+    # --- assert ------------------------------------------
+    for splitter in splitters.values():
+        for tr in splitter.split_ranges(width, height):
+            assert (0 <= tr.left <= tr.right < width) and (0 <= tr.top <= tr.bottom < height)
+    assert stats["uniform"].image_pixels == stats["non_uniform"].image_pixels == width * height
+    assert 0.0 <= stats["non_uniform"].overlap_waste <= stats["uniform"].overlap_waste
+    assert stats["non_uniform"].tile_pixels == sum(
+        tr.width * tr.height for tr in splitters["non_uniform"].split_ranges(width, height)
+    )
+
+
+def test_splitter_invalid_strategy():
+    with pytest.raises(ValueError):
+        TileSplitter(TileDimSpec(16, 128, 4), TileDimSpec(16, 128, 4), strategy="unknown")
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.tiles import Canvas, canvas
+
+
+def _random_image(width: int, height: int) -> Image.Image:
+    return Image.fromarray(np.random.randint(0, 255, size=(height, width, 3), dtype=np.uint8), mode="RGB")
+
+
+@pytest.mark.parametrize("out_of_core", [False, True])
+def test_canvas_paste_crop(tmp_path: Path, out_of_core: bool):
+    # --- arrange -----------------------------------------
+    img, tile = _random_image(60, 40), _random_image(20, 10)
+    mask = np.random.randint(0, 2, size=(10, 20), dtype=np.uint8) * 255
+    c = Canvas.from_image(img, tmp_path if out_of_core else None)
+
+    expected = img.copy()
+    expected.paste(tile, box=(30, 25), mask=Image.fromarray(mask))
+
+    # --- act ---------------------------------------------
+    c.paste(tile, box=(30, 25), mask=mask)
+
+    # --- assert ------------------------------------------
+    assert c.is_out_of_core == out_of_core
+    assert list(tmp_path.iterdir()) == []  # backing files are deleted right away
+    np.testing.assert_array_equal(np.array(c.to_image()), np.array(expected))
+    np.testing.assert_array_equal(np.array(c.crop((5, 7, 45, 38))), np.array(expected.crop((5, 7, 45, 38))))
+
+
+@pytest.mark.parametrize("size", [(50, 40), (300, 211), (131, 50), (77, 97)])
+@pytest.mark.parametrize("resample", [Image.LANCZOS, Image.BICUBIC, Image.NEAREST])
+def test_canvas_resize(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, size: tuple[int, int], resample: int):
+    # --- arrange -----------------------------------------
+    monkeypatch.setattr(canvas, "STRIP_PIXELS", 3000)  # force many strips
+    img = _random_image(131, 97)
+
+    # --- act ---------------------------------------------
+    resized = Canvas.from_image(img, tmp_path).resize(size, resample=resample)
+
+    # --- assert ------------------------------------------
+    assert resized.is_out_of_core
+    np.testing.assert_array_equal(np.array(resized.to_image()), np.array(img.resize(size, resample=resample)))
+
+
+def test_canvas_save_png_streaming(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    # --- arrange -----------------------------------------
+    monkeypatch.setattr(canvas, "STRIP_PIXELS", 1000)  # force many strips
+    img = _random_image(123, 45)
+
+    # --- act ---------------------------------------------
+    Canvas.from_image(img, tmp_path).save(tmp_path / "result.png")
+
+    # --- assert ------------------------------------------
+    with Image.open(tmp_path / "result.png") as result:
+        assert result.mode == "RGB"
+        np.testing.assert_array_equal(np.array(result), np.array(img))
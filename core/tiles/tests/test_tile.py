@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.tiles import Canvas, Tile, TileDimSpec, TileRange, TileSplitter
+
+
+def _random_image(width: int, height: int) -> Image.Image:
+    return Image.fromarray(np.random.randint(0, 255, size=(height, width, 3), dtype=np.uint8), mode="RGB")
+
+
+def test_tile_from_array():
+    # --- arrange -----------------------------------------
+    pixels = np.random.randint(0, 255, size=(12, 20, 3), dtype=np.uint8)
+
+    # --- act ---------------------------------------------
+    tile = Tile(pixels=pixels[2:10, 4:16], left=4, top=2)
+
+    # --- assert ------------------------------------------
+    assert tile.range == TileRange(left=4, top=2, width=12, height=8)
+    assert (tile.right, tile.bottom) == (15, 9)
+    assert np.shares_memory(tile.pixels, pixels)
+    np.testing.assert_array_equal(np.array(tile.img), pixels[2:10, 4:16])
+
+
+def test_tile_requires_img_or_pixels():
+    with pytest.raises(ValueError):
+        Tile(left=0, top=0)
+    with pytest.raises(ValueError):
+        Tile(_random_image(4, 4), 0, 0, pixels=np.zeros((4, 4, 3), dtype=np.uint8))
+
+
+@pytest.mark.parametrize(
+    "pixels, expected_mean_gradient",
+    [
+        (np.full((8, 8, 3), 77, dtype=np.uint8), 0.0),
+        (np.full((1, 1, 3), 77, dtype=np.uint8), 0.0),
+        (np.tile(np.array([0, 10], dtype=np.uint8), (4, 2)), 10 * 12 / (12 + 12)),  # only horizontal differences
+        (np.tile(np.array([0, 255], dtype=np.uint8), (1, 5)), 255.0),
+    ],
+)
+def test_tile_mean_gradient(pixels: np.ndarray, expected_mean_gradient: float):
+    # --- act ---------------------------------------------
+    mean_gradient = Tile(pixels=pixels).mean_gradient()
+
+    # --- assert ------------------------------------------
+    assert mean_gradient == pytest.approx(expected_mean_gradient)
+
+
+@pytest.mark.parametrize("use_canvas", [False, True])
+@pytest.mark.parametrize("width, height", [(100, 70), (10, 70)])
+def test_split_image_iter(use_canvas: bool, width: int, height: int):
+    # --- arrange -----------------------------------------
+    img = _random_image(width, height)
+    source = Canvas.from_image(img) if use_canvas else img
+    splitter = TileSplitter(TileDimSpec(16, 32, 4), TileDimSpec(16, 32, 4), overlap_fraction=0.1)
+
+    # --- act ---------------------------------------------
+    tiles = list(splitter.split_image_iter(source))
+
+    # --- assert ------------------------------------------
+    assert [tile.range for tile in tiles] == splitter.split_ranges(width, height)
+    for tile in tiles:
+        expected = TileSplitter.crop_tile(img, tile.range)  # PIL crop, which pads with black beyond the image
+        np.testing.assert_array_equal(np.array(tile.img), np.array(expected.img))
+        if use_canvas and (tile.right < width) and (tile.bottom < height):
+            assert np.shares_memory(tile.pixels, source.pixels)
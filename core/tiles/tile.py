@@ -1,39 +1,94 @@
-from dataclasses import dataclass
+from __future__ import annotations
 
+import numpy as np
 from PIL import Image
 
 from .tile_range import TileRange
 
 
-@dataclass
 class Tile:
     """
     Class representing a tile of an image, together with its position and size.
+
+    Pixel data is provided either as a PIL image or as a numpy array.  Arrays are not copied, such that tiles can be
+    views into a single, larger buffer (see TileSplitter.split_image_iter(...)).  The other representation is only
+    created when it is first accessed, and then cached.
     """
 
-    img: Image.Image  # image, which also defines width and height of the tile
-    left: int  # left-most pixel of the tile, inclusive
-    top: int  # top-most pixel of the tile, inclusive
+    def __init__(
+        self,
+        img: Image.Image | None = None,
+        left: int = 0,
+        top: int = 0,
+        *,
+        pixels: np.ndarray | None = None,
+    ):
+        """
+        :param img: tile pixels as a PIL image.
+        :param left: left-most pixel of the tile, inclusive.
+        :param top: top-most pixel of the tile, inclusive.
+        :param pixels: tile pixels as a (height, width[, channels]) uint8 array, as alternative to 'img'.
+        """
+        if (img is None) == (pixels is None):
+            raise ValueError("Exactly one of 'img' and 'pixels' should be provided.")
+        self._img = img
+        self._pixels = pixels
+        self.left = left
+        self.top = top
+
+    # -------------------------------------------------------------------------
+    #  Pixel data
+    # -------------------------------------------------------------------------
+    @property
+    def img(self) -> Image.Image:
+        """Tile pixels as a PIL image; materialized from the array on first access if needed."""
+        if self._img is None:
+            self._img = Image.fromarray(np.ascontiguousarray(self._pixels))
+        return self._img
 
+    @property
+    def pixels(self) -> np.ndarray:
+        """Tile pixels as a (height, width[, channels]) uint8 array; treat as read-only."""
+        if self._pixels is None:
+            self._pixels = np.asarray(self._img)
+        return self._pixels
+
+    def mean_gradient(self) -> float:
+        """
+        Mean absolute difference between horizontally & vertically adjacent pixel values (0-255 scale, averaged over
+        channels), i.e. a cheap measure of the amount of detail in the tile; 0.0 for tiles of a single color.
+        """
+        pixels = self.pixels.astype(np.int16)
+        diffs = [np.abs(np.diff(pixels, axis=axis)) for axis in (0, 1) if pixels.shape[axis] > 1]
+        if not diffs:
+            return 0.0
+        return float(sum(d.sum() for d in diffs) / sum(d.size for d in diffs))
+
+    # -------------------------------------------------------------------------
+    #  Position & size
+    # -------------------------------------------------------------------------
     @property
     def width(self) -> int:
-        return self.img.width
+        return self._img.width if self._img is not None else self._pixels.shape[1]
 
     @property
     def height(self) -> int:
-        return self.img.height
+        return self._img.height if self._img is not None else self._pixels.shape[0]
 
     @property
     def right(self) -> int:
         """Right-most pixel of the tile, inclusive."""
-        return self.left + self.img.width - 1
+        return self.left + self.width - 1
 
     @property
     def bottom(self) -> int:
         """Bottom-most pixel of the tile, inclusive."""
-        return self.top + self.img.height - 1
+        return self.top + self.height - 1
 
     @property
     def range(self) -> TileRange:
         """Returns range of this tile, i.e. position & size, without image data."""
         return TileRange(left=self.left, top=self.top, width=self.width, height=self.height)
+
+    def __repr__(self) -> str:
+        return f"Tile(left={self.left}, top={self.top}, width={self.width}, height={self.height})"
@@ -19,7 +19,8 @@ class TileDimSpec:
             raise ValueError(f"max_value {self.max_value} must be a multiple of {self.multiplier}.")
 
     def valid_values(self) -> list[int]:
-        return [value for value in range(self.max_value + 1) if self.is_valid(value)]
+        # min_value & max_value are validated to be multiples of multiplier in __post_init__
+        return list(range(self.min_value, self.max_value + 1, self.multiplier))
 
     def is_valid(self, value: int) -> bool:
         return (self.min_value <= value <= self.max_value) and (value % self.multiplier == 0)
@@ -17,3 +17,9 @@ class TileRange:
     def bottom(self) -> int:
         """Bottom-most pixel of the tile range, inclusive."""
         return self.top + self.height - 1
+
+    def scaled(self, factor: int) -> "TileRange":
+        """Returns the corresponding tile range in an image that is 'factor' times larger."""
+        return TileRange(
+            left=factor * self.left, top=factor * self.top, width=factor * self.width, height=factor * self.height
+        )
@@ -1,17 +1,33 @@
 import os
+import threading
 from pathlib import Path
+from typing import Callable
 
 import click
 from PIL import Image
 
 from core import ImageUpscaler, TileUpscaler
+from core.batch import BatchJob, BatchResult, BatchUpscaler, resolve_inputs
+from core.image_upscalers import Checkpoint
+from core.service import UpscaleHTTPServer, UpscaleService
+from core.tile_upscalers import TileCache, TileUpscaler_ProcessPool
+from core.tiles import TileMerger, TileSplitter
+from utils.tracing import disable_tracing, enable_tracing, span
 
 
 # =================================================================================================
 #  Upscaling command
 # =================================================================================================
 @click.command()
-@click.option("--input-file", "-i", type=click.Path(exists=True), required=True, help="Input file path")
+@click.option(
+    "--input-file",
+    "-i",
+    type=str,
+    required=False,
+    multiple=True,
+    help="Input file path. Can be repeated, and can also be a directory, glob pattern or file list (.txt) "
+    + "to upscale a batch of images.  Required unless --serve is used.",
+)
 @click.option(
     "--output-file",
     "-o",
@@ -19,6 +35,12 @@ from core import ImageUpscaler, TileUpscaler
     required=False,
     help="Output file path; when omitted <filename>_upscaled.png.",
 )
+@click.option(
+    "--output-dir",
+    type=click.Path(file_okay=False),
+    required=False,
+    help="Output directory for batch mode; when omitted, outputs are written next to the inputs.",
+)
 @click.option("--scale", "-s", type=float, default=4.0, help="Scaling factor (default: 4.0)")
 @click.option(
     "--stitch-overlap-fraction",
@@ -27,14 +49,163 @@ from core import ImageUpscaler, TileUpscaler
     default=0.0,
     help="Fractional tile overlap for stitch seam optimization",
 )
+@click.option(
+    "--coarse-seams",
+    type=bool,
+    default=False,
+    is_flag=True,
+    help="Optimize stitch seams at input resolution & refine them near the seam only; faster for large overlaps",
+)
+@click.option(
+    "--merge-mode",
+    type=click.Choice(["auto", *TileMerger.SUPPORTED_MODES]),
+    default="auto",
+    help="Method to merge tiles: paste, stitch (seam optimization) or blend (feathering, needs little overlap); "
+    + "auto = paste without overlap, stitch otherwise (default: auto)",
+)
+@click.option(
+    "--min-detail",
+    type=click.FloatRange(min=0.0, max=1.0, min_open=True),
+    default=1.0,
+    help="Min. size of images passed to the model, as a fraction of the input; values < 1.0 allow shrinking the "
+    + "input first, trading detail for speed (default: 1.0)",
+)
+@click.option(
+    "--tile-strategy",
+    type=click.Choice(TileSplitter.SUPPORTED_STRATEGIES),
+    default="uniform",
+    help="Tile sizes: uniform, or non_uniform to allow a smaller last tile per row/column, "
+    + "reducing pixels spent on overlap (default: uniform)",
+)
+@click.option(
+    "--flat-tile-threshold",
+    type=click.FloatRange(min=0.0),
+    default=0.0,
+    help="Tiles with a mean gradient (0-255 scale) below this value are upscaled with a classical resampler instead "
+    + "of the model, e.g. 1.0 for flat areas of scans & screenshots; 0 = disabled (default: 0)",
+)
+@click.option(
+    "--dedup-tiles/--no-dedup-tiles",
+    default=True,
+    help="Upscale tiles with identical pixels only once per pass, reusing the result (default: enabled)",
+)
 @click.option(
     "--model",
     "-m",
     type=click.Choice(TileUpscaler.SUPPORTED_MODELS),
     default=TileUpscaler.SUPPORTED_MODELS[0],
-    help=f"Upscaling model ({TileUpscaler.SUPPORTED_MODELS})",
+    help=f"Upscaling model ({TileUpscaler.SUPPORTED_MODELS}); lanczos & bicubic are classical 4x resamplers "
+    + "without a model, e.g. for quick previews of tiling & merging",
 )
 @click.option("--prompt", "-p", type=str, default="", help="Prompt to guide the upscaling process")
+@click.option(
+    "--batch-size",
+    "-b",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Max. number of tiles processed by the model in a single batch (default: 1)",
+)
+@click.option(
+    "--pipeline-depth",
+    type=click.IntRange(min=0),
+    default=0,
+    help="Overlap tile preparation & merging with inference, queueing up to this many batches; 0 = sequential.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of worker processes running the model in parallel, e.g. for CPU-only hosts with many cores (default: 1)",
+)
+@click.option(
+    "--threads-per-worker",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Max. number of compute threads per worker process (default: all cores divided over all workers)",
+)
+@click.option("--seed", type=int, default=None, help="Random seed, for deterministic results (default: random)")
+@click.option(
+    "--tile-cache",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Directory in which upscaled tiles are cached, for reuse in subsequent runs (default: no caching)",
+)
+@click.option(
+    "--tile-cache-size",
+    type=click.FloatRange(min=0.0),
+    default=10.0,
+    help="Max. size of the tile cache in GB; least recently used tiles are evicted beyond this size (default: 10)",
+)
+@click.option(
+    "--checkpoint-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Directory in which completed tiles & intermediate images are saved, such that the job can be resumed",
+)
+@click.option(
+    "--resume",
+    type=bool,
+    default=False,
+    is_flag=True,
+    help="Resume from the checkpoint in --checkpoint-dir, if any, instead of starting over",
+)
+@click.option(
+    "--canvas-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Directory for memory-mapped intermediate & output images, for upscales that don't fit in RAM "
+    + "(default: keep images in memory)",
+)
+@click.option(
+    "--preview",
+    "preview_file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="BMP file with a preview of the image being upscaled, at the target size, updated in place as tiles "
+    + "are upscaled",
+)
+@click.option(
+    "--preview-interval",
+    type=click.FloatRange(min=0.0),
+    default=10.0,
+    help="Min. number of seconds between preview updates being written to the preview file (default: 10)",
+)
+@click.option(
+    "--trace",
+    "trace_file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write a Chrome trace (JSON, for chrome://tracing or ui.perfetto.dev) of all stages of the run to this "
+    + "file, and print a per-stage summary at the end",
+)
+@click.option(
+    "--serve",
+    type=bool,
+    default=False,
+    is_flag=True,
+    help="Run as a long-running local HTTP service keeping the model loaded, instead of upscaling --input-file",
+)
+@click.option("--host", type=str, default="127.0.0.1", help="Interface the service listens on (default: 127.0.0.1)")
+@click.option("--port", type=click.IntRange(min=0), default=8000, help="Port the service listens on (default: 8000)")
+@click.option(
+    "--max-queue-size",
+    type=click.IntRange(min=1),
+    default=8,
+    help="Max. number of jobs queued by the service; further submissions are rejected (default: 8)",
+)
+@click.option(
+    "--job-timeout",
+    type=click.FloatRange(min=0.0, min_open=True),
+    default=600.0,
+    help="Max. number of seconds between submission & completion of a service job (default: 600)",
+)
+@click.option(
+    "--dry-run",
+    type=bool,
+    default=False,
+    is_flag=True,
+    help="Only print the planned upscale & resize steps and their estimated cost, without loading the model",
+)
 @click.option(
     "--debug",
     "-d",
@@ -44,42 +215,213 @@ from core import ImageUpscaler, TileUpscaler
     help="Enable extra debug output",
 )
 def upscale(
-    input_file: str,
+    input_file: tuple[str, ...],
     output_file: str | None,
+    output_dir: str | None,
     scale: float,
     stitch_overlap_fraction: float,
+    coarse_seams: bool,
+    merge_mode: str,
+    min_detail: float,
+    tile_strategy: str,
+    flat_tile_threshold: float,
+    dedup_tiles: bool,
     model: str,
     prompt: str,
+    batch_size: int,
+    pipeline_depth: int,
+    workers: int,
+    threads_per_worker: int | None,
+    seed: int | None,
+    tile_cache: str | None,
+    tile_cache_size: float,
+    checkpoint_dir: str | None,
+    resume: bool,
+    canvas_dir: str | None,
+    preview_file: str | None,
+    preview_interval: float,
+    trace_file: str | None,
+    serve: bool,
+    host: str,
+    port: int,
+    max_queue_size: int,
+    job_timeout: float,
+    dry_run: bool,
     debug: bool,
 ):
-    """Upscale an image by a given factor."""
+    """Upscale an image (or a batch of images) by a given factor, or run as a local upscaling service."""
 
-    # --- path handling -------------------------
-    if isinstance(input_file, str):
-        input_file = Path(input_file)
-    if not output_file:
-        output_file = _construct_output_file_path(input_file)
-    elif isinstance(output_file, str):
-        output_file = Path(output_file)
+    # --- argument validation -------------------
+    if resume and not checkpoint_dir:
+        raise click.UsageError("--resume requires --checkpoint-dir.")
+    if serve and (input_file or output_file or output_dir or checkpoint_dir or dry_run or preview_file or trace_file):
+        raise click.UsageError(
+            "--serve cannot be combined with input/output files, --checkpoint-dir, --preview, --trace or --dry-run."
+        )
+    if not (serve or input_file):
+        raise click.UsageError("Missing option '--input-file' / '-i'.")
+    try:
+        input_files = resolve_inputs(list(input_file)) if input_file else []
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--input-file")
+    batch_mode = (len(input_files) > 1) or (output_dir is not None)
+    if batch_mode and output_file:
+        raise click.UsageError("--output-file cannot be used with multiple inputs; use --output-dir instead.")
+
+    # --- set up upscalers ----------------------
+    tile_upscaler = TileUpscaler.from_name(model, seed=seed)  # shared by all images, such that it's loaded only once
+    if dry_run:
+        # planning only requires the tile geometry of the model, not the model itself
+        image_upscaler = ImageUpscaler.multi_tile(
+            tile_upscaler, stitch_overlap_fraction, debug, min_detail=min_detail, tile_strategy=tile_strategy
+        )
+        _print_plans(input_files, scale, image_upscaler)
+        return
+    if workers > 1:
+        tile_upscaler = TileUpscaler_ProcessPool(
+            tile_upscaler, n_workers=workers, threads_per_worker=threads_per_worker
+        )
+        tile_upscaler.warmup()  # fork workers now, before we start any other threads
+    else:
+        tile_upscaler.warmup_in_background()  # load model while we're decoding & splitting the input
+    if tile_cache:
+        tile_upscaler.tile_cache = TileCache(tile_cache, max_size_bytes=int(tile_cache_size * 1024**3))
 
-    # --- show what we're going to do -----------
-    click.echo(f"Upscaling {input_file} by a factor of {scale} to {output_file}")
+    def make_image_upscaler(checkpoint_subdir: str = "", cancel_event: threading.Event | None = None) -> ImageUpscaler:
+        return ImageUpscaler.multi_tile(
+            tile_upscaler=tile_upscaler,
+            stitch_overlap_fraction=stitch_overlap_fraction,
+            coarse_seams=coarse_seams,
+            merge_mode=None if merge_mode == "auto" else merge_mode,
+            min_detail=min_detail,
+            tile_strategy=tile_strategy,
+            flat_tile_threshold=flat_tile_threshold,
+            dedup_tiles=dedup_tiles,
+            preview_file=preview_file,
+            preview_interval=preview_interval,
+            batch_size=batch_size,
+            pipeline_depth=pipeline_depth,
+            checkpoint=Checkpoint(Path(checkpoint_dir) / checkpoint_subdir, resume=resume) if checkpoint_dir else None,
+            cancel_event=cancel_event,
+            canvas_dir=canvas_dir,
+            debug=debug,
+        )
 
     # --- actual upscaling ----------------------
+    tracer = enable_tracing() if trace_file else None
+    try:
+        if serve:
+            _serve(host, port, max_queue_size, job_timeout, lambda cancel_event: make_image_upscaler("", cancel_event))
+        elif batch_mode:
+            _upscale_batch(input_files, output_dir, scale, prompt, make_image_upscaler)
+        else:
+            input_file = input_files[0]
+            output_file = Path(output_file) if output_file else _construct_output_file_path(input_file)
+
+            # show what we're going to do
+            click.echo(f"Upscaling {input_file} by a factor of {scale} to {output_file}")
+
+            # load, upscale & save
+            with span("load_image", file=str(input_file)):
+                img = Image.open(input_file).convert("RGB")
+            canvas = make_image_upscaler().upscale_canvas(img, scale, prompt=prompt)
+            with span("save_image", file=str(output_file), size=canvas.size):
+                canvas.save(output_file)
+    finally:
+        # --- summary ---------------------------
+        if tile_upscaler.tile_cache is not None:
+            click.echo(f"Tile cache: {tile_upscaler.tile_cache}")
+        if tracer is not None:
+            disable_tracing()
+            tracer.write_chrome_trace(trace_file)
+            click.echo(f"Trace written to {trace_file}; per-stage summary:")
+            click.echo(tracer.summary())
+
+
+def _print_plans(input_files: list[Path], scale: float, image_upscaler: ImageUpscaler):
+    """Prints the upscale plan of each input file, reading only the image headers."""
+    total_tiles, total_pixels = 0, 0
+    for input_file in input_files:
+        with Image.open(input_file) as img:
+            width, height = img.size
+        plan = image_upscaler.plan(width, height, scale)
+        click.echo(f"{input_file} [{width}x{height}] -> [{int(width * scale)}x{int(height * scale)}]")
+        click.echo(plan.describe())
+        total_tiles, total_pixels = total_tiles + plan.n_tiles, total_pixels + plan.inferred_pixels
+    if len(input_files) > 1:
+        click.echo(f"Total: {len(input_files)} image(s), {total_tiles} tile(s), {total_pixels / 1e6:.2f} MP inferred")
+
+
+def _upscale_batch(
+    input_files: list[Path],
+    output_dir: str | None,
+    scale: float,
+    prompt: str,
+    make_image_upscaler: Callable[[str], ImageUpscaler],
+):
+    """Upscale all input files, reusing the same tile upscaler; failures are reported but don't abort the batch."""
+
+    # --- construct jobs ------------------------
+    jobs, used_output_files = [], set()
+    for input_file in input_files:
+        output_file = _construct_output_file_path(input_file)
+        if output_dir is not None:
+            output_file = Path(output_dir) / output_file.name
+        output_file = _make_unique(output_file, used_output_files)
+        used_output_files.add(output_file)
+        jobs.append(BatchJob(input_file=input_file, output_file=output_file))
+
+    click.echo(f"Upscaling {len(jobs)} images by a factor of {scale}")
 
-    # load
-    img = Image.open(input_file).convert("RGB")
+    # --- run -----------------------------------
+    def on_result(result: BatchResult):
+        if result.succeeded:
+            click.echo(f"  OK     {result.job.input_file} -> {result.job.output_file} ({result.duration:.1f}s)")
+        else:
+            click.echo(f"  FAILED {result.job.input_file}: {result.error}", err=True)
 
-    # upscale
-    image_upscaler = ImageUpscaler.multi_tile(
-        tile_upscaler=TileUpscaler.from_name(model),
-        stitch_overlap_fraction=stitch_overlap_fraction,
-        debug=debug,
+    batch_upscaler = BatchUpscaler(
+        image_upscaler_factory=lambda job: make_image_upscaler(job.output_file.stem),
+        scale=scale,
+        prompt=prompt,
     )
-    img = image_upscaler.upscale(img, scale, prompt=prompt)
+    results = batch_upscaler.run(jobs, on_result=on_result)
+
+    # --- summary -------------------------------
+    n_failed = sum(not result.succeeded for result in results)
+    click.echo(f"Upscaled {len(results) - n_failed}/{len(results)} images successfully")
+    if n_failed:
+        raise click.exceptions.Exit(1)
+
+
+def _serve(
+    host: str,
+    port: int,
+    max_queue_size: int,
+    job_timeout: float,
+    make_image_upscaler: Callable[[threading.Event], ImageUpscaler],
+):
+    """Run the local upscaling service until interrupted."""
+    service = UpscaleService(make_image_upscaler, max_queue_size=max_queue_size, job_timeout=job_timeout)
+    server = UpscaleHTTPServer(service, host=host, port=port)
+    service.start()
+    click.echo(f"Upscale service listening on http://{host}:{server.server_port}  (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        click.echo("Stopping upscale service...")
+    finally:
+        server.server_close()
+        service.stop()
+
 
-    # save
-    img.save(output_file)
+def _make_unique(path: Path, used: set[Path]) -> Path:
+    """Returns path, or path with a numeric suffix added to its stem if it is already in use."""
+    i, unique_path = 1, path
+    while unique_path in used:
+        i += 1
+        unique_path = path.with_stem(f"{path.stem}_{i}")
+    return unique_path
 
 
 def _construct_output_file_path(input_file: Path) -> Path:
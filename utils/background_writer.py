@@ -0,0 +1,30 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class BackgroundWriter:
+    """
+    Runs (rendering &) writing of output files in a single background thread, such that the caller doesn't need
+    to wait for them.  The number of pending jobs is bounded, to avoid holding on to too many images in memory.
+
+    Errors are re-raised by wait().
+    """
+
+    def __init__(self, max_pending: int = 4):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="background-writer")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._futures: list[Future] = []
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs):
+        """Schedule fn(*args, **kwargs) for execution; blocks only if max_pending jobs are already pending."""
+        self._slots.acquire()
+        future = self._executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+
+    def wait(self):
+        """Wait until all pending jobs are finished; re-raises the first error, if any."""
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
@@ -0,0 +1,53 @@
+import json
+import threading
+from pathlib import Path
+
+from utils import tracing
+from utils.tracing import disable_tracing, enable_tracing, span
+
+
+def test_tracing_disabled():
+    # --- arrange -----------------------------------------
+    disable_tracing()
+
+    # --- act & assert ------------------------------------
+    with span("stage", step=0) as s:
+        assert s is None
+    assert span("stage") is span("other_stage")  # shared no-op context manager
+
+
+def test_tracing_chrome_trace(tmp_path: Path):
+    # --- arrange -----------------------------------------
+    tracer = enable_tracing()
+
+    # --- act ---------------------------------------------
+    def work():
+        with span("inner", tile_size=(4, 4)):
+            pass
+
+    try:
+        with span("outer", step=1):
+            with span("inner", tile_size=(8, 8)):
+                pass
+            thread = threading.Thread(target=work, name="worker")
+            thread.start()
+            thread.join()
+    finally:
+        disable_tracing()
+    with span("ignored"):
+        pass
+    tracer.write_chrome_trace(tmp_path / "trace.json")
+
+    # --- assert ------------------------------------------
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    spans = [e for e in events if e["ph"] == "X"]
+    thread_names = {e["tid"]: e["args"]["name"] for e in events if e["ph"] == "M"}
+    assert [e["name"] for e in spans] == ["outer", "inner", "inner"]
+    assert [e["args"] for e in spans] == [{"step": 1}, {"tile_size": [8, 8]}, {"tile_size": [4, 4]}]
+    assert thread_names[spans[2]["tid"]] == "worker" != thread_names[spans[0]["tid"]]
+    for inner in spans[1:]:
+        assert spans[0]["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= spans[0]["ts"] + spans[0]["dur"]
+    assert tracing._tracer is None
+
+    summary = tracer.summary().splitlines()
+    assert [line.split()[:2] for line in summary[1:]] == [["outer", "1"], ["inner", "2"]]
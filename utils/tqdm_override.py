@@ -11,7 +11,7 @@ from tqdm import auto
 _orig_tqdm = tqdm.tqdm
 
 
-def my_tqdm(iterable, *args, **kwargs):
+def my_tqdm(iterable=None, *args, **kwargs):
     # Override tqdm to do nothing in certain cases
     if ("Loading pipeline components" in kwargs.get("desc", "")) or (kwargs.get("desc", "") == ""):
         return iterable  # no tqdm, just return the iterable as is
@@ -0,0 +1,135 @@
+"""
+Lightweight tracing of the stages of an upscaling job, i.e. timed spans with attributes, which can be exported as a
+Chrome trace (viewable in chrome://tracing or https://ui.perfetto.dev) and summarized per stage.
+
+Tracing is disabled by default, in which case span(...) returns a shared no-op context manager, such that
+instrumented code pays no more than a function call & a global lookup per span.
+
+Usage:
+    tracer = enable_tracing()
+    with span("split_tiles", step=0, n_tiles=16):
+        ...
+    tracer.write_chrome_trace("trace.json")
+    print(tracer.summary())
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, ContextManager, Iterator
+
+_NO_SPAN = nullcontext()
+_tracer: Tracer | None = None
+
+
+# =================================================================================================
+#  Main API
+# =================================================================================================
+def span(name: str, **attrs: Any) -> ContextManager:
+    """
+    Context manager recording a span with the given name & (json-serializable) attributes, if tracing is enabled.
+    """
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.span(name, **attrs)
+
+
+def enable_tracing() -> Tracer:
+    """Enables tracing, returning the new global tracer that records all spans from now on."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def disable_tracing():
+    global _tracer
+    _tracer = None
+
+
+# =================================================================================================
+#  Tracer
+# =================================================================================================
+@dataclass
+class SpanRecord:
+    name: str
+    start_ns: int  # relative to the creation of the tracer
+    duration_ns: int
+    thread_id: int
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+
+class Tracer:
+    """Thread-safe recorder of spans."""
+
+    def __init__(self):
+        self.spans: list[SpanRecord] = []
+        self._t0_ns = time.perf_counter_ns()
+        self._thread_names: dict[int, str] = dict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[None]:
+        t_start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            t_end_ns = time.perf_counter_ns()
+            thread = threading.current_thread()
+            record = SpanRecord(name, t_start_ns - self._t0_ns, t_end_ns - t_start_ns, thread.ident, attrs)
+            with self._lock:
+                self.spans.append(record)
+                self._thread_names.setdefault(thread.ident, thread.name)
+
+    # -------------------------------------------------------------------------
+    #  Export
+    # -------------------------------------------------------------------------
+    def chrome_trace(self) -> dict[str, Any]:
+        """Returns all spans as a Chrome trace (Trace Event Format), with 'complete' events in microseconds."""
+        pid = os.getpid()
+        with self._lock:
+            spans, thread_names = list(self.spans), dict(self._thread_names)
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}}
+            for tid, thread_name in thread_names.items()
+        ]
+        for s in sorted(spans, key=lambda s: s.start_ns):
+            events.append(
+                {
+                    "name": s.name,
+                    "ph": "X",
+                    "ts": s.start_ns / 1e3,
+                    "dur": s.duration_ns / 1e3,
+                    "pid": pid,
+                    "tid": s.thread_id,
+                    "args": s.attrs,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str | Path):
+        Path(path).write_text(json.dumps(self.chrome_trace(), default=str))
+
+    def summary(self) -> str:
+        """
+        Table with the number of spans & their total, mean and max duration per stage (= span name), in order of
+        first occurrence.  Spans of nested or concurrent stages overlap, so totals don't add up to the wall time.
+        """
+        stats: dict[str, list[float]] = dict()  # name -> durations in seconds
+        with self._lock:
+            for s in sorted(self.spans, key=lambda s: s.start_ns):
+                stats.setdefault(s.name, []).append(s.duration_ns / 1e9)
+
+        lines = [f"  {'stage':<20}  {'count':>6}  {'total [s]':>10}  {'mean [ms]':>10}  {'max [ms]':>10}"]
+        for name, durations in stats.items():
+            total = sum(durations)
+            lines.append(
+                f"  {name:<20}  {len(durations):>6}  {total:>10.3f}  {1e3 * total / len(durations):>10.2f}"
+                + f"  {1e3 * max(durations):>10.2f}"
+            )
+        return "\n".join(lines)